@@ -0,0 +1,174 @@
+"""
+Deterministic synthetic corpus of municipal resolutions for the benchmarks.
+
+Text-layer PDFs are written with reportlab. Scanned-looking PDFs are the same
+pages rasterized, slightly skewed, with Gaussian noise and speckles, and
+embedded as JPEG images without a text layer. The same spec and seed always
+produce the same pages.
+"""
+
+import os
+import random
+from dataclasses import dataclass
+from typing import List
+
+import cv2
+import fitz
+import numpy as np
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfgen import canvas
+
+MONTHS = ["enero", "febrero", "marzo", "abril", "mayo", "junio", "julio", "agosto",
+          "septiembre", "octubre", "noviembre", "diciembre"]
+NAMES = ["María Gómez", "Juan Pérez", "Lucía Fernández", "Carlos Rodríguez", "Ana Martínez", "Jorge López"]
+CONSIDERANDO = [
+    "Que la adjudicataria ha cancelado la totalidad de las cuotas del plan de viviendas;",
+    "Que la Dirección de Asuntos Jurídicos ha tomado la intervención que le compete;",
+    "Que corresponde dictar el acto administrativo que disponga la escrituración del inmueble;",
+    "Que la Dirección Provincial de Vivienda y Urbanismo ha verificado la ocupación efectiva;",
+    "Que obra en autos el informe de dominio y el plano de mensura correspondiente;",
+    "Que el presente se dicta en uso de las facultades conferidas por la Ley N° 6690;",
+]
+SCAN_DPI = 150
+
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    """One benchmark document."""
+    kind: str  # "text" (text layer) or "scanned" (image only)
+    pages: int
+    noise: float = 0.0  # Gaussian noise sigma of scanned pages, in gray levels
+
+    @property
+    def name(self) -> str:
+        if self.kind == "text":
+            return f"text_p{self.pages}"
+        return f"scanned_n{self.noise:g}_p{self.pages}"
+
+
+CORPORA = {
+    "quick": [
+        CorpusSpec("text", 1), CorpusSpec("text", 5),
+        CorpusSpec("scanned", 1, 0), CorpusSpec("scanned", 5, 10),
+    ],
+    "full": [
+        CorpusSpec("text", 1), CorpusSpec("text", 20), CorpusSpec("text", 200),
+        CorpusSpec("scanned", 1, 0), CorpusSpec("scanned", 1, 8), CorpusSpec("scanned", 1, 20),
+        CorpusSpec("scanned", 20, 0), CorpusSpec("scanned", 20, 8), CorpusSpec("scanned", 20, 20),
+        CorpusSpec("scanned", 200, 8),
+    ],
+}
+
+
+def resolution_paragraphs(rng: random.Random, pages: int) -> List[List[str]]:
+    """
+    Write the paragraphs of a resolution, one list per page.
+
+    Args:
+        rng: Seeded random generator
+        pages: Number of pages
+
+    Returns:
+        Paragraphs of every page
+    """
+    year = rng.randint(2015, 2024)
+    number = rng.randint(1, 4000)
+    header = [
+        "GOBIERNO DE LA PROVINCIA DE SANTA FE",
+        "Dirección Provincial de Vivienda y Urbanismo",
+        f"RESOLUCIÓN N° {number}/{year}",
+        f"SANTA FE, {rng.randint(1, 28)} de {rng.choice(MONTHS)} de {year}",
+        f"VISTO: El Expediente N° DE-0963-{rng.randint(10000000, 99999999)}-{rng.randint(1, 9)} "
+        f"por el cual se tramita la escrituración de la vivienda; y",
+        "CONSIDERANDO:",
+    ]
+
+    page_paragraphs = []
+    for page in range(pages):
+        paragraphs = list(header) if page == 0 else []
+        for article in range(rng.randint(4, 7)):
+            if page == 0 and article < 3:
+                paragraphs.append(rng.choice(CONSIDERANDO))
+                continue
+            name = rng.choice(NAMES)
+            paragraphs.append(
+                f"ARTÍCULO {page * 10 + article + 1}°.- Adjudicar en venta a {name}, D.N.I. N° "
+                f"{rng.randint(10, 45)}.{rng.randint(100, 999)}.{rng.randint(100, 999)}, la unidad habitacional "
+                f"ubicada en el Lote {rng.randint(1, 60)} de la Manzana {rng.randint(1, 400)}, Padrón Municipal "
+                f"N° {rng.randint(100000, 999999)}, por el precio de $ {rng.randint(100, 9999)}.{rng.randint(100, 999)},00."
+            )
+        paragraphs.append("Regístrese, comuníquese, notifíquese y archívese.")
+        page_paragraphs.append(paragraphs)
+    return page_paragraphs
+
+
+def write_text_pdf(path: str, spec: CorpusSpec, seed: int) -> None:
+    """Write a text-layer resolution PDF with reportlab."""
+    rng = random.Random(f"{seed}-{spec.pages}")
+    width, height = A4
+    pdf = canvas.Canvas(path, pagesize=A4, invariant=1)
+    for paragraphs in resolution_paragraphs(rng, spec.pages):
+        y = height - 60
+        for paragraph in paragraphs:
+            for line in simpleSplit(paragraph, "Helvetica", 11, width - 120):
+                pdf.setFont("Helvetica", 11)
+                pdf.drawString(60, y, line)
+                y -= 15
+            y -= 8
+        pdf.showPage()
+    pdf.save()
+
+
+def write_scanned_pdf(path: str, text_pdf_path: str, spec: CorpusSpec, seed: int) -> None:
+    """Rasterize a text-layer PDF into a scanned-looking, image-only PDF."""
+    rng = np.random.default_rng([seed, spec.pages, int(spec.noise * 100)])
+    source = fitz.open(text_pdf_path)
+    scanned = fitz.open()
+    zoom = SCAN_DPI / 72
+    for page in source:
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+        img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width)
+
+        # Slight skew, like a page fed crooked into the scanner
+        angle = rng.uniform(-0.8, 0.8)
+        rotation = cv2.getRotationMatrix2D((pix.width / 2, pix.height / 2), angle, 1.0)
+        img = cv2.warpAffine(img, rotation, (pix.width, pix.height), borderValue=255).astype(np.float32)
+
+        # Paper tone, sensor noise and dust speckles
+        img = img * 0.92 + 8
+        if spec.noise:
+            img += rng.normal(0, spec.noise, img.shape)
+            speckles = rng.random(img.shape) < spec.noise / 20000
+            img[speckles] = 0
+        _, jpeg = cv2.imencode(".jpg", np.clip(img, 0, 255).astype(np.uint8), [cv2.IMWRITE_JPEG_QUALITY, 85])
+
+        scanned_page = scanned.new_page(width=page.rect.width, height=page.rect.height)
+        scanned_page.insert_image(scanned_page.rect, stream=jpeg.tobytes())
+    scanned.save(path, garbage=3, deflate=True, no_new_id=True)
+
+
+def build_corpus(specs: List[CorpusSpec], directory: str, seed: int = 0) -> List[str]:
+    """
+    Generate the documents of a corpus, reusing the ones already generated.
+
+    Args:
+        specs: Documents to generate
+        directory: Directory the PDFs are written to
+        seed: Random seed
+
+    Returns:
+        Paths of the PDFs, in spec order
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for spec in specs:
+        path = os.path.join(directory, f"{spec.name}_s{seed}.pdf")
+        if not os.path.exists(path):
+            text_pdf_path = os.path.join(directory, f"text_p{spec.pages}_s{seed}.pdf")
+            if not os.path.exists(text_pdf_path):
+                write_text_pdf(text_pdf_path, CorpusSpec("text", spec.pages), seed)
+            if spec.kind == "scanned":
+                write_scanned_pdf(path, text_pdf_path, spec, seed)
+        paths.append(path)
+    return paths
@@ -0,0 +1,191 @@
+"""
+Local fake Ollama server with configurable latency, for benchmarking the summarizer.
+
+Implements /api/generate (streaming and not), /api/embed, /api/tags and /api/version.
+Every request sleeps `prompt_seconds` plus `token_seconds` per generated
+token; the first one also sleeps `load_seconds`, like a cold model load.
+
+Usage:
+    python benchmarks/fake_ollama.py --port 11500 --prompt-seconds 0.5 --token-seconds 0.01
+"""
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+SUMMARY_WORDS = (
+    "Resolución de la Dirección Provincial de Vivienda y Urbanismo que adjudica en venta "
+    "una unidad habitacional a la beneficiaria, fija el precio y dispone la escrituración del inmueble."
+).split()
+EMBEDDING_DIMENSIONS = 64
+
+
+class FakeOllamaServer:
+    """Fake Ollama server running in a background thread."""
+
+    def __init__(
+        self,
+        port: int = 0,
+        load_seconds: float = 0.0,
+        prompt_seconds: float = 0.2,
+        token_seconds: float = 0.005,
+        response_words: int = 120,
+        model: str = "benchmark-model",
+    ):
+        """
+        Configure the server. Nothing listens until `start()`.
+
+        Args:
+            port: Port to listen on (0 picks a free one)
+            load_seconds: Extra latency of the first request
+            prompt_seconds: Latency before the first token of every request
+            token_seconds: Latency per generated token
+            response_words: Words of every response
+            model: Model name listed by /api/tags
+        """
+        self.load_seconds = load_seconds
+        self.prompt_seconds = prompt_seconds
+        self.token_seconds = token_seconds
+        self.response_words = response_words
+        self.model = model
+        self.requests = 0
+        # Client (host, port) of every request: one per pooled connection
+        self.connections: set[tuple[str, int]] = set()
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self) -> "FakeOllamaServer":
+        """Start serving in a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the server."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _response_tokens(self) -> list[str]:
+        words = [SUMMARY_WORDS[i % len(SUMMARY_WORDS)] for i in range(self.response_words)]
+        return [f"{word} " for word in words] + ["<|end-output|>"]
+
+    def _handler_class(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def _send_json(self, payload: dict) -> None:
+                data = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self) -> None:
+                if self.path == "/api/version":
+                    self._send_json({"version": "0.0.0-fake"})
+                    return
+                self._send_json({"models": [{
+                    "model": f"{server.model}:latest", "name": f"{server.model}:latest", "digest": "fake",
+                    "size": 1, "modified_at": "2024-01-01T00:00:00Z",
+                }]})
+
+            def do_POST(self) -> None:
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])) or b"{}")
+                with server._lock:
+                    server.requests += 1
+                    server.connections.add(self.client_address)
+                    load_seconds = 0.0 if server._loaded else server.load_seconds
+                    server._loaded = True
+
+                time.sleep(load_seconds + server.prompt_seconds)
+                if self.path == "/api/embed":
+                    self._send_json({"model": body.get("model", server.model), "embeddings": self._embeddings(body)})
+                    return
+                tokens = self._tokens(body)
+                final = {
+                    "model": body.get("model", server.model), "created_at": "2024-01-01T00:00:00Z", "done": True,
+                    "done_reason": "stop", "load_duration": int(load_seconds * 1e9),
+                    "prompt_eval_duration": int(server.prompt_seconds * 1e9),
+                    "eval_count": len(tokens), "eval_duration": int(len(tokens) * server.token_seconds * 1e9),
+                }
+
+                if not body.get("stream", True):
+                    time.sleep(len(tokens) * server.token_seconds)
+                    self._send_json({**final, "response": "".join(tokens)})
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    for token in tokens:
+                        time.sleep(server.token_seconds)
+                        self._write_chunk({
+                            "model": final["model"], "created_at": final["created_at"], "done": False, "response": token,
+                        })
+                    self._write_chunk({**final, "response": ""})
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client stopped the stream early
+                    pass
+
+            def _tokens(self, body: dict) -> list[str]:
+                # An empty prompt only loads the model (warm-up)
+                return server._response_tokens() if body.get("prompt") else []
+
+            def _embeddings(self, body: dict) -> list[list[float]]:
+                # Deterministic pseudo-embeddings: equal texts get equal vectors
+                texts = body.get("input") or []
+                texts = [texts] if isinstance(texts, str) else texts
+                return [
+                    [byte / 255 - 0.5 for byte in hashlib.shake_256(text.encode("utf-8")).digest(EMBEDDING_DIMENSIONS)]
+                    for text in texts
+                ]
+
+            def _write_chunk(self, payload: dict) -> None:
+                line = (json.dumps(payload) + "\n").encode()
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                self.wfile.flush()
+
+        return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake Ollama server with configurable latency")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--load-seconds", type=float, default=0.0)
+    parser.add_argument("--prompt-seconds", type=float, default=0.2)
+    parser.add_argument("--token-seconds", type=float, default=0.005)
+    parser.add_argument("--response-words", type=int, default=120)
+    args = parser.parse_args()
+
+    server = FakeOllamaServer(
+        args.port, args.load_seconds, args.prompt_seconds, args.token_seconds, args.response_words
+    ).start()
+    print(f"Fake Ollama listening on {server.url}")
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Compare the OCR backends (pytesseract vs tesserocr) on the same preprocessed pages.
+
+Usage:
+    python benchmarks/ocr_backends.py [PDF ...] [--pages N] [--threads N] [--lang spa] [--tessdata DIR]
+
+Without PDFs, a synthetic page of text is OCR'd. Pages are rendered and
+preprocessed once, so only the Tesseract calls are timed.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import fitz
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from ocr_tesseract import OCR_tesseract  # noqa: E402
+from tesseract_backend import OCR_BACKENDS  # noqa: E402
+from utils.config import OCRConfig  # noqa: E402
+
+SYNTHETIC_TEXT = (
+    "RESOLUCIÓN N° 1234/2023. VISTO el Expediente N° 12345/2023 y CONSIDERANDO que la "
+    "adjudicataria solicita la escrituración del inmueble ubicado en el lote 12 de la "
+    "manzana 7, padrón municipal 123456, "
+)
+
+
+def synthetic_pages(count: int) -> list[fitz.Page]:
+    """Build a PDF of text-only pages in memory."""
+    document = fitz.open()
+    for _ in range(count):
+        page = document.new_page()
+        page.insert_textbox(fitz.Rect(56, 56, 540, 786), SYNTHETIC_TEXT * 12, fontsize=11)
+    return list(document)
+
+
+def load_images(ocr: OCR_tesseract, pdf_paths: list[str], max_pages: int) -> list[np.ndarray]:
+    """Render and preprocess the pages to OCR."""
+    pages = []
+    for pdf_path in pdf_paths:
+        pages.extend(fitz.open(pdf_path))
+    if not pages:
+        pages = synthetic_pages(max_pages)
+
+    images = []
+    for page in pages[:max_pages]:
+        pix = ocr._render_page(page)
+        profile = "nlm" if ocr.ocr_config.preprocessing == "auto" else ocr.ocr_config.preprocessing
+        images.append(ocr._preprocess_image(ocr._pixmap_to_array(pix).copy(), profile))
+    return images
+
+
+def run_backend(backend: str, args: argparse.Namespace, images: list[np.ndarray]) -> dict:
+    """OCR every image with a backend and time each call."""
+    ocr = OCR_tesseract(OCRConfig(backend=backend, lang=args.lang, psm=args.psm, oem=args.oem, tessdata_path=args.tessdata))
+    # First call initializes the engine (tesserocr) or warms the page cache (pytesseract)
+    ocr._extract_text_from_image(images[0])
+
+    def timed(img: np.ndarray) -> tuple[float, str]:
+        start_time = time.perf_counter()
+        text, _ = ocr._extract_text_from_image(img)
+        return time.perf_counter() - start_time, text
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        results = list(executor.map(timed, images * args.repeat))
+    elapsed = time.perf_counter() - start_time
+
+    latencies = sorted(latency for latency, _ in results)
+    return {
+        "backend": backend,
+        "pages": len(results),
+        "pages_per_second": len(results) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] * 1000,
+        "texts": [text for _, text in results[:len(images)]],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the Tesseract OCR backends")
+    parser.add_argument("pdfs", nargs="*", help="PDFs to OCR (a synthetic page if none)")
+    parser.add_argument("--pages", type=int, default=8, help="Max pages to OCR")
+    parser.add_argument("--repeat", type=int, default=1, help="Times every page is OCR'd")
+    parser.add_argument("--threads", type=int, default=1, help="Concurrent OCR threads")
+    parser.add_argument("--lang", default="eng")
+    parser.add_argument("--psm", type=int, default=3)
+    parser.add_argument("--oem", type=int, default=3)
+    parser.add_argument("--tessdata", default=None, help="Directory with the .traineddata files")
+    parser.add_argument("--backends", nargs="+", default=OCR_BACKENDS, choices=OCR_BACKENDS)
+    args = parser.parse_args()
+
+    images = load_images(OCR_tesseract(OCRConfig()), args.pdfs, args.pages)
+    print(f"{len(images)} pages x {args.repeat}, {args.threads} thread(s), lang '{args.lang}'")
+
+    results = []
+    for backend in args.backends:
+        try:
+            results.append(run_backend(backend, args, images))
+        except (ImportError, RuntimeError) as e:
+            # Not installed, or no language data for tesserocr's tessdata path
+            print(f"{backend}: skipped ({e})")
+
+    for result in results:
+        print(
+            f"{result['backend']:>12}: {result['pages_per_second']:6.2f} pages/s, "
+            f"p50 {result['p50_ms']:7.1f} ms, p95 {result['p95_ms']:7.1f} ms"
+        )
+    if len(results) == 2:
+        same = sum(a == b for a, b in zip(results[0]["texts"], results[1]["texts"]))
+        print(f"Identical text on {same}/{len(images)} pages")
+
+
+if __name__ == "__main__":
+    main()
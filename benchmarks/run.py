@@ -0,0 +1,332 @@
+"""
+Benchmark every pipeline stage on a deterministic synthetic corpus.
+
+Stages:
+    render                 OCR_tesseract._render_page, per page
+    preprocess_<profile>   OCR_tesseract._preprocess_image, per page of the scanned documents
+    ocr                    OCR_tesseract._extract_text_from_image, per binarized scanned page
+    extract                OCR_tesseract.extract_with_tesseract end to end, per document
+    summarize              Summarizer against a local fake Ollama server, per document
+
+Every stage runs in its own process, so its peak RSS is measured alone.
+Results are written as JSON; with --baseline they are compared against a
+previous results file.
+
+Usage:
+    python benchmarks/run.py [--corpus quick|full] [--stages ...] [--output FILE] [--baseline FILE]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+import fitz
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+
+from corpus import CORPORA, CorpusSpec, build_corpus  # noqa: E402
+from fake_ollama import FakeOllamaServer  # noqa: E402
+from llm_scheduler import LLMScheduler  # noqa: E402
+from ocr_tesseract import OCR_tesseract  # noqa: E402
+from ollama_client import OllamaClient  # noqa: E402
+from summarizer import SUMMARY_ERROR_PREFIX, Summarizer  # noqa: E402
+from utils.config import OllamaClientConfig, load_config  # noqa: E402
+
+PREPROCESSING_STAGES = ["preprocess_binarize", "preprocess_median_otsu", "preprocess_nlm"]
+ALL_STAGES = ["render", *PREPROCESSING_STAGES, "ocr", "extract", "summarize"]
+
+
+def _ocr(context: Dict[str, Any]) -> OCR_tesseract:
+    return OCR_tesseract(load_config(context["config_path"]).ocr)
+
+
+def _documents(context: Dict[str, Any], kind: str = None) -> List[str]:
+    return [path for path, spec in zip(context["paths"], context["specs"]) if kind is None or spec["kind"] == kind]
+
+
+def _scanned_images(context: Dict[str, Any], ocr: OCR_tesseract) -> List[np.ndarray]:
+    """Render the scanned pages up to the page limit (not timed)."""
+    images = []
+    for path in _documents(context, "scanned"):
+        for page in fitz.open(path):
+            if len(images) >= context["max_pages"]:
+                return images
+            images.append(ocr._pixmap_to_array(ocr._render_page(page)).copy())
+    return images
+
+
+def bench_render(context: Dict[str, Any]) -> Dict[str, Any]:
+    ocr = _ocr(context)
+    latencies = []
+    for path in _documents(context):
+        for page in fitz.open(path):
+            if len(latencies) >= context["max_pages"]:
+                break
+            start_time = time.perf_counter()
+            ocr._render_page(page)
+            latencies.append(time.perf_counter() - start_time)
+    return {"latencies": latencies, "pages": len(latencies)}
+
+
+def bench_preprocess(profile: str) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    def bench(context: Dict[str, Any]) -> Dict[str, Any]:
+        ocr = _ocr(context)
+        latencies = []
+        for img in _scanned_images(context, ocr):
+            start_time = time.perf_counter()
+            ocr._preprocess_image(img, profile)
+            latencies.append(time.perf_counter() - start_time)
+        return {"latencies": latencies, "pages": len(latencies)}
+    return bench
+
+
+def bench_ocr(context: Dict[str, Any]) -> Dict[str, Any]:
+    ocr = _ocr(context)
+    images = [ocr._preprocess_image(img, "binarize") for img in _scanned_images(context, ocr)]
+    latencies = []
+    for img in images:
+        start_time = time.perf_counter()
+        ocr._extract_text_from_image(img)
+        latencies.append(time.perf_counter() - start_time)
+    return {"latencies": latencies, "pages": len(latencies)}
+
+
+def bench_extract(context: Dict[str, Any]) -> Dict[str, Any]:
+    ocr = _ocr(context)
+    latencies = []
+    pages = 0
+    by_document = {}
+    for path, spec in zip(context["paths"], context["specs"]):
+        start_time = time.perf_counter()
+        result = ocr.extract_with_tesseract(path)
+        latencies.append(time.perf_counter() - start_time)
+        if "error" in result:
+            raise RuntimeError(result["error"])
+        pages += result["page_count"]
+        by_document[spec["name"]] = round(latencies[-1], 4)
+    return {"latencies": latencies, "pages": pages, "by_document": by_document}
+
+
+def bench_summarize(context: Dict[str, Any]) -> Dict[str, Any]:
+    config = load_config(context["config_path"])
+    texts = []
+    pages = []
+    for path in _documents(context, "text"):
+        document = fitz.open(path)
+        texts.append("\n\n".join(f"Page {page.number + 1}:\n{page.get_text()}" for page in document))
+        pages.append(document.page_count)
+    count = context["summaries"]
+    texts = [texts[i % len(texts)] for i in range(count)]
+    pages = [pages[i % len(pages)] for i in range(count)]
+
+    server = FakeOllamaServer(**context["fake_ollama"]).start()
+    try:
+        async def run() -> List[float]:
+            client = OllamaClient(OllamaClientConfig(host=server.url))
+            summarizer = Summarizer(config.ollama, scheduler=LLMScheduler(config.llm_scheduler), client=client)
+
+            async def timed(text: str) -> float:
+                start_time = time.perf_counter()
+                summary = await summarizer.generate_summary_async(text)
+                if summary.startswith(SUMMARY_ERROR_PREFIX):
+                    raise RuntimeError(summary)
+                return time.perf_counter() - start_time
+
+            try:
+                return await asyncio.gather(*[timed(text) for text in texts])
+            finally:
+                await client.close()
+
+        start_time = time.perf_counter()
+        latencies = asyncio.run(run())
+        # Requests overlap, so throughput comes from the wall time
+        wall_seconds = time.perf_counter() - start_time
+    finally:
+        server.stop()
+    return {"latencies": list(latencies), "pages": sum(pages), "wall_seconds": wall_seconds, "requests": server.requests}
+
+
+STAGES: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "render": bench_render,
+    **{stage: bench_preprocess(stage.removeprefix("preprocess_")) for stage in PREPROCESSING_STAGES},
+    "ocr": bench_ocr,
+    "extract": bench_extract,
+    "summarize": bench_summarize,
+}
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of the current process, in MiB."""
+    # VmHWM starts over at exec; ru_maxrss is inherited from the parent on Linux
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    return max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024
+
+
+def _run_stage(stage: str, context: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a stage inside a fresh worker process and summarize its timings."""
+    start_time = time.perf_counter()
+    result = STAGES[stage](context)
+    elapsed = time.perf_counter() - start_time
+
+    latencies = result.pop("latencies")
+    # Sequential stages: throughput over the timed calls only, without their setup
+    timed_seconds = result.pop("wall_seconds", sum(latencies))
+    return {
+        "items": len(latencies),
+        "seconds": round(elapsed, 4),
+        "pages_per_second": round(result["pages"] / timed_seconds, 3) if timed_seconds else None,
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3) if latencies else None,
+        "p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 3) if latencies else None,
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        **result,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Print the change of every stage against a baseline.
+
+    Args:
+        results: Current results
+        baseline: Baseline results
+        threshold: Relative change counted as a regression (0.1 = 10%)
+
+    Returns:
+        Descriptions of the regressions
+    """
+    print(f"\nAgainst baseline {baseline.get('git_commit')} ({baseline.get('created_at')}):")
+    print(f"{'stage':<24}{'pages/s':>20}{'p95 ms':>24}{'peak RSS MB':>22}")
+    regressions = []
+    for stage, current in results["stages"].items():
+        previous = baseline.get("stages", {}).get(stage)
+        if not previous or "error" in current or "error" in previous:
+            continue
+
+        columns = []
+        for metric, higher_is_better in (("pages_per_second", True), ("p95_ms", False), ("peak_rss_mb", False)):
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                columns.append(f"{'n/a':>22}")
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            flag = " !" if worse > threshold else "  "
+            if worse > threshold:
+                regressions.append(f"{stage} {metric}: {old} -> {new} ({change:+.0%})")
+            columns.append(f"{old:>9g} -> {new:<9g}{change:+5.0%}{flag}")
+        print(f"{stage:<24}" + "".join(columns))
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages on a synthetic corpus")
+    parser.add_argument("--corpus", choices=sorted(CORPORA), default="quick")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stages", nargs="+", choices=ALL_STAGES, default=ALL_STAGES)
+    parser.add_argument("--config", default=os.path.join(ROOT_DIR, "config.yaml"), help="Pipeline configuration to benchmark")
+    parser.add_argument("--max-pages", type=int, default=40, help="Page limit of the per-page stages")
+    parser.add_argument("--summaries", type=int, default=16, help="Documents summarized concurrently")
+    parser.add_argument("--prompt-seconds", type=float, default=0.2, help="Fake Ollama latency before the first token")
+    parser.add_argument("--token-seconds", type=float, default=0.005, help="Fake Ollama latency per token")
+    parser.add_argument("--response-words", type=int, default=120, help="Words of every fake Ollama response")
+    parser.add_argument("--output", default=os.path.join(BENCHMARKS_DIR, "results", "latest.json"))
+    parser.add_argument("--baseline", help="Results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative change reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 on regressions")
+    args = parser.parse_args()
+
+    specs: List[CorpusSpec] = CORPORA[args.corpus]
+    print(f"Building the '{args.corpus}' corpus ({len(specs)} documents)...")
+    paths = build_corpus(specs, os.path.join(BENCHMARKS_DIR, ".corpus"), args.seed)
+    context = {
+        "config_path": args.config,
+        "paths": paths,
+        "specs": [{**asdict(spec), "name": spec.name} for spec in specs],
+        "max_pages": args.max_pages,
+        "summaries": args.summaries,
+        "fake_ollama": {
+            "prompt_seconds": args.prompt_seconds,
+            "token_seconds": args.token_seconds,
+            "response_words": args.response_words,
+        },
+    }
+    config = load_config(args.config)
+    results = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "corpus": args.corpus,
+        "seed": args.seed,
+        "settings": {key: value for key, value in context.items() if key not in ("config_path", "paths")},
+        "config": {"ocr": asdict(config.ocr), "ollama": asdict(config.ollama), "llm_scheduler": asdict(config.llm_scheduler)},
+        "stages": {},
+    }
+
+    spawn_context = multiprocessing.get_context("spawn")
+    for stage in args.stages:
+        print(f"Running {stage}...", flush=True)
+        try:
+            with ProcessPoolExecutor(max_workers=1, mp_context=spawn_context) as executor:
+                stage_result = executor.submit(_run_stage, stage, context).result()
+        except Exception as e:
+            stage_result = {"error": f"{type(e).__name__}: {e}"}
+        results["stages"][stage] = stage_result
+
+        if "error" in stage_result:
+            print(f"  failed: {stage_result['error']}")
+        else:
+            print(
+                f"  {stage_result['items']} items, {stage_result['pages_per_second']} pages/s, "
+                f"p50 {stage_result['p50_ms']} ms, p95 {stage_result['p95_ms']} ms, "
+                f"peak RSS {stage_result['peak_rss_mb']} MB"
+            )
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            if args.fail_on_regression:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
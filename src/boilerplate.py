@@ -0,0 +1,250 @@
+"""
+Corpus-level boilerplate stripping of OCR text before it is sent to the model.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from utils.chunker import estimate_tokens
+from utils.config import BoilerplateConfig
+
+logger = logging.getLogger(__name__)
+
+PAGE_HEADER_LINE_PATTERN = re.compile(r"^Page \d+:$")
+WORD_PATTERN = re.compile(r"\w+")
+BLANK_LINES_PATTERN = re.compile(r"\n{3,}")
+
+PROFILE_VERSION = 1
+
+
+def _fingerprint(value: str) -> str:
+    """Stable 64-bit hash of a string, used as profile key (Python's hash() changes between runs)."""
+    return hashlib.blake2b(value.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class BoilerplateStripper:
+    """
+    Removes lines that repeat across the corpus (letterhead, VISTO/CONSIDERANDO
+    scaffolding, objectives of the ente, notification formulas).
+
+    Keeps a document-frequency index of normalized lines and of word shingles,
+    learned online from every extracted document and saved as a profile
+    between runs. Every document of a run is stripped with the same snapshot
+    of the profile, taken at the first `strip()` (in batch mode, after the
+    whole run was observed), so the prompt of a document only changes when the
+    profile does; `profile_version` identifies the snapshot for the summary
+    cache. Once the saved profile holds `freeze_after_documents` documents it
+    stops learning, so reruns produce the same prompts. A line is boilerplate
+    when the line itself, or most of its shingles (which tolerates OCR noise),
+    appear in at least a given fraction of the documents. Lines with digits
+    are only removed on an exact line match, so resolution numbers, DNIs and
+    prices are never dropped by fuzzy matching; "Page N:" headers are always
+    kept.
+    """
+
+    def __init__(self, boilerplate_config: BoilerplateConfig):
+        """
+        Initialize the stripper, loading the saved profile if there is one.
+
+        Args:
+            boilerplate_config: Boilerplate settings
+        """
+        self.config = boilerplate_config
+        self.documents = 0
+        self.line_counts: Dict[str, int] = {}
+        self.shingle_counts: Dict[str, int] = {}
+        self._tokens_before = 0
+        self._tokens_saved = 0
+        self._stripped_documents = 0
+        # Frozen copy of the profile used by strip(): (documents, line counts, shingle counts)
+        self._snapshot: Optional[Tuple[int, Dict[str, int], Dict[str, int]]] = None
+        self._profile_version: Optional[str] = None
+        self._load_profile()
+        freeze_after = self.config.freeze_after_documents
+        self.learning = self.config.learn and not (freeze_after and self.documents >= freeze_after)
+        if self.config.learn and not self.learning:
+            logger.info(f"Boilerplate profile is complete ({self.documents} documents), not learning")
+
+    def _load_profile(self) -> None:
+        """Load the document frequencies saved by a previous run."""
+        if not self.config.profile_path or not os.path.exists(self.config.profile_path):
+            return
+        try:
+            with open(self.config.profile_path, "r", encoding="utf-8") as f:
+                profile = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Could not load boilerplate profile {self.config.profile_path}: {e}")
+            return
+
+        if profile.get("version") != PROFILE_VERSION or profile.get("shingle_size") != self.config.shingle_size:
+            logger.info("Boilerplate profile was built with other settings, starting a new one")
+            return
+
+        self.documents = profile["documents"]
+        self.line_counts = profile["lines"]
+        self.shingle_counts = profile["shingles"]
+        logger.info(f"Loaded boilerplate profile learned from {self.documents} documents")
+
+    def save_profile(self) -> None:
+        """Save the document frequencies, pruning the rarest entries beyond `max_profile_entries`."""
+        if not self.config.profile_path or not self.learning:
+            return
+        self._prune()
+
+        directory = os.path.dirname(self.config.profile_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        temp_file = f"{self.config.profile_path}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": PROFILE_VERSION,
+                    "shingle_size": self.config.shingle_size,
+                    "documents": self.documents,
+                    "lines": self.line_counts,
+                    "shingles": self.shingle_counts,
+                },
+                f,
+            )
+        os.replace(temp_file, self.config.profile_path)
+
+    def _prune(self) -> None:
+        """Drop the lowest-frequency entries of each index above `max_profile_entries`."""
+        for counts in (self.line_counts, self.shingle_counts):
+            excess = len(counts) - self.config.max_profile_entries
+            if excess > 0:
+                for key in sorted(counts, key=counts.get)[:excess]:
+                    del counts[key]
+
+    @staticmethod
+    def _normalize(line: str) -> str:
+        """Lowercase and keep only the words of a line, so spacing and punctuation noise don't matter."""
+        return " ".join(WORD_PATTERN.findall(line.lower()))
+
+    def _shingles(self, normalized_line: str) -> List[str]:
+        """Fingerprints of the word shingles of a normalized line."""
+        words = normalized_line.split()
+        size = self.config.shingle_size
+        if len(words) < size:
+            return []
+        return [_fingerprint(" ".join(words[i:i + size])) for i in range(len(words) - size + 1)]
+
+    def _content_lines(self, text: str) -> List[str]:
+        """Normalized lines of a text worth indexing (page headers and very short lines excluded)."""
+        lines = []
+        for line in text.splitlines():
+            if PAGE_HEADER_LINE_PATTERN.match(line.strip()):
+                continue
+            normalized = self._normalize(line)
+            if len(normalized) >= self.config.min_line_chars:
+                lines.append(normalized)
+        return lines
+
+    def observe(self, text: str) -> None:
+        """
+        Add a document to the frequency index (every line and shingle counts once per document).
+
+        Does nothing once the profile is frozen. Documents observed after the
+        first `strip()` of the run only affect the next runs.
+
+        Args:
+            text: OCR text of the document
+        """
+        if not self.learning:
+            return
+        lines = set(self._content_lines(text))
+        shingles = {shingle for line in lines for shingle in self._shingles(line)}
+
+        self.documents += 1
+        for line in lines:
+            key = _fingerprint(line)
+            self.line_counts[key] = self.line_counts.get(key, 0) + 1
+        for shingle in shingles:
+            self.shingle_counts[shingle] = self.shingle_counts.get(shingle, 0) + 1
+
+        if len(self.line_counts) + len(self.shingle_counts) > 2 * self.config.max_profile_entries:
+            self._prune()
+
+    def _take_snapshot(self) -> Tuple[int, Dict[str, int], Dict[str, int]]:
+        """Freeze the profile used to strip the documents of this run."""
+        if self._snapshot is None:
+            self._snapshot = (self.documents, dict(self.line_counts), dict(self.shingle_counts))
+        return self._snapshot
+
+    @property
+    def profile_version(self) -> str:
+        """
+        Hash of the profile snapshot the documents of this run are stripped with.
+
+        Part of the summary cache key, so summaries of prompts stripped with
+        another profile are never reused.
+        """
+        if self._profile_version is None:
+            documents, line_counts, shingle_counts = self._take_snapshot()
+            settings = (self.config.df_threshold, self.config.shingle_line_ratio, self.config.min_line_chars, self.config.min_documents)
+            data = json.dumps([PROFILE_VERSION, settings, documents, line_counts, shingle_counts], sort_keys=True)
+            self._profile_version = hashlib.blake2b(data.encode("utf-8"), digest_size=16).hexdigest()
+        return self._profile_version
+
+    def _is_boilerplate(self, normalized_line: str) -> bool:
+        """Whether a normalized line is frequent enough in the profile snapshot to be removed."""
+        documents, line_counts, shingle_counts = self._take_snapshot()
+        min_count = self.config.df_threshold * documents
+        if line_counts.get(_fingerprint(normalized_line), 0) >= min_count:
+            return True
+
+        if any(character.isdigit() for character in normalized_line):
+            return False
+
+        shingles = self._shingles(normalized_line)
+        if not shingles:
+            return False
+        frequent = sum(1 for shingle in shingles if shingle_counts.get(shingle, 0) >= min_count)
+        return frequent / len(shingles) >= self.config.shingle_line_ratio
+
+    def strip(self, text: str) -> Tuple[str, int]:
+        """
+        Remove the boilerplate lines of a document.
+
+        Nothing is removed while the profile snapshot holds fewer than
+        `min_documents` documents.
+
+        Args:
+            text: OCR text of the document
+
+        Returns:
+            Tuple of the stripped text and the estimated number of tokens saved
+        """
+        tokens_before = estimate_tokens(text)
+        self._tokens_before += tokens_before
+        if self._take_snapshot()[0] < self.config.min_documents:
+            return text, 0
+
+        kept_lines = []
+        for line in text.splitlines():
+            if PAGE_HEADER_LINE_PATTERN.match(line.strip()):
+                kept_lines.append(line)
+                continue
+            normalized = self._normalize(line)
+            if len(normalized) >= self.config.min_line_chars and self._is_boilerplate(normalized):
+                continue
+            kept_lines.append(line)
+
+        stripped_text = BLANK_LINES_PATTERN.sub("\n\n", "\n".join(kept_lines))
+        tokens_saved = max(0, tokens_before - estimate_tokens(stripped_text))
+        self._tokens_saved += tokens_saved
+        self._stripped_documents += 1
+        return stripped_text, tokens_saved
+
+    def log_stats(self) -> None:
+        """Log the tokens saved in the current run."""
+        saved_ratio = self._tokens_saved / self._tokens_before if self._tokens_before else 0.0
+        logger.info(
+            f"Boilerplate: ~{self._tokens_saved} prompt tokens saved ({saved_ratio:.0%}) over "
+            f"{self._stripped_documents} documents, profile of {self.documents} documents"
+        )
@@ -1,11 +1,17 @@
 import asyncio
+import hashlib
+import json
 import logging
+import multiprocessing
 from os import path
-from typing import Dict, List
-from concurrent.futures import ThreadPoolExecutor
-from ocr_tesseract import OCR_tesseract
+from typing import Callable, List, Optional
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from ocr_tesseract import OCR_tesseract, init_ocr_worker
+from utils.cache import ResultCache
 from utils.config import get_config
-from utils.index import print_loading_animation
+from utils.index import hash_file, print_loading_animation
+from utils.metrics import MetricsRegistry
+from utils.profiler import RunProfiler
 from type_def import OCRExtractionResult
 
 logger = logging.getLogger(__name__)
@@ -15,14 +21,43 @@ class Data_Extractor:
     Process extracted data to find specific information.
     """
     
-    def __init__(self, dataset_folder: str = ""):
-        """Initialize the data extractor."""
+    def __init__(
+        self,
+        dataset_folder: str = "",
+        metrics: Optional[MetricsRegistry] = None,
+        profiler: Optional[RunProfiler] = None,
+    ):
+        """
+        Initialize the data extractor.
+
+        Args:
+            dataset_folder: Folder with the files to process. Defaults to `file_processing.input_folder`.
+            metrics: Run metrics receiving the OCR timings. Defaults to a private registry.
+            profiler: Run profiler (`--profile`) tracking the memory of every document
+                and sampling the OCR worker processes. Disabled by default.
+        """
         # Load configuration
         self.config = get_config()
         self.dataset_folder = dataset_folder or self.config.file_processing.input_folder
+        self.metrics = metrics or MetricsRegistry()
+        self.profiler = profiler
         # Initialize OCR
-        self.ocr = OCR_tesseract()
+        self.ocr = OCR_tesseract(self.config.ocr)
         self.thread_pool = ThreadPoolExecutor(max_workers=self.config.file_processing.max_concurrent_tasks)
+        self.metrics.set_pool_capacity("ocr_threads", self.config.file_processing.max_concurrent_tasks)
+        self.process_pool = None
+        if self.config.ocr.engine == "process":
+            # "spawn" keeps the workers clean of the parent's threads and open PDF handles
+            self.process_pool = ProcessPoolExecutor(
+                max_workers=self.config.ocr.process_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_ocr_worker,
+                initargs=(profiler.path_prefix, profiler.interval_seconds) if profiler is not None else (),
+            )
+            self.metrics.set_pool_capacity("ocr_processes", self.config.ocr.process_workers or multiprocessing.cpu_count())
+        self.ocr_cache = None
+        if self.config.cache.ocr_enabled:
+            self.ocr_cache = ResultCache(self.config.cache.ocr_path, self.config.cache.ocr_max_size_mb, name="OCR cache")
 
     def _get_processing_files(self, files_detected) -> List[str]:
             files_to_process = files_detected
@@ -44,8 +79,17 @@ class Data_Extractor:
             
             return files_to_process 
 
-    def _get_dataset_files_to_analyze(self) -> List[str]:
-        # Get list of files to analyze based on config
+    def get_dataset_files_to_analyze(self, select_files: Optional[Callable[[List[str]], List[str]]] = None) -> List[str]:
+        """
+        Get the list of files to analyze based on config.
+
+        Args:
+            select_files: Optional filter applied to the detected files before the test limit
+                (e.g. to skip files already processed in a previous run)
+
+        Returns:
+            Paths of the files to process
+        """
         from utils.index import get_files_from_folder
         
         files_detected = get_files_from_folder(self.dataset_folder, self.config.file_processing.supported_formats)
@@ -53,41 +97,189 @@ class Data_Extractor:
         for ext in self.config.file_processing.supported_formats:
             count = len([f for f in files_detected if f.lower().endswith(f".{ext.lower()}")])
             logger.info(f"Detected {count} .{ext} files detected")
+
+        if select_files is not None:
+            files_detected = select_files(files_detected)
         
         return self._get_processing_files(files_detected)
     
-    async def extract_text_from_dataset(self) -> List[OCRExtractionResult]:
+    def _ocr_cache_key(self, file_path: str) -> str:
         """
-        Extract text using tesseract.
+        Build the OCR cache key of a file from its content and the OCR parameters.
+
+        Args:
+            file_path: Path to the file
+
+        Returns:
+            Hex digest identifying the OCR result
+        """
+        fingerprint = json.dumps(self.ocr.cache_fingerprint(), sort_keys=True)
+        return hashlib.sha256(f"{hash_file(file_path)}:{fingerprint}".encode("utf-8")).hexdigest()
+
+    def _extract_file(self, file_path: str) -> OCRExtractionResult:
+        """
+        Run OCR on a file, reusing the cached result if its content was already processed.
+
+        Runs in the OCR thread pool.
+
+        Args:
+            file_path: Path to the file to process
+
+        Returns:
+            OCR extraction result
+        """
+        with self.metrics.worker("ocr_threads"):
+            if self.profiler is None:
+                return self._extract_file_uncounted(file_path)
+            self.profiler.begin_document(file_path)
+            extractionOCRResult = None
+            try:
+                extractionOCRResult = self._extract_file_uncounted(file_path)
+                return extractionOCRResult
+            finally:
+                peak_rss_mb = self.profiler.end_document(file_path)
+                if extractionOCRResult is not None:
+                    extractionOCRResult["peak_rss_mb"] = peak_rss_mb
+
+    def _extract_file_uncounted(self, file_path: str) -> OCRExtractionResult:
+        """Body of `_extract_file`, run while the OCR thread counts as busy."""
+        file_name = path.basename(file_path)
+        cache_key = None
+
+        if self.ocr_cache is not None:
+            with self.metrics.span("ocr_cache_lookup"):
+                cache_key = self._ocr_cache_key(file_path)
+                cached_result = self.ocr_cache.get(cache_key)
+            if cached_result is not None:
+                logger.info(f"OCR cache hit for {file_name}")
+                self.metrics.increment("ocr_cache_hits")
+                cached_result["file_name"] = file_name
+                cached_result["file_path"] = file_path
+                return cached_result
+
+        with self.metrics.span("ocr_document"):
+            if self.process_pool is not None:
+                extractionOCRResult = self.ocr.extract_with_process_pool(file_path, self.process_pool)
+            else:
+                extractionOCRResult = self.ocr.extract_with_tesseract(file_path)
+        self._record_ocr_timings(extractionOCRResult)
+
+        if cache_key is not None and "error" not in extractionOCRResult:
+            self.ocr_cache.put(cache_key, extractionOCRResult, source_bytes=path.getsize(file_path))
+
+        extractionOCRResult["file_path"] = file_path
+        return extractionOCRResult
+
+    def _record_ocr_timings(self, extractionOCRResult: OCRExtractionResult) -> None:
+        """
+        Add the step timings measured during OCR (possibly in worker processes) to the run metrics.
+
+        Args:
+            extractionOCRResult: Fresh (not cached) OCR extraction result
+        """
+        if "error" in extractionOCRResult:
+            self.metrics.increment("ocr_failures")
+            return
+
+        for step, seconds in extractionOCRResult.get("timings", {}).items():
+            self.metrics.observe(f"pdf_{step}", seconds)
+
+        worker_seconds = 0.0
+        ocr_pages = 0
+        for page in extractionOCRResult["pages"]:
+            self.metrics.increment(f"pages_{page['method']}")
+            for step, seconds in page.get("timings", {}).items():
+                self.metrics.observe(f"page_{step}", seconds)
+                worker_seconds += seconds
+            if page["method"] != "text_layer":
+                ocr_pages += 1
+        if self.process_pool is not None and ocr_pages:
+            self.metrics.add_busy_time("ocr_processes", worker_seconds, tasks=ocr_pages)
+
+    def close(self) -> None:
+        """Shut down the OCR thread and process pools, waiting for the running tasks."""
+        self.thread_pool.shutdown(wait=True)
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=True)
+
+    def log_cache_stats(self) -> None:
+        """Log the OCR cache statistics of the current run."""
+        if self.ocr_cache is not None:
+            self.ocr_cache.log_stats()
+
+    async def extract_text_from_file(self, file_path: str) -> Optional[OCRExtractionResult]:
+        """
+        Extract text from a single file in the OCR thread pool.
+
+        Args:
+            file_path: Path to the file to process
+
+        Returns:
+            OCR extraction result, or None if the file produced no text or failed
+        """
+        file_name = path.basename(file_path)
+        logger.info(f"Extracting text from: {file_name}")
+
+        try:
+            loop = asyncio.get_running_loop()
+            extractionOCRResult = await loop.run_in_executor(self.thread_pool, self._extract_file, file_path)
+        except Exception as e:
+            logger.error(f"OCR extraction failed for {file_name}: {e}")
+            return None
+
+        if not extractionOCRResult.get('text'):
+            logger.warning(f"No text extracted from {file_name}")
+            return None
+
+        return extractionOCRResult
+
+    async def _extract_single_file(self, file_path: str, semaphore: asyncio.Semaphore) -> Optional[OCRExtractionResult]:
+        """
+        Extract text from a single file, bounded by the shared semaphore.
+
+        Args:
+            file_path: Path to the file to process
+            semaphore: Semaphore limiting the number of documents in flight
+
+        Returns:
+            OCR extraction result, or None if the file produced no text or failed
+        """
+        async with semaphore:
+            return await self.extract_text_from_file(file_path)
+
+    async def extract_text_from_dataset(self, preserve_order: Optional[bool] = None, files_to_process: Optional[List[str]] = None) -> List[OCRExtractionResult]:
+        """
+        Extract text using tesseract, keeping up to `max_concurrent_tasks` documents in flight.
+
+        Args:
+            preserve_order: Return results in input order (True) or in completion order (False).
+                Defaults to `file_processing.preserve_order` from config.
+            files_to_process: Files to extract. Defaults to the dataset folder files.
 
         Returns:
             Extracted data dictionary list
         """
-        files_to_process = self._get_dataset_files_to_analyze()
+        if preserve_order is None:
+            preserve_order = self.config.file_processing.preserve_order
+
+        if files_to_process is None:
+            files_to_process = self.get_dataset_files_to_analyze()
+        semaphore = asyncio.Semaphore(self.config.file_processing.max_concurrent_tasks)
+        tasks = [asyncio.create_task(self._extract_single_file(file_path, semaphore)) for file_path in files_to_process]
         extracted_data = []
 
         try:
-            for file_path in files_to_process:
-                # successAnalisisResult, successTask, analisisErrorResult = {}, False, {}
-                
-                file_name = path.basename(file_path)
-                logger.info(f"Extracting text from: {file_name}")
-                
-                try:
-                    # Extract text from PDF
-                    loop = asyncio.get_event_loop()
-                    extractionOCRResult = await loop.run_in_executor(self.thread_pool, self.ocr.extract_with_tesseract, file_path)
-                    # extractionOCRResult = self.ocr.extract_with_tesseract(file_path)
-                    
-                    if not extractionOCRResult.get('text'):
-                        logger.warning(f"No text extracted from {file_name}")
-                        continue
+            if preserve_order:
+                results = await asyncio.gather(*tasks)
+            else:
+                results = [await task for task in asyncio.as_completed(tasks)]
 
+            for extractionOCRResult in results:
+                if extractionOCRResult is not None:
                     extracted_data.append(extractionOCRResult)
-                except:
-                    logger.error(f"OCR extraction failed for {file_name}")
-                    continue
             return extracted_data
         except Exception as e:
+            for task in tasks:
+                task.cancel()
             logger.error(f"OCR extraction failed: {str(e)}")
-            return {"error": str(e)}
\ No newline at end of file
+            return extracted_data
@@ -5,15 +5,28 @@ Data Processor module for handling PDF extraction and analysis workflow.
 import asyncio
 import json
 import logging
+import os
+import sqlite3
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 from zoneinfo import ZoneInfo
-import ollama
+from boilerplate import BoilerplateStripper
 from data_extractor import Data_Extractor
-from summarizer import Summarizer
+from dedup import DuplicateIndex, simhash
+from field_extractor import FieldExtractor
+from llm_scheduler import LLMScheduler
+from manifest import ProcessingManifest, STAGE_FAILED, STAGE_OCR_DONE, STAGE_SUMMARIZED, STAGE_WRITTEN
+from ollama_client import OllamaClient
+from search_index import SearchIndex
+from semantic_index import SemanticIndex, create_embedder
+from summarizer import SUMMARY_ERROR_PREFIX, Summarizer
+from utils.cache import ResultCache
 from utils.config import get_config
-from utils.index import dump_json
-from type_def import ProcessingResult, DatasetResults
+from utils.index import dump_json, hash_file, read_jsonl_records
+from utils.metrics import MetricsRegistry
+from utils.profiler import RunProfiler
+from utils.result_writer import JSONLResultWriter, export_json_array
+from type_def import OCRExtractionResult, ProcessingResult, DatasetResults
 
 logger = logging.getLogger(__name__)
 
@@ -24,13 +37,82 @@ class DataProcessor:
     analysis, and summarization processes.
     """
 
-    def __init__(self):
-        """Initialize the data processor with all necessary components."""
+    def __init__(self, resume: bool = False, profile: bool = False):
+        """
+        Initialize the data processor with all necessary components.
+
+        Args:
+            resume: Skip files finished in previous runs and continue the unfinished ones
+            profile: Sample the CPU stacks and trace the memory of every document,
+                writing `<output>.profile.folded` and `<output>.memory.json` next
+                to the output file
+        """
         self.config = get_config()
-        self.data_extractor = Data_Extractor(dataset_folder=self.config.file_processing.input_folder)
-        self.summarizer = Summarizer(self.config.ollama)
+        self.resume = resume
+        self.profiler = None
+        if profile:
+            self.profiler = RunProfiler(os.path.splitext(self.config.file_processing.output_file)[0])
+        self.manifest = ProcessingManifest(self.config.pipeline.manifest_file)
+        self.results_log_file = self.config.file_processing.results_log_file
+        self.result_writer = JSONLResultWriter(
+            self.results_log_file,
+            buffer_records=self.config.output.buffer_records,
+            flush_interval_seconds=self.config.output.flush_interval_seconds,
+            fsync_interval_seconds=self.config.output.fsync_interval_seconds,
+        )
+        # Without output paths the metrics are still collected, but never exported
+        self.metrics = MetricsRegistry()
+        if self.config.metrics.enabled:
+            self.metrics = MetricsRegistry(
+                prometheus_path=self.config.metrics.prometheus_path,
+                report_path=self.config.metrics.report_file,
+                sample_interval_seconds=self.config.metrics.sample_interval_seconds,
+                export_interval_seconds=self.config.metrics.export_interval_seconds,
+            )
+        self.data_extractor = Data_Extractor(
+            dataset_folder=self.config.file_processing.input_folder, metrics=self.metrics, profiler=self.profiler
+        )
+        self.field_extractor = FieldExtractor(self.config.extraction.required_fields) if self.config.extraction.enabled else None
+        self.boilerplate_stripper = BoilerplateStripper(self.config.boilerplate) if self.config.boilerplate.enabled else None
+        self.duplicate_index = None
+        if self.config.dedup.enabled:
+            self.duplicate_index = DuplicateIndex(
+                self.config.dedup.index_path, self.config.dedup.max_hamming_distance, self.config.dedup.lsh_bands
+            )
+        self.search_index = None
+        if self.config.search.enabled:
+            self.search_index = SearchIndex(self.config.search.index_path, self.config.search.summary_weight)
+        # Summaries of canonical documents still being generated, awaited by their duplicates
+        self._pending_summaries: Dict[str, asyncio.Future] = {}
+        summary_cache = None
+        if self.config.cache.summary_enabled:
+            summary_cache = ResultCache(
+                self.config.cache.summary_path,
+                self.config.cache.summary_max_size_mb,
+                name="Summary cache",
+                ttl_seconds=self.config.cache.summary_ttl_hours * 3600 if self.config.cache.summary_ttl_hours else None,
+            )
+        self.ollama_client = OllamaClient(self.config.ollama_client, metrics=self.metrics)
+        # Summary and embed requests share one concurrency limit
+        llm_scheduler = LLMScheduler(self.config.llm_scheduler)
+        self.semantic_index = None
+        if self.config.semantic.enabled:
+            self.semantic_index = SemanticIndex(
+                self.config.semantic.index_path,
+                create_embedder(self.config.semantic, self.ollama_client, llm_scheduler),
+                chunk_tokens=self.config.semantic.chunk_tokens,
+                ivf_min_vectors=self.config.semantic.ivf_min_vectors,
+                ivf_probes=self.config.semantic.ivf_probes,
+            )
+        self.summarizer = Summarizer(
+            self.config.ollama,
+            summary_cache=summary_cache,
+            bypass_cache=self.config.cache.summary_bypass,
+            scheduler=llm_scheduler,
+            client=self.ollama_client,
+            metrics=self.metrics,
+        )
         self.timezone = ZoneInfo(self.config.timezone.name)
-        self.client = ollama.AsyncClient()
 
     async def _process_single_file(self, ocr_result: Dict[str, Any]) -> ProcessingResult:
         """
@@ -46,17 +128,52 @@ class DataProcessor:
         text = ocr_result.get('text', '')
 
         start_time = datetime.now(self.timezone)
+        fields = None
 
         try:
-            # Step 1: Generate summary
-            summary_plaintext = await self.summarizer.generate_summary_async(text)
+            # Step 1: Extract structured fields with rules
+            if self.field_extractor is not None:
+                with self.metrics.span("field_extraction"):
+                    fields = self.field_extractor.extract(text)
+
+            tokens_saved = 0
+            if (
+                fields is not None
+                and self.config.extraction.skip_llm_when_complete
+                and self.field_extractor.is_complete(fields)
+            ):
+                # Every required field was found: no LLM call
+                summary_plaintext = self.field_extractor.compose_summary(fields)
+                summary_method = "fields"
+            else:
+                # Step 2: Remove corpus boilerplate to shorten the prompt
+                profile_version = None
+                if self.boilerplate_stripper is not None:
+                    with self.metrics.span("boilerplate_strip"):
+                        text, tokens_saved = self.boilerplate_stripper.strip(text)
+                        profile_version = self.boilerplate_stripper.profile_version
+                    if tokens_saved:
+                        logger.info(f"{file_name}: boilerplate stripped, ~{tokens_saved} prompt tokens saved")
+
+                # Step 3: Generate summary
+                with self.metrics.span("summary"):
+                    summary_plaintext = await self.summarizer.generate_summary_async(text, profile_version)
+                summary_method = "llm"
             # summary_obj = json.loads(summary_json)
 
+            # The summarizer reports a failed LLM call in the summary text; the
+            # error keeps the file unfinished in the manifest, so --resume retries it
+            summary_error = summary_plaintext if summary_plaintext.startswith(SUMMARY_ERROR_PREFIX) else None
+
             parsed_data = {
                 "source_file": ocr_result.get('file_name', 'unknown'),
-                "error": None,
+                "error": summary_error,
                 "summary": summary_plaintext.strip(),
+                "summary_method": summary_method,
+                "fields": fields,
+                "duplicate_of": None,
                 "ocr_confidence": ocr_result.get('confidence', 0.0),
+                "boilerplate_tokens_saved": tokens_saved,
             }
             
             end_time = datetime.now(self.timezone)
@@ -74,7 +191,11 @@ class DataProcessor:
                 "source_file": file_name,
                 "error": str(e),
                 "summary": "Error occurred during processing",
+                "summary_method": None,
+                "fields": fields,
+                "duplicate_of": None,
                 "ocr_confidence": ocr_result.get('confidence', 0.0),
+                "boilerplate_tokens_saved": 0,
                 "processed_at": end_time.isoformat(),
                 "processing_time_seconds": round((end_time - start_time).total_seconds(), 2)             
             }
@@ -83,40 +204,478 @@ class DataProcessor:
         """
         Process the entire dataset through OCR, analysis, and summarization.
 
+        Dispatches to the batch or streaming workflow according to `pipeline.mode`.
+        Every finished document is appended to the results log and recorded in
+        the manifest, so an interrupted run can be resumed.
+
         Returns:
-            List of processing results
+            List of processing results (including, when resuming, the results
+            written by previous runs for the files that were skipped)
         """
-        logger.info("Starting dataset processing...")
+        logger.info(f"Starting dataset processing ({self.config.pipeline.mode} mode)...")
+
+        if not self.resume:
+            # Start from scratch: forget previous runs, the results log is truncated on open
+            self.manifest.reset()
+
+        with self.metrics.span("file_discovery"):
+            files_to_process = self.data_extractor.get_dataset_files_to_analyze(
+                select_files=lambda files: self.manifest.select_files(files, resume=self.resume)
+            )
+        self.metrics.increment("files_selected", len(files_to_process))
 
+        if self.config.ollama_client.warm_up and files_to_process:
+            # Load the model while the first documents go through OCR
+            warm_up_task = asyncio.create_task(self.ollama_client.warm_up(self.config.ollama.model))
+        else:
+            warm_up_task = None
+
+        scheduler = self.summarizer.scheduler
+        self.metrics.register_gauge("llm_in_flight", lambda: scheduler.in_flight)
+        self.metrics.register_gauge("llm_concurrency_limit", lambda: scheduler.limit)
+        if self.config.metrics.enabled:
+            self.metrics.start()
+        if self.profiler is not None:
+            self.profiler.start()
+
+        await self.result_writer.open(truncate=not self.resume)
+        try:
+            if self.config.pipeline.mode == "streaming":
+                results = await self._process_dataset_streaming(files_to_process)
+            else:
+                results = await self._process_dataset_batch(files_to_process)
+        finally:
+            await self.result_writer.close()
+            if warm_up_task is not None:
+                await warm_up_task
+            await self.ollama_client.close()
+            self.metrics.stop()
+            if self.semantic_index is not None:
+                self.semantic_index.save()
+            # The OCR worker processes write their CPU profile when they exit
+            self.data_extractor.close()
+            if self.profiler is not None:
+                self.profiler.stop()
+
+        if self.resume:
+            previous_offsets = self.manifest.record_offsets(exclude=files_to_process)
+            previous_results = read_jsonl_records(self.results_log_file, previous_offsets)
+            logger.info(f"Loaded {len(previous_results)} results from previous runs.")
+            results = previous_results + results
+
+        logger.info(f"Manifest stages: {self.manifest.stage_counts()}")
+        self.data_extractor.log_cache_stats()
+        if self.summarizer.summary_cache is not None:
+            self.summarizer.summary_cache.log_stats()
+        self.summarizer.scheduler.log_stats()
+        if self.duplicate_index is not None:
+            self.duplicate_index.log_stats()
+        if self.search_index is not None:
+            self.search_index.log_stats()
+        if self.semantic_index is not None:
+            self.semantic_index.log_stats()
+        if self.boilerplate_stripper is not None:
+            self.boilerplate_stripper.log_stats()
+            if self.config.boilerplate.learn:
+                self.boilerplate_stripper.save_profile()
+        self.ollama_client.log_stats()
+        if self.config.metrics.enabled:
+            try:
+                self.metrics.write_report()
+            except OSError as e:
+                logger.warning(f"Could not write the metrics report: {e}")
+        return results
+
+    async def _extract_file(self, file_path: str) -> Optional[OCRExtractionResult]:
+        """
+        Extract the text of a file and record the outcome in the manifest.
+
+        Args:
+            file_path: Path to the file to process
+
+        Returns:
+            OCR extraction result, or None if the file produced no text or failed
+        """
+        ocr_result = await self.data_extractor.extract_text_from_file(file_path)
+        if ocr_result is None:
+            self.manifest.mark_stage(file_path, STAGE_FAILED, error="OCR extraction failed or produced no text")
+        else:
+            self.manifest.mark_stage(file_path, STAGE_OCR_DONE)
+            self._learn_boilerplate(ocr_result)
+        return ocr_result
+
+    def _learn_boilerplate(self, ocr_result: OCRExtractionResult) -> None:
+        """
+        Add an extracted document to the boilerplate profile.
+
+        Args:
+            ocr_result: OCR extraction result
+        """
+        if self.boilerplate_stripper is not None and self.config.boilerplate.learn:
+            self.boilerplate_stripper.observe(ocr_result["text"])
+
+    async def _summarize_file(self, ocr_result: OCRExtractionResult) -> ProcessingResult:
+        """
+        Summarize an OCR result and record the outcome in the manifest.
+
+        Args:
+            ocr_result: OCR extraction result
+
+        Returns:
+            Complete processing result
+        """
+        result = None
+        canonical_id = None
+        if self.duplicate_index is not None:
+            with self.metrics.span("dedup_lookup"):
+                canonical_id = self._register_document(ocr_result)
+        if canonical_id is not None:
+            result = await self._duplicate_result(ocr_result, canonical_id)
+
+        if result is None:
+            try:
+                result = await self._process_single_file(ocr_result)
+            finally:
+                if self.duplicate_index is not None and canonical_id is None:
+                    self._publish_summary(ocr_result["file_path"], result)
+
+        if self.profiler is not None:
+            result["peak_rss_mb"] = ocr_result.get("peak_rss_mb")
+        if self.search_index is not None:
+            with self.metrics.span("search_index"):
+                self._index_document(ocr_result, result)
+        if self.semantic_index is not None:
+            with self.metrics.span("embedding"):
+                await self._embed_document(ocr_result, result)
+        if result["error"] is None:
+            self.manifest.mark_stage(ocr_result["file_path"], STAGE_SUMMARIZED)
+            self.metrics.increment(f"summaries_{result['summary_method']}")
+        else:
+            self.metrics.increment("summaries_failed")
+        return result
+
+    def _index_document(self, ocr_result: OCRExtractionResult, result: ProcessingResult) -> None:
+        """
+        Add (or update) a finished document in the search index.
+
+        Args:
+            ocr_result: OCR extraction result
+            result: Its processing result
+        """
+        summary = None
+        if result["error"] is None and not result["summary"].startswith(SUMMARY_ERROR_PREFIX):
+            summary = result["summary"]
+        try:
+            self.search_index.upsert(
+                os.path.abspath(ocr_result["file_path"]),
+                ocr_result["file_name"],
+                ocr_result["text"],
+                summary=summary,
+                fields=result.get("fields"),
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Could not index {ocr_result['file_name']} for search: {e}")
+
+    async def _embed_document(self, ocr_result: OCRExtractionResult, result: ProcessingResult) -> None:
+        """
+        Embed a finished document (summary and OCR text chunks) into the semantic index.
+
+        Args:
+            ocr_result: OCR extraction result
+            result: Its processing result
+        """
+        summary = None
+        if result["error"] is None and not result["summary"].startswith(SUMMARY_ERROR_PREFIX):
+            summary = result["summary"]
+        try:
+            await self.semantic_index.add_document(
+                os.path.abspath(ocr_result["file_path"]), ocr_result["file_name"], ocr_result["text"], summary=summary
+            )
+            self.semantic_index.save_if_needed(self.config.semantic.save_every_documents)
+        except Exception as e:
+            logger.warning(f"Could not embed {ocr_result['file_name']} for semantic search: {e}")
+
+    def _register_document(self, ocr_result: OCRExtractionResult) -> Optional[str]:
+        """
+        Add a document to the dedup index and find the canonical document it duplicates.
+
+        Args:
+            ocr_result: OCR extraction result
+
+        Returns:
+            Id of the canonical document, or None if the document is new (it
+            becomes canonical and its summary will be shared with its duplicates)
+        """
+        file_path = ocr_result["file_path"]
+        doc_id = os.path.abspath(file_path)
+        file_hash = self.manifest.content_hash(file_path) or hash_file(file_path)
+        text = ocr_result["text"]
+        fingerprint = simhash(text, self.config.dedup.shingle_size) if len(text.strip()) >= self.config.dedup.min_text_chars else None
+
+        resolution_key = None
+        if self.field_extractor is not None:
+            fields = self.field_extractor.extract(text)
+            resolution_key = fields["numero_resolucion"] or fields["expediente"]
+
+        match = self.duplicate_index.find_canonical(doc_id, file_hash, fingerprint, resolution_key)
+        canonical_id = match[0] if match else doc_id
+        self.duplicate_index.add(doc_id, file_hash, fingerprint, canonical_id, resolution_key)
+
+        if match is None:
+            self._pending_summaries[doc_id] = asyncio.get_running_loop().create_future()
+            return None
+        logger.info(f"{ocr_result['file_name']} duplicates {os.path.basename(canonical_id)} ({match[1]} differing SimHash bits)")
+        return canonical_id
+
+    def _publish_summary(self, file_path: str, result: Optional[ProcessingResult]) -> None:
+        """
+        Store the summary of a canonical document and hand it to the duplicates waiting for it.
+
+        Args:
+            file_path: Path of the canonical document
+            result: Its processing result (None if processing was interrupted)
+        """
+        doc_id = os.path.abspath(file_path)
+        summary = None
+        if result is not None and result["error"] is None and not result["summary"].startswith(SUMMARY_ERROR_PREFIX):
+            summary = result["summary"]
+            self.duplicate_index.set_summary(doc_id, summary)
+
+        future = self._pending_summaries.pop(doc_id, None)
+        if future is not None and not future.done():
+            future.set_result(summary)
+
+    async def _duplicate_result(self, ocr_result: OCRExtractionResult, canonical_id: str) -> Optional[ProcessingResult]:
+        """
+        Build the result of a duplicate document from the summary of its canonical document.
+
+        Waits for the canonical summary if it is being generated in this run.
+
+        Args:
+            ocr_result: OCR extraction result of the duplicate
+            canonical_id: Id of the canonical document
+
+        Returns:
+            Processing result, or None if the canonical document has no summary
+            (the duplicate is then summarized on its own)
+        """
+        start_time = datetime.now(self.timezone)
+        future = self._pending_summaries.get(canonical_id)
+        summary = await asyncio.shield(future) if future is not None else self.duplicate_index.get_summary(canonical_id)
+        if summary is None:
+            return None
+
+        end_time = datetime.now(self.timezone)
+        return {
+            "source_file": ocr_result.get('file_name', 'unknown'),
+            "error": None,
+            "summary": summary,
+            "summary_method": "duplicate",
+            "fields": self.field_extractor.extract(ocr_result["text"]) if self.field_extractor is not None else None,
+            "duplicate_of": os.path.basename(canonical_id),
+            "ocr_confidence": ocr_result.get('confidence', 0.0),
+            "boilerplate_tokens_saved": 0,
+            "processed_at": end_time.isoformat(),
+            "processing_time_seconds": round((end_time - start_time).total_seconds(), 2),
+        }
+
+    async def _write_result(self, file_path: str, result: ProcessingResult) -> None:
+        """
+        Append a result to the results log and record its offset in the manifest.
+
+        The manifest is only updated once the record has reached the file.
+        Failed results are written too, but stay unfinished so a resumed run
+        retries them.
+
+        Args:
+            file_path: Path of the processed file
+            result: Processing result
+        """
+        def on_flushed(offset: int) -> None:
+            if result["error"] is None:
+                self.manifest.mark_stage(file_path, STAGE_WRITTEN, output_offset=offset)
+            else:
+                self.manifest.mark_stage(file_path, STAGE_FAILED, output_offset=offset, error=result["error"])
+
+        with self.metrics.span("output_write"):
+            await self.result_writer.write(result, on_flushed=on_flushed)
+
+    async def _process_dataset_batch(self, files_to_process: List[str]) -> DatasetResults:
+        """
+        OCR every file first, then summarize all of them concurrently.
+
+        Args:
+            files_to_process: Paths of the files to process
+
+        Returns:
+            List of processing results
+        """
         # Step 1: Extract text from all PDFs
-        ocr_results = await self.data_extractor.extract_text_from_dataset()
+        with self.metrics.span("ocr_stage"):
+            ocr_results = await self.data_extractor.extract_text_from_dataset(files_to_process=files_to_process)
         logger.info(f"Extracted text from {len(ocr_results)} documents.")
 
+        extracted_files = set()
+        for ocr_result in ocr_results:
+            extracted_files.add(ocr_result["file_path"])
+            self.manifest.mark_stage(ocr_result["file_path"], STAGE_OCR_DONE)
+            # Every document is learned before the first summary, so the whole corpus is used
+            self._learn_boilerplate(ocr_result)
+        for file_path in files_to_process:
+            if file_path not in extracted_files:
+                self.manifest.mark_stage(file_path, STAGE_FAILED, error="OCR extraction failed or produced no text")
+
         # Step 2: Process each file concurrently
-        tasks = [self._process_single_file(ocr_result) for ocr_result in ocr_results]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        tasks = [self._summarize_file(ocr_result) for ocr_result in ocr_results]
+        with self.metrics.span("summary_stage"):
+            results = await asyncio.gather(*tasks, return_exceptions=True)
 
-        # Step 3: Filter out exceptions and return valid results
+        # Step 3: Filter out exceptions, write and return valid results
         valid_results = []
-        for result in results:
+        for ocr_result, result in zip(ocr_results, results):
             if isinstance(result, Exception):
                 logger.error(f"Exception during processing: {result}")
+                self.manifest.mark_stage(ocr_result["file_path"], STAGE_FAILED, error=str(result))
             else:
+                await self._write_result(ocr_result["file_path"], result)
                 valid_results.append(result)
 
         return valid_results
 
+    async def _process_dataset_streaming(self, files_to_process: List[str]) -> DatasetResults:
+        """
+        Run OCR, summarization and output as a pipeline over bounded queues.
+
+        OCR producers feed summarizer consumers, which feed a single writer.
+        Each document reaches the LLM as soon as its text is ready, and full
+        queues block the upstream stage, so at most `queue_size` OCR texts wait
+        in memory regardless of the dataset size.
+
+        Args:
+            files_to_process: Paths of the files to process
+
+        Returns:
+            List of processing results
+        """
+        queue_size = self.config.pipeline.queue_size
+        ocr_workers = min(self.config.file_processing.max_concurrent_tasks, max(len(files_to_process), 1))
+        summary_workers = self.config.pipeline.summary_workers
+
+        file_queue: asyncio.Queue[str] = asyncio.Queue()
+        for file_path in files_to_process:
+            file_queue.put_nowait(file_path)
+        # None marks the end of the stream for the downstream stage
+        ocr_queue: asyncio.Queue[Optional[OCRExtractionResult]] = asyncio.Queue(maxsize=queue_size)
+        result_queue: asyncio.Queue[Optional[Tuple[str, ProcessingResult]]] = asyncio.Queue(maxsize=queue_size)
+        results: DatasetResults = []
+        self.metrics.register_gauge("queue_depth.files", file_queue.qsize)
+        self.metrics.register_gauge("queue_depth.ocr", ocr_queue.qsize)
+        self.metrics.register_gauge("queue_depth.results", result_queue.qsize)
+        self.metrics.set_pool_capacity("summary_workers", summary_workers)
+
+        async def ocr_producer() -> None:
+            while True:
+                try:
+                    file_path = file_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    ocr_result = await self._extract_file(file_path)
+                except Exception as e:
+                    logger.error(f"Exception during OCR of {file_path}: {e}")
+                    self.manifest.mark_stage(file_path, STAGE_FAILED, error=str(e))
+                    continue
+                if ocr_result is not None:
+                    await ocr_queue.put(ocr_result)
+
+        async def summary_consumer() -> None:
+            while True:
+                ocr_result = await ocr_queue.get()
+                if ocr_result is None:
+                    return
+                try:
+                    with self.metrics.worker("summary_workers"):
+                        result = await self._summarize_file(ocr_result)
+                except Exception as e:
+                    # Same outcome as a failed task in batch mode: logged, not written, retried on resume
+                    logger.error(f"Exception during processing: {e}")
+                    self.manifest.mark_stage(ocr_result["file_path"], STAGE_FAILED, error=str(e))
+                    continue
+                await result_queue.put((ocr_result["file_path"], result))
+
+        async def result_writer() -> None:
+            while True:
+                item = await result_queue.get()
+                if item is None:
+                    return
+                file_path, result = item
+                try:
+                    await self._write_result(file_path, result)
+                except Exception as e:
+                    logger.error(f"Exception writing the result of {file_path}: {e}")
+                    self.manifest.mark_stage(file_path, STAGE_FAILED, error=str(e))
+                    continue
+                results.append(result)
+                logger.info(f"Processed {len(results)}/{len(files_to_process)}: {result['source_file']}")
+
+        async def ocr_stage() -> None:
+            async with asyncio.TaskGroup() as producers:
+                for _ in range(ocr_workers):
+                    producers.create_task(ocr_producer())
+            for _ in range(summary_workers):
+                await ocr_queue.put(None)
+
+        async def summary_stage() -> None:
+            async with asyncio.TaskGroup() as consumers:
+                for _ in range(summary_workers):
+                    consumers.create_task(summary_consumer())
+            await result_queue.put(None)
+
+        # The stages run under one task group: if a stage dies, the others are
+        # cancelled instead of blocking forever on a queue nobody drains or fills
+        try:
+            async with asyncio.TaskGroup() as stages:
+                stages.create_task(ocr_stage())
+                stages.create_task(summary_stage())
+                stages.create_task(result_writer())
+        except* Exception as group:
+            errors = list(group.exceptions)
+            while errors:
+                e = errors.pop()
+                if isinstance(e, BaseExceptionGroup):
+                    errors.extend(e.exceptions)
+                else:
+                    logger.error(f"Exception during streaming processing: {e}")
+
+        return results
+
     def save_results(self, results: DatasetResults) -> None:
         """
         Save processing results to output files.
 
+        Results are already streamed to the results log as they finish; this
+        exports the latest record of every file to the JSON array output file.
+
         Args:
-            results: List of processing results to save
+            results: List of processing results of the run
         """
+        if not self.config.output.export_json:
+            logger.info(f"Results available in {self.results_log_file}")
+            return
+
         try:
-            # Save to dataset.json
-            dump_json(results=results)
-            logger.info(f"Saved {len(results)} results to {self.config.file_processing.output_file}")
+            # Export the results log to dataset.json
+            count = export_json_array(
+                self.results_log_file,
+                self.config.file_processing.output_file,
+                offsets=self.manifest.record_offsets(),
+            )
+            logger.info(f"Saved {count} results to {self.config.file_processing.output_file}")
 
         except Exception as e:
-            logger.error(f"Error saving results: {e}")
\ No newline at end of file
+            logger.error(f"Error exporting the results log, saving the results of this run only: {e}")
+            try:
+                dump_json(results=results)
+                logger.info(f"Saved {len(results)} results to {self.config.file_processing.output_file}")
+            except Exception as e:
+                logger.error(f"Error saving results: {e}")
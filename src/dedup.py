@@ -0,0 +1,280 @@
+"""
+Duplicate and near-duplicate document detection with SimHash and an LSH index.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from itertools import combinations
+from typing import Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"\w+")
+
+SIMHASH_BITS = 64
+
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """
+    Compute the 64-bit SimHash of a text over its word shingles.
+
+    Texts that share most of their shingles (re-scans, copies with OCR noise)
+    get fingerprints that differ in only a few bits.
+
+    Args:
+        text: Document text
+        shingle_size: Words per shingle
+
+    Returns:
+        Unsigned 64-bit fingerprint
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < shingle_size:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)}
+
+    digests = b"".join(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest() for shingle in shingles)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(-1, 8), axis=1)
+    # Bit is set where more than half of the shingle hashes have it set
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 > len(shingles)
+    return int.from_bytes(np.packbits(votes).tobytes(), "big")
+
+
+def _to_signed(value: int) -> int:
+    """Map an unsigned 64-bit value to the signed range SQLite stores."""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _to_unsigned(value: int) -> int:
+    """Map a signed SQLite integer back to an unsigned 64-bit value."""
+    return value + (1 << 64) if value < 0 else value
+
+
+class DuplicateIndex:
+    """
+    Persistent index of processed documents, by file hash and by SimHash.
+
+    The 64-bit SimHash is split in `lsh_bands` bands and every band is
+    indexed. Any document within `max_hamming_distance` bits of a new one has
+    a band that differs in at most `probe_bits` bits from the new one's (by
+    the pigeonhole principle), so it is found by probing, for every band, the
+    values within `probe_bits` bits of it (multi-probe LSH): a few hundred
+    point lookups at most, instead of a scan. Each document points
+    to its canonical document (the first one seen of its group), whose summary
+    is stored so copies and re-scans uploaded later reuse it.
+    """
+
+    def __init__(self, db_path: str, max_hamming_distance: int = 5, lsh_bands: int = 4):
+        """
+        Open (or create) the index database.
+
+        Args:
+            db_path: Path to the SQLite file
+            max_hamming_distance: Max differing SimHash bits between near-duplicates
+            lsh_bands: Number of bands the SimHash is split in (a divisor of 64)
+        """
+        self.db_path = db_path
+        self.max_hamming_distance = max_hamming_distance
+        self.lsh_bands = lsh_bands
+        self.band_bits = SIMHASH_BITS // lsh_bands
+        self._band_mask = (1 << self.band_bits) - 1
+        # Bits a band may differ in, for every match within max_hamming_distance to share a probed value
+        self.probe_bits = max_hamming_distance // lsh_bands
+        self._probe_masks = [0] + [
+            sum(1 << bit for bit in bits)
+            for distance in range(1, self.probe_bits + 1)
+            for bits in combinations(range(self.band_bits), distance)
+        ]
+        self._lock = threading.Lock()
+        self._exact_matches = 0
+        self._near_matches = 0
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS documents (
+                doc_id TEXT PRIMARY KEY,
+                file_hash TEXT NOT NULL,
+                simhash INTEGER NOT NULL,
+                resolution_key TEXT,
+                canonical_id TEXT NOT NULL,
+                summary TEXT,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_documents_file_hash ON documents (file_hash);
+            CREATE TABLE IF NOT EXISTS bands (
+                band INTEGER NOT NULL,
+                value INTEGER NOT NULL,
+                doc_id TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_bands_value ON bands (band, value);
+            CREATE INDEX IF NOT EXISTS idx_bands_doc_id ON bands (doc_id);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            """
+        )
+        row = self._connection.execute("SELECT value FROM meta WHERE key = 'lsh_bands'").fetchone()
+        if row is not None and int(row[0]) != lsh_bands:
+            self._rebuild_bands()
+        self._connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('lsh_bands', ?)", (str(lsh_bands),))
+        self._connection.commit()
+
+    def _band_values(self, fingerprint: int) -> list[tuple[int, int]]:
+        """Split a fingerprint in (band number, band value) pairs."""
+        return [(band, (fingerprint >> (band * self.band_bits)) & self._band_mask) for band in range(self.lsh_bands)]
+
+    def _rebuild_bands(self) -> None:
+        """Re-index every stored fingerprint after the number of bands changed."""
+        logger.info(f"Rebuilding the dedup index with {self.lsh_bands} bands")
+        self._connection.execute("DELETE FROM bands")
+        rows = self._connection.execute("SELECT doc_id, simhash FROM documents WHERE simhash != 0").fetchall()
+        self._connection.executemany(
+            "INSERT INTO bands (band, value, doc_id) VALUES (?, ?, ?)",
+            [(band, value, doc_id) for doc_id, fingerprint in rows for band, value in self._band_values(_to_unsigned(fingerprint))],
+        )
+
+    def find_canonical(
+        self, doc_id: str, file_hash: str, fingerprint: Optional[int], resolution_key: Optional[str] = None
+    ) -> Optional[Tuple[str, int]]:
+        """
+        Find the canonical document of an identical file or a near-duplicate text.
+
+        Args:
+            doc_id: Id of the document being checked (never matched with itself
+                or with documents that point to it)
+            file_hash: SHA-256 of the file bytes
+            fingerprint: SimHash of the document text, None to only look for identical files
+            resolution_key: Identifier read from the text (resolution number,
+                expediente); near-duplicates with a different key are rejected
+
+        Returns:
+            Tuple of canonical document id and Hamming distance (0 for an
+            identical file), or None if the document is new
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT canonical_id FROM documents WHERE file_hash = ? AND doc_id != ? AND canonical_id != ? LIMIT 1",
+                (file_hash, doc_id, doc_id),
+            ).fetchone()
+            if row is not None:
+                self._exact_matches += 1
+                return row[0], 0
+            if fingerprint is None:
+                return None
+
+            band_filter = " OR ".join(
+                f"(bands.band = ? AND bands.value IN ({', '.join('?' * len(self._probe_masks))}))"
+                for _ in range(self.lsh_bands)
+            )
+            parameters = [
+                parameter
+                for band, value in self._band_values(fingerprint)
+                for parameter in (band, *(value ^ mask for mask in self._probe_masks))
+            ]
+            candidates = self._connection.execute(
+                f"""
+                SELECT DISTINCT documents.doc_id, documents.simhash, documents.resolution_key, documents.canonical_id
+                FROM bands JOIN documents ON documents.doc_id = bands.doc_id
+                WHERE ({band_filter}) AND documents.doc_id != ? AND documents.canonical_id != ?
+                """,
+                parameters + [doc_id, doc_id],
+            ).fetchall()
+
+        best = None
+        for _, candidate_hash, candidate_key, canonical_id in candidates:
+            if resolution_key and candidate_key and resolution_key != candidate_key:
+                continue
+            distance = (fingerprint ^ _to_unsigned(candidate_hash)).bit_count()
+            if distance <= self.max_hamming_distance and (best is None or distance < best[1]):
+                best = (canonical_id, distance)
+
+        if best is not None:
+            self._near_matches += 1
+        return best
+
+    def add(
+        self, doc_id: str, file_hash: str, fingerprint: Optional[int], canonical_id: str, resolution_key: Optional[str] = None
+    ) -> None:
+        """
+        Add (or update) a document.
+
+        Args:
+            doc_id: Id of the document
+            file_hash: SHA-256 of the file bytes
+            fingerprint: SimHash of the document text, None if it must only match identical files
+            canonical_id: Id of its canonical document (its own id if it is new)
+            resolution_key: Identifier read from the text
+        """
+        with self._lock:
+            self._connection.execute("DELETE FROM bands WHERE doc_id = ?", (doc_id,))
+            self._connection.execute(
+                """
+                INSERT INTO documents (doc_id, file_hash, simhash, resolution_key, canonical_id, summary, updated_at)
+                VALUES (?, ?, ?, ?, ?, NULL, ?)
+                ON CONFLICT (doc_id) DO UPDATE SET
+                    file_hash = excluded.file_hash, simhash = excluded.simhash, resolution_key = excluded.resolution_key,
+                    canonical_id = excluded.canonical_id, summary = NULL, updated_at = excluded.updated_at
+                """,
+                (doc_id, file_hash, _to_signed(fingerprint or 0), resolution_key, canonical_id, time.time()),
+            )
+            if fingerprint is not None:
+                self._connection.executemany(
+                    "INSERT INTO bands (band, value, doc_id) VALUES (?, ?, ?)",
+                    [(band, value, doc_id) for band, value in self._band_values(fingerprint)],
+                )
+            self._connection.commit()
+
+    def set_summary(self, doc_id: str, summary: str) -> None:
+        """
+        Store the summary of a canonical document.
+
+        Args:
+            doc_id: Id of the document
+            summary: Its summary
+        """
+        with self._lock:
+            self._connection.execute("UPDATE documents SET summary = ? WHERE doc_id = ?", (summary, doc_id))
+            self._connection.commit()
+
+    def get_summary(self, doc_id: str) -> Optional[str]:
+        """
+        Get the stored summary of a document.
+
+        Args:
+            doc_id: Id of the document
+
+        Returns:
+            Summary, or None if the document has none yet
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT summary FROM documents WHERE doc_id = ?", (doc_id,)).fetchone()
+        return row[0] if row else None
+
+    def log_stats(self) -> None:
+        """Log the duplicates found in the current run."""
+        with self._lock:
+            documents = self._connection.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        logger.info(
+            f"Dedup index: {self._exact_matches} identical files, {self._near_matches} near-duplicates, "
+            f"{documents} documents indexed"
+        )
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,200 @@
+"""
+Rule-based extraction of structured fields from the OCR text of a resolution.
+"""
+
+import logging
+import re
+from typing import Callable, Dict, List, Optional, Pattern
+
+logger = logging.getLogger(__name__)
+
+# "N°" as it comes out of OCR: N°, Nº, N*, N', No, Nro., Número
+NUMBER_SIGN = r"(?:N\s*[°º*'o]\.?|Nro\.?|N[uú]mero|N\.)?\s*:?\s*"
+
+MONTHS = {
+    "enero": 1, "febrero": 2, "marzo": 3, "abril": 4, "mayo": 5, "junio": 6, "julio": 7,
+    "agosto": 8, "septiembre": 9, "setiembre": 9, "octubre": 10, "noviembre": 11, "diciembre": 12,
+}
+
+RESOLUTION_NUMBER_PATTERN = re.compile(
+    rf"(?i:resoluci[oó]n)\s*{NUMBER_SIGN}(\d{{1,5}}(?:\s*[/-]\s*\d{{2,4}})?)\b"
+)
+# Electronic expediente, e.g. DE-0963-00012355-12, or "Expediente N° 12345/2023"
+EXPEDIENTE_CODE_PATTERN = re.compile(r"\b([A-Z]{2,3}\s*-\s*\d{4}\s*-\s*\d{6,8}\s*-\s*\d{1,2})\b")
+EXPEDIENTE_NUMBER_PATTERN = re.compile(rf"(?i:expediente|expte\.?)\s*{NUMBER_SIGN}(\d[\d.]*(?:\s*/\s*\d{{2,4}})?)")
+DATE_TEXT_PATTERN = re.compile(
+    rf"\b(\d{{1,2}})\s+de\s+({'|'.join(MONTHS)})\s+(?:de(?:l)?\s+)?(\d{{4}})\b", re.IGNORECASE
+)
+DATE_NUMERIC_PATTERN = re.compile(r"\b(\d{1,2})/(\d{1,2})/(\d{4})\b")
+DNI_PATTERN = re.compile(rf"(?i:D\.?\s?N\.?\s?I\.?)\s*{NUMBER_SIGN}(\d{{1,2}}\.?\d{{3}}\.?\d{{3}})\b")
+# Letter of a subdivided lote or manzana: attached (5564A, 5564-A), or after a space only when
+# nothing but punctuation follows, so the next word ("5564 A FAVOR") or an initial ("D.N.I.") is not taken
+PLOT_LETTER = r"(?:-?([A-Z])(?!\w|\.\w)|\s([A-Z])(?=[ \t]*(?:[,;:)\n]|\.(?!\w)|$)))"
+LOTE_PATTERN = re.compile(rf"(?i:\blote)\s*{NUMBER_SIGN}(\d{{1,4}}){PLOT_LETTER}?")
+MANZANA_PATTERN = re.compile(rf"(?i:\bmanzana|\bmz\.?)\s*{NUMBER_SIGN}(\d{{1,5}}){PLOT_LETTER}?")
+PADRON_PATTERN = re.compile(rf"(?i:padr[oó]n)\s*(?i:municipal)?\s*{NUMBER_SIGN}(\d[\d.]{{2,}}\d)")
+PRICE_PATTERN = re.compile(r"\$\s*(\d{1,3}(?:\.\d{3})+(?:,\d{1,2})?|\d+(?:,\d{1,2})?)")
+
+
+def _clean_spaces(value: str) -> str:
+    """Remove the spaces OCR puts inside codes."""
+    return re.sub(r"\s+", "", value)
+
+
+def _normalize_price(value: str) -> str:
+    """Convert an Argentine amount (1.234.567,89) to a plain decimal string (1234567.89)."""
+    return value.replace(".", "").replace(",", ".")
+
+
+def _first_date(text: str) -> Optional[str]:
+    """Find the first date of the text and return it as YYYY-MM-DD."""
+    candidates = []
+    match = DATE_TEXT_PATTERN.search(text)
+    if match:
+        candidates.append((match.start(), int(match.group(3)), MONTHS[match.group(2).lower()], int(match.group(1))))
+    match = DATE_NUMERIC_PATTERN.search(text)
+    if match:
+        candidates.append((match.start(), int(match.group(3)), int(match.group(2)), int(match.group(1))))
+
+    for _, year, month, day in sorted(candidates):
+        if 1 <= month <= 12 and 1 <= day <= 31:
+            return f"{year:04d}-{month:02d}-{day:02d}"
+    return None
+
+
+def _first_match(pattern: Pattern, normalize: Callable[[str], str] = str.strip) -> Callable[[str], Optional[str]]:
+    """Build an extractor returning the normalized first group of the first match."""
+    def extract(text: str) -> Optional[str]:
+        match = pattern.search(text)
+        return normalize(match.group(1)) if match else None
+    return extract
+
+
+def _all_matches(pattern: Pattern, normalize: Callable[[str], str] = str.strip) -> Callable[[str], Optional[List[str]]]:
+    """Build an extractor returning the unique normalized first groups of every match, in order."""
+    def extract(text: str) -> Optional[List[str]]:
+        values = list(dict.fromkeys(normalize(match.group(1)) for match in pattern.finditer(text)))
+        return values or None
+    return extract
+
+
+def _plot(pattern: Pattern, with_letter: bool = True) -> Callable[[str], Optional[str]]:
+    """
+    Build an extractor of a lote or manzana, as "5564 A" (or its bare number "5564").
+
+    Args:
+        pattern: LOTE_PATTERN or MANZANA_PATTERN
+        with_letter: Keep the letter of a subdivided lote or manzana
+    """
+    def extract(text: str) -> Optional[str]:
+        match = pattern.search(text)
+        if not match:
+            return None
+        letter = match.group(2) or match.group(3)
+        return f"{match.group(1)} {letter}" if with_letter and letter else match.group(1)
+    return extract
+
+
+def _expediente(text: str) -> Optional[str]:
+    """Prefer the electronic expediente code over a plain expediente number."""
+    match = EXPEDIENTE_CODE_PATTERN.search(text)
+    if match:
+        return _clean_spaces(match.group(1))
+    match = EXPEDIENTE_NUMBER_PATTERN.search(text)
+    return _clean_spaces(match.group(1)) if match else None
+
+
+FIELD_EXTRACTORS: Dict[str, Callable[[str], Optional[str | List[str]]]] = {
+    "numero_resolucion": _first_match(RESOLUTION_NUMBER_PATTERN, _clean_spaces),
+    "fecha_resolucion": _first_date,
+    "expediente": _expediente,
+    "dni": _all_matches(DNI_PATTERN, lambda value: value.replace(".", "")),
+    "lote": _plot(LOTE_PATTERN),
+    "lote_numero": _plot(LOTE_PATTERN, with_letter=False),
+    "manzana": _plot(MANZANA_PATTERN),
+    "manzana_numero": _plot(MANZANA_PATTERN, with_letter=False),
+    "padron": _first_match(PADRON_PATTERN, lambda value: value.replace(".", "")),
+    "precio": _first_match(PRICE_PATTERN, _normalize_price),
+}
+
+
+class FieldExtractor:
+    """
+    Extracts resolution number, date, expediente, DNIs, lote, manzana, padrón
+    and price from OCR text with precompiled patterns. Lote and manzana are
+    also given as their bare number, without the letter of a subdivision.
+    """
+
+    def __init__(self, required_fields: List[str]):
+        """
+        Initialize the extractor.
+
+        Args:
+            required_fields: Fields a document must have for its summary to be
+                built from the fields alone
+
+        Raises:
+            ValueError: If a required field is not one of the extracted fields
+        """
+        unknown_fields = set(required_fields) - set(FIELD_EXTRACTORS)
+        if unknown_fields:
+            raise ValueError(f"Unknown extraction fields: {sorted(unknown_fields)}. Available: {list(FIELD_EXTRACTORS)}")
+        self.required_fields = required_fields
+
+    def extract(self, text: str) -> Dict[str, Optional[str | List[str]]]:
+        """
+        Extract every field from a text.
+
+        Args:
+            text: OCR text of the document
+
+        Returns:
+            Dictionary of field name to value (None when not found; `dni` is a list)
+        """
+        return {name: extractor(text) for name, extractor in FIELD_EXTRACTORS.items()}
+
+    def is_complete(self, fields: Dict[str, Optional[str | List[str]]]) -> bool:
+        """
+        Check whether every required field was found.
+
+        Args:
+            fields: Extracted fields
+
+        Returns:
+            True if no required field is missing
+        """
+        return all(fields.get(name) for name in self.required_fields)
+
+    @staticmethod
+    def compose_summary(fields: Dict[str, Optional[str | List[str]]]) -> str:
+        """
+        Build a short summary from the extracted fields, used when the LLM is skipped.
+
+        Args:
+            fields: Extracted fields
+
+        Returns:
+            Summary text listing the fields that were found
+        """
+        sentences = []
+        if fields.get("numero_resolucion"):
+            resolution = f"Resolución N° {fields['numero_resolucion']}"
+            if fields.get("fecha_resolucion"):
+                resolution += f" del {fields['fecha_resolucion']}"
+            sentences.append(resolution)
+        elif fields.get("fecha_resolucion"):
+            sentences.append(f"Resolución del {fields['fecha_resolucion']}")
+        if fields.get("expediente"):
+            sentences.append(f"Expediente {fields['expediente']}")
+
+        property_details = [
+            f"{label} {fields[name]}" for name, label in (("lote", "lote"), ("manzana", "manzana"), ("padron", "padrón")) if fields.get(name)
+        ]
+        if property_details:
+            sentences.append("Inmueble: " + ", ".join(property_details))
+        if fields.get("dni"):
+            sentences.append("Beneficiarios DNI " + ", ".join(fields["dni"]))
+        if fields.get("precio"):
+            sentences.append(f"Precio de venta $ {fields['precio']}")
+
+        return ". ".join(sentences) + "." if sentences else ""
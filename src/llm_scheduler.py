@@ -0,0 +1,185 @@
+"""
+Adaptive concurrency scheduler for LLM requests.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import httpx
+import ollama
+
+from utils.config import SchedulerConfig
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# HTTP statuses of overloaded or failing servers, worth retrying
+RETRIABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def is_retriable(error: BaseException) -> bool:
+    """
+    Tell whether a failed request may succeed if retried.
+
+    Timeouts, connection errors and 429/5xx responses are transient; any other
+    error (a missing model, a bad request) fails the same way every time.
+
+    Args:
+        error: Exception raised by the request
+
+    Returns:
+        True if the request should be retried
+    """
+    if isinstance(error, ollama.ResponseError):
+        # -1: error reported inside a stream (e.g. the model runner crashed)
+        return error.status_code in RETRIABLE_STATUS_CODES or error.status_code == -1
+    return isinstance(error, (asyncio.TimeoutError, httpx.TimeoutException, httpx.TransportError, ConnectionError))
+
+
+class LLMScheduler:
+    """
+    Limits the number of in-flight LLM requests and adapts the limit AIMD-style.
+
+    Every request that completes within `target_latency_seconds` raises the
+    limit additively (by `increase_step` per window of `limit` requests); a
+    slow request, a timeout or a transient error (see `is_retriable`) cuts it
+    multiplicatively by `decrease_factor`, at most once per observed latency so
+    a burst of failures from the same window counts once. Those requests are
+    retried with exponential backoff and full jitter; any other error is
+    raised at once and leaves the limit alone.
+    """
+
+    def __init__(self, scheduler_config: Optional[SchedulerConfig] = None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            scheduler_config: Scheduler settings. Defaults to the built-in settings.
+        """
+        self.config = scheduler_config or SchedulerConfig()
+        self.limit = float(self.config.initial_concurrency)
+        self._in_flight = 0
+        self._condition = asyncio.Condition()
+        self._last_decrease = 0.0
+        self._latency_ewma: Optional[float] = None
+        self._stats = {"requests": 0, "succeeded": 0, "failed": 0, "retries": 0, "timeouts": 0, "errors": 0}
+
+    @property
+    def in_flight(self) -> int:
+        """Number of requests currently sent to Ollama."""
+        return self._in_flight
+
+    async def _acquire(self) -> None:
+        """Wait for a free slot under the current limit."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < max(1, int(self.limit)))
+            self._in_flight += 1
+
+    async def _release(self) -> None:
+        """Free a slot and wake up waiting requests (the limit may have grown)."""
+        async with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def _on_success(self, latency: float) -> None:
+        """Adjust the limit after a successful request."""
+        self._latency_ewma = latency if self._latency_ewma is None else 0.8 * self._latency_ewma + 0.2 * latency
+        if latency > self.config.target_latency_seconds:
+            self._decrease(latency, "slow response")
+        else:
+            self.limit = min(float(self.config.max_concurrency), self.limit + self.config.increase_step / self.limit)
+
+    def _decrease(self, latency: float, reason: str) -> None:
+        """Cut the limit multiplicatively, once per observed latency window."""
+        now = time.monotonic()
+        if now - self._last_decrease < latency:
+            return
+        self._last_decrease = now
+        previous_limit = self.limit
+        self.limit = max(float(self.config.min_concurrency), self.limit * self.config.decrease_factor)
+        logger.info(f"LLM concurrency {previous_limit:.1f} -> {self.limit:.1f} ({reason})")
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter for the given retry attempt (0-based)."""
+        cap = min(self.config.backoff_max_seconds, self.config.backoff_base_seconds * (2 ** attempt))
+        return random.uniform(0, cap)
+
+    async def run(self, request: Callable[[], Awaitable[T]], description: str = "LLM request") -> T:
+        """
+        Run a request under the concurrency limit, with timeout and retries.
+
+        Args:
+            request: Factory returning a new awaitable for every attempt
+            description: Name of the request for log messages
+
+        Returns:
+            Result of the first successful attempt
+
+        Raises:
+            Exception: A non-retriable error, or the last error once
+                `max_retries` retries are exhausted
+        """
+        self._stats["requests"] += 1
+        attempt = 0
+
+        while True:
+            await self._acquire()
+            start_time = time.monotonic()
+            try:
+                result = await asyncio.wait_for(request(), timeout=self.config.request_timeout_seconds)
+            except Exception as e:
+                latency = time.monotonic() - start_time
+                if isinstance(e, asyncio.TimeoutError):
+                    self._stats["timeouts"] += 1
+                    error = f"timed out after {self.config.request_timeout_seconds}s"
+                else:
+                    self._stats["errors"] += 1
+                    error = str(e)
+                if not is_retriable(e):
+                    self._stats["failed"] += 1
+                    raise
+                self._decrease(latency, "request failed")
+                last_error = e
+            else:
+                self._on_success(time.monotonic() - start_time)
+                self._stats["succeeded"] += 1
+                return result
+            finally:
+                await self._release()
+
+            if attempt >= self.config.max_retries:
+                self._stats["failed"] += 1
+                raise last_error
+
+            delay = self._backoff_delay(attempt)
+            attempt += 1
+            self._stats["retries"] += 1
+            logger.warning(f"{description} {error}, retry {attempt}/{self.config.max_retries} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, int | float | None]:
+        """
+        Get scheduler statistics.
+
+        Returns:
+            Request counters, current concurrency limit and latency EWMA (seconds)
+        """
+        return {
+            **self._stats,
+            "concurrency_limit": round(self.limit, 2),
+            "latency_ewma_seconds": round(self._latency_ewma, 2) if self._latency_ewma is not None else None,
+        }
+
+    def log_stats(self) -> None:
+        """Log the scheduler statistics."""
+        stats = self.stats()
+        latency = f"{stats['latency_ewma_seconds']}s" if stats["latency_ewma_seconds"] is not None else "n/a"
+        logger.info(
+            f"LLM scheduler: {stats['succeeded']}/{stats['requests']} requests succeeded, "
+            f"{stats['retries']} retries, {stats['timeouts']} timeouts, {stats['errors']} errors, "
+            f"final concurrency {stats['concurrency_limit']}, latency EWMA {latency}"
+        )
@@ -3,6 +3,7 @@ Main entry point for the PDF Data Extraction application.
 Refactored to follow OOP patterns and Single Responsibility Principle.
 """
 
+import argparse
 import asyncio
 import logging
 import sys
@@ -15,14 +16,39 @@ from data_processor import DataProcessor
 
 logger = logging.getLogger(__name__)
 
-async def main():
+def parse_args() -> argparse.Namespace:
+    """
+    Parse command line arguments.
+
+    Returns:
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description="Extract and summarize municipal resolution PDFs.")
+    parser.add_argument(
+        "--resume", "--incremental",
+        dest="resume",
+        action="store_true",
+        help="Skip files finished in previous runs and process only new, changed or unfinished ones",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile the run: CPU flamegraph stacks, per-document memory allocations and peak RSS, "
+             "written next to the output file",
+    )
+    return parser.parse_args()
+
+async def main(args: argparse.Namespace):
     """
     Main application entry point.
     Orchestrates the data processing workflow using OOP components.
+
+    Args:
+        args: Parsed command line arguments
     """
     try:
         # Initialize the data processor (handles all the heavy lifting)
-        processor = DataProcessor()
+        processor = DataProcessor(resume=args.resume, profile=args.profile)
 
         # Process the entire dataset
         results = await processor.process_dataset()
@@ -38,6 +64,8 @@ async def main():
 
 if __name__ == "__main__":
     try:
+        args = parse_args()
+
         # Load configuration
         config = get_config()
 
@@ -48,7 +76,7 @@ if __name__ == "__main__":
         )
 
         # Run the main processing pipeline
-        asyncio.run(main())
+        asyncio.run(main(args))
 
     except KeyboardInterrupt:
         logger.error("Process interrupted by user...")
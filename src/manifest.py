@@ -0,0 +1,201 @@
+"""
+Processing manifest for incremental and resumable dataset runs.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from utils.index import hash_file
+
+logger = logging.getLogger(__name__)
+
+# Stages a file goes through, in order
+STAGE_PENDING = "pending"
+STAGE_OCR_DONE = "ocr_done"
+STAGE_SUMMARIZED = "summarized"
+STAGE_WRITTEN = "written"
+STAGE_FAILED = "failed"
+
+
+class ProcessingManifest:
+    """
+    Records, for every input file, its identity (path, size, mtime, content hash),
+    the last pipeline stage it reached and where its record was written in the
+    results log.
+
+    A resumed run skips files that were fully written and have not changed, and
+    processes new, changed and unfinished ones. Unfinished files restart at OCR,
+    which is served by the OCR cache when their text was already extracted.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Open (or create) the manifest database.
+
+        Args:
+            db_path: Path to the SQLite file
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                content_hash TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                output_offset INTEGER,
+                error TEXT,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._connection.commit()
+
+    def reset(self) -> None:
+        """Forget every file, for a run that starts from scratch."""
+        with self._lock:
+            self._connection.execute("DELETE FROM files")
+            self._connection.commit()
+
+    def select_files(self, files: List[str], resume: bool) -> List[str]:
+        """
+        Register the detected files and select the ones that need processing.
+
+        Args:
+            files: Paths of the detected files
+            resume: Skip files already written whose content did not change
+
+        Returns:
+            Paths of the files to process, in the input order
+        """
+        selected = []
+        skipped = 0
+
+        with self._lock:
+            for file_path in files:
+                key = os.path.abspath(file_path)
+                stat = os.stat(file_path)
+                row = self._connection.execute(
+                    "SELECT size, mtime, content_hash, stage FROM files WHERE path = ?", (key,)
+                ).fetchone()
+
+                if row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime:
+                    unchanged = True
+                    content_hash = row[2]
+                else:
+                    # Only hash when size or mtime changed (or the file is new)
+                    content_hash = hash_file(file_path)
+                    unchanged = row is not None and row[2] == content_hash
+
+                if resume and unchanged and row[3] == STAGE_WRITTEN:
+                    if row[1] != stat.st_mtime:
+                        self._connection.execute(
+                            "UPDATE files SET mtime = ? WHERE path = ?", (stat.st_mtime, key)
+                        )
+                    skipped += 1
+                    continue
+
+                self._connection.execute(
+                    """
+                    INSERT INTO files (path, size, mtime, content_hash, stage, output_offset, error, updated_at)
+                    VALUES (?, ?, ?, ?, ?, NULL, NULL, ?)
+                    ON CONFLICT (path) DO UPDATE SET
+                        size = excluded.size, mtime = excluded.mtime, content_hash = excluded.content_hash,
+                        stage = CASE WHEN files.content_hash = excluded.content_hash THEN files.stage ELSE excluded.stage END,
+                        output_offset = CASE WHEN files.content_hash = excluded.content_hash THEN files.output_offset ELSE NULL END,
+                        updated_at = excluded.updated_at
+                    """,
+                    (key, stat.st_size, stat.st_mtime, content_hash, STAGE_PENDING, time.time()),
+                )
+                selected.append(file_path)
+
+            self._connection.commit()
+
+        if resume:
+            logger.info(f"Manifest: {skipped} files unchanged since the last run, {len(selected)} to process")
+        return selected
+
+    def mark_stage(self, file_path: str, stage: str, output_offset: Optional[int] = None, error: Optional[str] = None) -> None:
+        """
+        Record the stage a file reached.
+
+        Args:
+            file_path: Path of the file
+            stage: One of the STAGE_* constants
+            output_offset: Byte offset of the file's record in the results log
+            error: Error message, for failed files
+        """
+        with self._lock:
+            self._connection.execute(
+                """
+                UPDATE files SET stage = ?, output_offset = COALESCE(?, output_offset), error = ?, updated_at = ?
+                WHERE path = ?
+                """,
+                (stage, output_offset, error, time.time(), os.path.abspath(file_path)),
+            )
+            self._connection.commit()
+
+    def content_hash(self, file_path: str) -> Optional[str]:
+        """
+        Get the content hash recorded for a file.
+
+        Args:
+            file_path: Path of the file
+
+        Returns:
+            SHA-256 hex digest of the file, or None if the file is not registered
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT content_hash FROM files WHERE path = ?", (os.path.abspath(file_path),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def record_offsets(self, exclude: Optional[List[str]] = None) -> List[int]:
+        """
+        Get the results log offset of the latest record of every file.
+
+        Failed files keep the offset of their error record until they are
+        processed again.
+
+        Args:
+            exclude: Paths whose records should be left out
+
+        Returns:
+            Byte offsets, in results log order
+        """
+        excluded = {os.path.abspath(file_path) for file_path in exclude or []}
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT path, output_offset FROM files WHERE output_offset IS NOT NULL ORDER BY output_offset"
+            ).fetchall()
+        return [offset for file_path, offset in rows if file_path not in excluded]
+
+    def stage_counts(self) -> Dict[str, int]:
+        """
+        Count files per stage.
+
+        Returns:
+            Dictionary of stage name to number of files
+        """
+        with self._lock:
+            rows = self._connection.execute("SELECT stage, COUNT(*) FROM files GROUP BY stage").fetchall()
+        return dict(rows)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
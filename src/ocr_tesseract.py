@@ -2,107 +2,453 @@
 OCR implementations for PDF data extraction.
 """
 
-import asyncio
-import io
 import logging
-from typing import Dict, Literal
+import os
+import time
+import unicodedata
+from concurrent.futures import Executor
+from typing import Any, Dict, Iterator, Literal, Optional
 import fitz  # PyMuPDF for PDF to image conversion
 import cv2
 import numpy as np
-from PIL import Image
-import pytesseract
 from os import path
 
-from type_def import OCRExtractionResult
+from tesseract_backend import create_backend
+from type_def import OCRExtractionResult, OCRPageResult
+from utils.config import OCRConfig
+from utils.profiler import start_worker_profiler
 
 
 logger = logging.getLogger(__name__)
 
+# Preprocessing profiles, from the cheapest to the most expensive
+PREPROCESSING_PROFILES = ["none", "binarize", "median_otsu", "nlm"]
+
+
+def init_ocr_worker(profile_prefix: Optional[str] = None, profile_interval_seconds: float = 0.01) -> None:
+    """
+    Initializer for OCR worker processes.
+
+    Every worker already runs one page at a time, so Tesseract (OpenMP) and
+    OpenCV are limited to a single thread to avoid oversubscribing the cores.
+
+    Args:
+        profile_prefix: Output path prefix of the run profile (`--profile`). When
+            set, the worker samples its own stacks and writes them on exit.
+        profile_interval_seconds: Time between two CPU samples
+    """
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+    cv2.setNumThreads(1)
+    if profile_prefix is not None:
+        start_worker_profiler(profile_prefix, profile_interval_seconds)
+
+
+def ocr_pages_worker(ocr_config: OCRConfig, file_path: str, page_numbers: list[int]) -> list[OCRPageResult]:
+    """
+    OCR a range of pages inside a worker process.
+
+    fitz documents can't be pickled, so each worker opens the PDF by itself.
+
+    Args:
+        ocr_config: OCR configuration used to build the worker's OCR instance
+        file_path: Path to PDF file
+        page_numbers: Zero-based page numbers to process
+
+    Returns:
+        List of per-page OCR results
+
+    Raises:
+        RuntimeError: If OCR fails. pytesseract exceptions can't be unpickled
+            in the parent process, so they are re-raised with their message only.
+    """
+    try:
+        return OCR_tesseract(ocr_config)._ocr_pages(file_path, page_numbers)
+    except Exception as e:
+        raise RuntimeError(f"{type(e).__name__}: {e}") from None
+
+
 class OCR_tesseract:
     """ Local OCR implementation using Tesseract """
     
-    def __init__(self):
-        """Initialize local OCR."""
+    def __init__(self, ocr_config: Optional[OCRConfig] = None):
+        """
+        Initialize local OCR.
+
+        Args:
+            ocr_config: OCR configuration. Defaults to the built-in OCR settings.
+        """
+        self.ocr_config = ocr_config or OCRConfig()
         self.tesseract_cmd = "tesseract"
-        self.zoom_factor = 2.0  # Default zoom for better OCR quality
+        self.zoom_factor = self.ocr_config.zoom_factor  # Zoom for better OCR quality
+        # Adaptive mode: every page starts at the lowest zoom and is re-rendered at
+        # the next one while its confidence stays under the threshold
+        self.zoom_levels = sorted(self.ocr_config.zoom_levels) if self.ocr_config.adaptive_zoom else [self.zoom_factor]
+        self.backend = create_backend(self.ocr_config)
+        self._tesseract_version: Optional[str] = None
 
-    def _pdf_to_images(self, file_path: str) -> list[Image.Image]:
+    def cache_fingerprint(self) -> Dict[str, Any]:
         """
-        Convert PDF pages to PIL Images.
+        Describe every setting that changes the OCR output, for cache keys.
+
+        Returns:
+            JSON-serializable dictionary of OCR parameters
+        """
+        if self._tesseract_version is None:
+            self._tesseract_version = self.backend.version()
+
+        return {
+            "zoom_levels": self.zoom_levels,
+            "adaptive_min_confidence": self.ocr_config.adaptive_min_confidence if self.ocr_config.adaptive_zoom else None,
+            "preprocessing": self.ocr_config.preprocessing,
+            "noise_sigma_thresholds": (
+                [self.ocr_config.noise_sigma_low, self.ocr_config.noise_sigma_high]
+                if self.ocr_config.preprocessing == "auto" else None
+            ),
+            "blank_page_max_ink_ratio": self.ocr_config.blank_page_max_ink_ratio if self.ocr_config.skip_blank_pages else None,
+            # Both backends run Tesseract, but not with the same image input and defaults
+            "backend": self.ocr_config.backend,
+            "tesseract_version": self._tesseract_version,
+            "lang": self.ocr_config.lang,
+            "psm": self.ocr_config.psm,
+            "oem": self.ocr_config.oem,
+            "text_layer": self.ocr_config.text_layer,
+            "text_layer_min_chars": self.ocr_config.text_layer_min_chars,
+            "text_layer_min_glyph_ratio": self.ocr_config.text_layer_min_glyph_ratio,
+            "text_layer_max_image_coverage": self.ocr_config.text_layer_max_image_coverage,
+        }
+
+    def _render_page(self, page: fitz.Page, zoom_factor: Optional[float] = None) -> fitz.Pixmap:
+        """
+        Render a single PDF page straight into an 8-bit grayscale pixmap.
+
+        Args:
+            page: PyMuPDF page
+            zoom_factor: Render zoom (defaults to `zoom_factor`)
+
+        Returns:
+            Rendered grayscale pixmap without alpha channel
+        """
+        zoom_factor = zoom_factor or self.zoom_factor
+        mat = fitz.Matrix(zoom_factor, zoom_factor)
+        return page.get_pixmap(matrix=mat, colorspace=fitz.csGRAY, alpha=False)
+
+    def _pixmap_to_array(self, pix: fitz.Pixmap) -> np.ndarray:
+        """
+        Expose the samples of a grayscale pixmap as a NumPy array without copying.
+
+        The array is a view on the pixmap memory: it is only valid while `pix`
+        is alive, so keep a reference to the pixmap until the array is consumed.
+
+        Args:
+            pix: Grayscale pixmap from `_render_page`
+
+        Returns:
+            2-D uint8 array of shape (height, width)
+        """
+        samples = np.frombuffer(pix.samples_mv, dtype=np.uint8)
+        return samples.reshape(pix.height, pix.stride)[:, :pix.width]
+
+    def _iter_pages(self, file_path: str, page_numbers: Optional[list[int]] = None) -> Iterator[tuple[int, fitz.Page]]:
+        """
+        Lazily iterate over the pages of a PDF.
+
+        Pages are loaded one at a time when the caller asks for the next one and
+        rendered by the caller, so peak memory depends on the page size and not
+        on the page count as long as each pixmap is dropped before advancing.
         
         Args:
             file_path: Path to PDF file
+            page_numbers: Zero-based page numbers to load (defaults to all pages)
             
-        Returns:
-            List of PIL Images, one per page
+        Yields:
+            Tuple of (page_number, page), one per page
         """
-        images = []
         pdf_document = fitz.open(file_path)
         
         try:
-            for page_num in range(len(pdf_document)):
-                page = pdf_document[page_num]
-                mat = fitz.Matrix(self.zoom_factor, self.zoom_factor)
-                pix = page.get_pixmap(matrix=mat)
-                img_data = pix.tobytes("png")
-                img = Image.open(io.BytesIO(img_data))
-                images.append(img)
+            if page_numbers is None:
+                page_numbers = range(len(pdf_document))
+            for page_num in page_numbers:
+                yield page_num, pdf_document[page_num]
         finally:
             pdf_document.close()
-            
-        return images
 
-    def _preprocess_image(self, img: Image.Image) -> Image.Image:
+    def _preprocess_image(self, img: np.ndarray, profile: str = "nlm") -> np.ndarray:
         """
         Preprocess image for better OCR results.
         
         Args:
-            img: Input PIL Image
+            img: Input grayscale image as a 2-D uint8 array
+            profile: "none" (as rendered), "binarize" (Otsu threshold),
+                "median_otsu" (3x3 median blur, then Otsu) or "nlm"
+                (non-local means denoising, then Otsu)
             
         Returns:
-            Preprocessed PIL Image
+            Preprocessed image array (binarized unless the profile is "none")
         """
-        # Convert PIL to OpenCV format
-        img_cv = cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
-        
-        # Convert to grayscale
-        gray = cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
+        # Pages are rendered in grayscale already; only color input needs converting
+        gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+        if profile == "none":
+            return gray
         
         # Apply denoising
-        denoised = cv2.fastNlMeansDenoising(gray)
+        if profile == "nlm":
+            gray = cv2.fastNlMeansDenoising(gray)
+        elif profile == "median_otsu":
+            gray = cv2.medianBlur(gray, 3)
         
         # Apply threshold for better contrast
-        _, thresh = cv2.threshold(denoised, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
         
-        # Convert back to PIL
-        return Image.fromarray(thresh)
+        return thresh
 
-    def _extract_text_from_image(self, img: Image.Image) -> tuple[str, list[int]]:
+    def _estimate_noise(self, img: np.ndarray) -> float:
+        """
+        Estimate the standard deviation of the noise of a page.
+
+        Applies Immerkaer's Laplacian-difference mask to a 2x subsampled view
+        and takes the median absolute response, so the sparse text edges don't
+        count as noise.
+
+        Args:
+            img: Grayscale image as a 2-D uint8 array
+
+        Returns:
+            Estimated noise sigma, in gray levels (about 0 for clean renders)
+        """
+        sub = img[::2, ::2].astype(np.int16)
+        response = (
+            sub[:-2, :-2] - 2 * sub[:-2, 1:-1] + sub[:-2, 2:]
+            - 2 * sub[1:-1, :-2] + 4 * sub[1:-1, 1:-1] - 2 * sub[1:-1, 2:]
+            + sub[2:, :-2] - 2 * sub[2:, 1:-1] + sub[2:, 2:]
+        )
+        # For Gaussian noise the mask response has a standard deviation of 6 sigma
+        return float(np.median(np.abs(response))) / (0.6745 * 6)
+
+    def _is_blank(self, img: np.ndarray) -> bool:
+        """
+        Check whether a page has (almost) no ink.
+
+        Args:
+            img: Grayscale image as a 2-D uint8 array
+
+        Returns:
+            True if the share of dark pixels is at most `blank_page_max_ink_ratio`
+        """
+        sample = img[::4, ::4]
+        return np.count_nonzero(sample < 128) <= self.ocr_config.blank_page_max_ink_ratio * sample.size
+
+    def _preprocessing_profiles(self, img: np.ndarray) -> list[str]:
+        """
+        Choose the preprocessing profiles to try on a page, in order.
+
+        A fixed profile is tried alone. In "auto" mode the profile is picked
+        from the estimated noise and followed by the more expensive ones, which
+        are only tried while the page confidence stays under
+        `adaptive_min_confidence`.
+
+        Args:
+            img: Grayscale image as a 2-D uint8 array
+
+        Returns:
+            Profile names
+        """
+        if self.ocr_config.preprocessing != "auto":
+            return [self.ocr_config.preprocessing]
+
+        noise = self._estimate_noise(img)
+        if noise < self.ocr_config.noise_sigma_low:
+            first_profile = "binarize"
+        elif noise < self.ocr_config.noise_sigma_high:
+            first_profile = "median_otsu"
+        else:
+            first_profile = "nlm"
+        return PREPROCESSING_PROFILES[PREPROCESSING_PROFILES.index(first_profile):]
+
+    def _extract_text_from_image(self, img: np.ndarray) -> tuple[str, list[int]]:
         """
         Extract text and confidence scores from a single image.
+
+        Runs on the backend selected with `ocr.backend` ("pytesseract" or "tesserocr").
         
         Args:
-            img: PIL Image to process
+            img: Image array to process
             
         Returns:
             Tuple of (extracted_text, confidence_scores)
         """
-        # Get OCR data with confidence scores
-        ocr_data = pytesseract.image_to_data(img, output_type=pytesseract.Output.DICT)
-        
-        # Extract text and confidence scores
-        page_text = ""
-        confidences = []
-        
-        for i in range(len(ocr_data['text'])):
-            conf = int(ocr_data['conf'][i])
-            if conf > 0:  # Only include text with confidence > 0
-                word = ocr_data['text'][i].strip()
-                if word:
-                    page_text += word + " "
-                    confidences.append(conf)
-        
-        return page_text.strip(), confidences
+        return self.backend.recognize(img)
+
+    def _extract_text_layer(self, page: fitz.Page) -> Optional[str]:
+        """
+        Read the embedded text layer of a page if it is good enough to skip OCR.
+
+        A page qualifies when it has at least `text_layer_min_chars` visible
+        characters, at least `text_layer_min_glyph_ratio` of them map to real
+        glyphs (not U+FFFD or control/private-use code points, which come from
+        fonts without a usable ToUnicode map), and images cover no more than
+        `text_layer_max_image_coverage` of the page (scans with a signature or
+        stamp text layer on top).
+
+        Args:
+            page: PyMuPDF page
+
+        Returns:
+            Page text, or None if the page must be OCR'd
+        """
+        if not self.ocr_config.text_layer:
+            return None
+
+        text = page.get_text("text")
+        chars = [char for char in text if not char.isspace()]
+        if len(chars) < self.ocr_config.text_layer_min_chars:
+            return None
+
+        valid_chars = sum(1 for char in chars if char != "\ufffd" and unicodedata.category(char)[0] != "C")
+        if valid_chars / len(chars) < self.ocr_config.text_layer_min_glyph_ratio:
+            return None
+
+        page_area = abs(page.rect)
+        if page_area:
+            image_area = sum(abs(fitz.Rect(image["bbox"]) & page.rect) for image in page.get_image_info())
+            if image_area / page_area > self.ocr_config.text_layer_max_image_coverage:
+                return None
+
+        lines = (line.strip() for line in text.splitlines())
+        return "\n".join(line for line in lines if line)
+
+    def _read_text_layers(self, pdf_document: fitz.Document) -> tuple[list[OCRPageResult], list[int]]:
+        """
+        Take the text layer of every page that has a usable one.
+
+        Args:
+            pdf_document: Open PyMuPDF document
+
+        Returns:
+            Tuple of (text layer page results, page numbers that still need OCR)
+        """
+        page_results = []
+        pages_to_ocr = []
+
+        for page_num in range(len(pdf_document)):
+            page_text = self._extract_text_layer(pdf_document[page_num])
+            if page_text is None:
+                pages_to_ocr.append(page_num)
+            else:
+                # Embedded text is exact, count every word as fully confident
+                page_results.append(self._page_result(page_num, "text_layer", page_text, [100] * len(page_text.split())))
+
+        return page_results, pages_to_ocr
+
+    def _page_result(
+        self,
+        page_num: int,
+        method: str,
+        page_text: str,
+        confidences: list[int],
+        zoom_factor: Optional[float] = None,
+        profile: Optional[str] = None,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> OCRPageResult:
+        """
+        Build the result of a single page.
+
+        Args:
+            page_num: Zero-based page number
+            method: Method that produced the text ("text_layer", "tesseract" or "blank")
+            page_text: Extracted text
+            confidences: Confidence scores of every word
+            zoom_factor: Zoom the page was OCR'd at (None for text layer pages)
+            profile: Preprocessing profile of the kept OCR attempt
+            timings: Seconds spent per step on the page, over every attempt
+
+        Returns:
+            Per-page result dictionary
+        """
+        return {
+            "page_number": page_num,
+            "method": method,
+            "text": page_text,
+            "confidences": confidences,
+            "zoom": zoom_factor,
+            "profile": profile,
+            "timings": timings or {},
+        }
+
+    def _ocr_pages(self, file_path: str, page_numbers: list[int]) -> list[OCRPageResult]:
+        """
+        OCR a subset of the pages of a PDF.
+
+        Args:
+            file_path: Path to PDF file
+            page_numbers: Zero-based page numbers to process
+
+        Returns:
+            List of per-page OCR results
+        """
+        return [self._ocr_page(page_num, page) for page_num, page in self._iter_pages(file_path, page_numbers)]
+
+    def _ocr_page(self, page_num: int, page: fitz.Page) -> OCRPageResult:
+        """
+        Render and OCR a page, escalating preprocessing and zoom until its confidence is high enough.
+
+        Blank pages skip Tesseract. Each render tries the preprocessing
+        profiles from `_preprocessing_profiles`; without adaptive zoom there is
+        a single zoom level, `zoom_factor`. The attempt with the best
+        confidence is kept.
+
+        Args:
+            page_num: Zero-based page number
+            page: PyMuPDF page
+
+        Returns:
+            Per-page OCR result, with the zoom and profile that produced it and
+            the time spent rendering, preprocessing and running Tesseract
+        """
+        timings = {"render": 0.0, "preprocess": 0.0, "ocr": 0.0}
+        best = None
+        best_confidence = -1.0
+
+        for zoom_factor in self.zoom_levels:
+            start_time = time.perf_counter()
+            pix = self._render_page(page, zoom_factor)
+            # The array is a view on the pixmap samples, `pix` outlives it in this iteration
+            gray = self._pixmap_to_array(pix)
+            timings["render"] += time.perf_counter() - start_time
+
+            if self.ocr_config.skip_blank_pages and self._is_blank(gray):
+                return self._page_result(page_num, "blank", "", [], zoom_factor, "blank", self._round_timings(timings))
+
+            for profile in self._preprocessing_profiles(gray):
+                start_time = time.perf_counter()
+                processed_img = self._preprocess_image(gray, profile)
+                timings["preprocess"] += time.perf_counter() - start_time
+
+                start_time = time.perf_counter()
+                page_text, confidences = self._extract_text_from_image(processed_img)
+                timings["ocr"] += time.perf_counter() - start_time
+
+                confidence = self._calculate_average_confidence(confidences)
+                if confidence > best_confidence:
+                    best = (page_text, confidences, zoom_factor, profile)
+                    best_confidence = confidence
+                if confidence >= self.ocr_config.adaptive_min_confidence:
+                    break
+
+            # Free the raster before the next render
+            del gray, pix
+            if best_confidence >= self.ocr_config.adaptive_min_confidence:
+                break
+            if zoom_factor != self.zoom_levels[-1]:
+                logger.debug(f"Page {page_num + 1}: confidence {best_confidence:.2f} at zoom {zoom_factor}, re-rendering")
+
+        page_text, confidences, zoom_factor, profile = best
+        return self._page_result(page_num, "tesseract", page_text, confidences, zoom_factor, profile, self._round_timings(timings))
+
+    @staticmethod
+    def _round_timings(timings: Dict[str, float]) -> Dict[str, float]:
+        """Round step timings to milliseconds for the result."""
+        return {step: round(seconds, 3) for step, seconds in timings.items()}
 
     def _calculate_average_confidence(self, all_confidences: list[int]) -> float:
         """
@@ -155,38 +501,112 @@ class OCR_tesseract:
             Extracted data dictionary
         """
         try:
-            # Convert PDF to images
-            images = self._pdf_to_images(file_path)
-            
-            # Process each image
-            page_texts = []
-            all_confidences = []
-            
-            for img in images:
-                # Preprocess image
-                processed_img = self._preprocess_image(img)
-                
-                # Extract text and confidence
-                page_text, confidences = self._extract_text_from_image(processed_img)
-                
-                page_texts.append(page_text)
-                all_confidences.extend(confidences)
-            
-            # Format result
-            text_result = self._format_extraction_text_result(page_texts)
-            confidence = self._calculate_average_confidence(all_confidences)
+            # Use the embedded text where possible
+            page_results, pages_to_ocr, timings = self._read_document(file_path)
+
+            # Render, preprocess and OCR the remaining (scanned) pages one by one
+            page_results.extend(self._ocr_pages(file_path, pages_to_ocr))
             
-            return {
-                "method": "tesseract",
-                "file_name": path.basename(file_path),
-                "page_count": len(images),
-                "text": text_result["text"],
-                "confidence": confidence
-            }
+            return self._build_extraction_result(file_path, page_results, timings)
+
+        except Exception as e:
+            logger.error(f"Tesseract OCR extraction failed: {str(e)}")
+            return {"error": str(e), "method": "tesseract"}
+
+    def extract_with_process_pool(self, file_path: str, executor: Executor) -> OCRExtractionResult:
+        """
+        Extract text using Tesseract OCR, spreading the pages over a process pool.
+
+        Text layer pages are read here; the scanned pages are split into ranges
+        of `pages_per_task` pages, each worker opens the PDF, renders,
+        preprocesses and OCRs its pages, and the pages are put back in order.
+
+        Args:
+            file_path: Path to PDF file
+            executor: Process pool executor initialized with `init_ocr_worker`
+
+        Returns:
+            Extracted data dictionary
+        """
+        try:
+            page_results, pages_to_ocr, timings = self._read_document(file_path)
+
+            pages_per_task = max(1, self.ocr_config.pages_per_task)
+            futures = [
+                executor.submit(ocr_pages_worker, self.ocr_config, file_path, pages_to_ocr[start:start + pages_per_task])
+                for start in range(0, len(pages_to_ocr), pages_per_task)
+            ]
+
+            for future in futures:
+                page_results.extend(future.result())
+
+            return self._build_extraction_result(file_path, page_results, timings)
 
         except Exception as e:
             logger.error(f"Tesseract OCR extraction failed: {str(e)}")
             return {"error": str(e), "method": "tesseract"}
+
+    def _read_document(self, file_path: str) -> tuple[list[OCRPageResult], list[int], Dict[str, float]]:
+        """
+        Open a PDF and read the text layer of its pages.
+
+        Args:
+            file_path: Path to PDF file
+
+        Returns:
+            Tuple of (text layer page results, page numbers left to OCR,
+            seconds spent opening the PDF and reading its text layers)
+        """
+        start_time = time.perf_counter()
+        with fitz.open(file_path) as pdf_document:
+            open_seconds = time.perf_counter() - start_time
+            page_results, pages_to_ocr = self._read_text_layers(pdf_document)
+        timings = {"open": open_seconds, "text_layer": time.perf_counter() - start_time - open_seconds}
+        return page_results, pages_to_ocr, self._round_timings(timings)
+
+    def _build_extraction_result(
+        self, file_path: str, page_results: list[OCRPageResult], timings: Optional[Dict[str, float]] = None
+    ) -> OCRExtractionResult:
+        """
+        Build the extraction result from the per-page results.
+
+        Args:
+            file_path: Path to PDF file
+            page_results: Result of every page, in any order
+            timings: Document-level step timings (PDF open, text layer reading)
+
+        Returns:
+            Extracted data dictionary. `method` is "text_layer", "tesseract" or "blank"
+            when every page used the same method and "mixed" otherwise; the
+            method of each page is listed in `pages`.
+        """
+        page_results = sorted(page_results, key=lambda page_result: page_result["page_number"])
+        page_texts = [page_result["text"] for page_result in page_results]
+        all_confidences = [conf for page_result in page_results for conf in page_result["confidences"]]
+
+        text_result = self._format_extraction_text_result(page_texts)
+        confidence = self._calculate_average_confidence(all_confidences)
+        methods = {page_result["method"] for page_result in page_results}
+
+        return {
+            "method": methods.pop() if len(methods) == 1 else "mixed" if methods else "tesseract",
+            "file_name": path.basename(file_path),
+            "page_count": len(page_results),
+            "text": text_result["text"],
+            "confidence": confidence,
+            "timings": timings or {},
+            "pages": [
+                {
+                    "page_number": page_result["page_number"] + 1,
+                    "method": page_result["method"],
+                    "confidence": self._calculate_average_confidence(page_result["confidences"]),
+                    "zoom": page_result["zoom"],
+                    "profile": page_result["profile"],
+                    "timings": page_result["timings"],
+                }
+                for page_result in page_results
+            ],
+        }
     
     # def extract_with_tesseract_simple(self, file_path: str) -> Dict[str, Any]:
     #     """
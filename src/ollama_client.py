@@ -0,0 +1,216 @@
+"""
+Shared Ollama client with a tuned connection pool, model warm-up and latency stats.
+"""
+
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+import ollama
+
+from utils.config import OllamaClientConfig
+from utils.metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+
+class OllamaClient:
+    """
+    Single Ollama client shared by every component that talks to the model.
+
+    Owns one pooled HTTP connection pool (so requests reuse open connections),
+    sends `keep_alive` with every request so the model stays loaded for the
+    whole run, and records, for every generate call, how much of the latency
+    was spent loading the model versus evaluating the prompt (time to first
+    token).
+    """
+
+    def __init__(self, client_config: Optional[OllamaClientConfig] = None, metrics: Optional[MetricsRegistry] = None):
+        """
+        Initialize the client. No request is sent until `warm_up()` or `generate()`.
+
+        Args:
+            client_config: Connection settings. Defaults to the built-in settings.
+            metrics: Run metrics receiving the request timings (llm_ttft,
+                llm_request, llm_first_chunk). Defaults to a private registry.
+        """
+        self.config = client_config or OllamaClientConfig()
+        self.metrics = metrics or MetricsRegistry()
+        self.client = ollama.AsyncClient(
+            host=self.config.host,
+            timeout=httpx.Timeout(self.config.timeout_seconds, connect=self.config.connect_timeout_seconds),
+            limits=httpx.Limits(
+                max_connections=self.config.max_connections,
+                max_keepalive_connections=self.config.max_keepalive_connections,
+                keepalive_expiry=self.config.keepalive_expiry_seconds,
+            ),
+        )
+        self._stats = {
+            "requests": 0,
+            "cold_loads": 0,
+            "load_seconds": 0.0,
+            "ttft_seconds": 0.0,
+            "max_ttft_seconds": 0.0,
+            "total_seconds": 0.0,
+            "streams": 0,
+            "ttfb_seconds": 0.0,
+            "early_stops": 0,
+        }
+
+    async def warm_up(self, model: str) -> None:
+        """
+        Load the model into memory before the first real request.
+
+        An empty prompt makes Ollama load the model without generating anything.
+        Failures are only logged: the first real request will load the model.
+
+        Args:
+            model: Name of the model to load
+        """
+        start_time = time.monotonic()
+        try:
+            response = await self.client.generate(model=model, prompt="", keep_alive=self.config.keep_alive)
+        except Exception as e:
+            logger.warning(f"Could not warm up model '{model}': {e}")
+            return
+
+        load_seconds = (response.load_duration or 0) / 1e9
+        logger.info(
+            f"Model '{model}' ready in {time.monotonic() - start_time:.2f}s "
+            f"(load {load_seconds:.2f}s, kept alive for {self.config.keep_alive})"
+        )
+
+    async def generate(self, **kwargs: Any) -> ollama.GenerateResponse:
+        """
+        Send a non-streaming generate request, keeping the model loaded.
+
+        Args:
+            **kwargs: Arguments of `ollama.AsyncClient.generate`
+
+        Returns:
+            Ollama generate response
+        """
+        kwargs.setdefault("keep_alive", self.config.keep_alive)
+        start_time = time.monotonic()
+        response = await self.client.generate(**kwargs)
+        self._record_timings(response, time.monotonic() - start_time)
+        return response
+
+    async def generate_stream(self, **kwargs: Any) -> AsyncIterator[ollama.GenerateResponse]:
+        """
+        Send a streaming generate request, keeping the model loaded.
+
+        Closing the iterator before the last chunk (`aclose()`, or `break` in
+        an `async for` that closes it) drops the HTTP response, which makes
+        Ollama stop generating.
+
+        Args:
+            **kwargs: Arguments of `ollama.AsyncClient.generate`, except `stream`
+
+        Yields:
+            Ollama generate response chunks
+        """
+        kwargs.setdefault("keep_alive", self.config.keep_alive)
+        start_time = time.monotonic()
+        stream = await self.client.generate(stream=True, **kwargs)
+        first_chunk = True
+        done = False
+        try:
+            async for chunk in stream:
+                if first_chunk:
+                    first_chunk = False
+                    self._stats["streams"] += 1
+                    self._stats["ttfb_seconds"] += time.monotonic() - start_time
+                    self.metrics.observe("llm_first_chunk", time.monotonic() - start_time)
+                if chunk.done:
+                    done = True
+                    self._record_timings(chunk, time.monotonic() - start_time)
+                yield chunk
+        finally:
+            await stream.aclose()
+            if not done:
+                self._stats["early_stops"] += 1
+
+    async def embed(self, **kwargs: Any) -> ollama.EmbedResponse:
+        """
+        Send an embed request, keeping the embedding model loaded.
+
+        Args:
+            **kwargs: Arguments of `ollama.AsyncClient.embed`
+
+        Returns:
+            Ollama embed response
+        """
+        kwargs.setdefault("keep_alive", self.config.keep_alive)
+        start_time = time.monotonic()
+        response = await self.client.embed(**kwargs)
+        self.metrics.observe("llm_embed", time.monotonic() - start_time)
+        return response
+
+    async def list(self) -> ollama.ListResponse:
+        """
+        List the models available on the server.
+
+        Returns:
+            Ollama list response
+        """
+        return await self.client.list()
+
+    def _record_timings(self, response: ollama.GenerateResponse, elapsed_seconds: float) -> None:
+        """
+        Record the server-side timings of a generate response.
+
+        Args:
+            response: Ollama generate response
+            elapsed_seconds: Wall-clock time of the request
+        """
+        load_seconds = (response.load_duration or 0) / 1e9
+        ttft_seconds = load_seconds + (response.prompt_eval_duration or 0) / 1e9
+
+        self._stats["requests"] += 1
+        self._stats["load_seconds"] += load_seconds
+        self._stats["ttft_seconds"] += ttft_seconds
+        self._stats["max_ttft_seconds"] = max(self._stats["max_ttft_seconds"], ttft_seconds)
+        self._stats["total_seconds"] += elapsed_seconds
+        self.metrics.observe("llm_ttft", ttft_seconds)
+        self.metrics.observe("llm_request", elapsed_seconds)
+
+        if load_seconds >= self.config.cold_load_threshold_seconds:
+            self._stats["cold_loads"] += 1
+            logger.warning(f"Model was reloaded for a request ({load_seconds:.2f}s load time)")
+
+    def stats(self) -> Dict[str, int | float]:
+        """
+        Get request timing statistics.
+
+        Returns:
+            Request and cold load counts, total load time and average time to
+            first token, request latency and time to the first streamed chunk
+            (seconds), and the number of streams stopped before the model finished
+        """
+        requests = self._stats["requests"]
+        return {
+            "requests": requests,
+            "cold_loads": self._stats["cold_loads"],
+            "load_seconds": round(self._stats["load_seconds"], 2),
+            "avg_ttft_seconds": round(self._stats["ttft_seconds"] / requests, 3) if requests else 0.0,
+            "max_ttft_seconds": round(self._stats["max_ttft_seconds"], 3),
+            "avg_request_seconds": round(self._stats["total_seconds"] / requests, 3) if requests else 0.0,
+            "avg_ttfb_seconds": round(self._stats["ttfb_seconds"] / self._stats["streams"], 3) if self._stats["streams"] else 0.0,
+            "early_stops": self._stats["early_stops"],
+        }
+
+    def log_stats(self) -> None:
+        """Log the request timing statistics."""
+        stats = self.stats()
+        logger.info(
+            f"Ollama client: {stats['requests']} requests, {stats['cold_loads']} cold loads "
+            f"({stats['load_seconds']}s loading), time to first token avg {stats['avg_ttft_seconds']}s "
+            f"/ max {stats['max_ttft_seconds']}s, request avg {stats['avg_request_seconds']}s, "
+            f"first streamed chunk avg {stats['avg_ttfb_seconds']}s, {stats['early_stops']} streams stopped early"
+        )
+
+    async def close(self) -> None:
+        """Close the pooled HTTP connections."""
+        await self.client.close()
@@ -0,0 +1,380 @@
+"""
+Local search index over the processed resolutions (SQLite FTS5 + B-tree indexes).
+
+Usage:
+    python src/search_index.py "regularización dominial" --manzana 5564
+    python src/search_index.py --padron 0124788 --json
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from field_extractor import FieldExtractor
+from utils.config import get_config
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# Field columns stored on every document and indexed with a B-tree
+FIELD_COLUMNS = [
+    "numero_resolucion", "fecha_resolucion", "expediente", "lote", "lote_numero", "manzana", "manzana_numero", "padron",
+]
+INDEXED_COLUMNS = ["numero_resolucion", "fecha_resolucion", "expediente", "lote_numero", "manzana", "manzana_numero", "padron"]
+# Columns added after the first version of the index, filled from their field on open
+NUMBER_COLUMNS = {"lote_numero": "lote", "manzana_numero": "manzana"}
+PLOT_PATTERN = re.compile(r"(\d+)\s*-?\s*([A-Za-z])?")
+
+
+def _normalize_number(value: str) -> str:
+    """Drop the thousands separators of a DNI or padrón, as the field extractor does."""
+    return value.replace(".", "").strip()
+
+
+def _plot_number(value: Optional[str]) -> Optional[str]:
+    """Bare number of a lote or manzana ("5564 A" -> "5564")."""
+    match = PLOT_PATTERN.match(value.strip()) if value else None
+    return match.group(1) if match else None
+
+
+def _plot_condition(column: str, value: str) -> tuple[str, str]:
+    """
+    Column and value to filter a lote or manzana on.
+
+    A bare number ("5564") matches every subdivision of it ("5564", "5564 A",
+    "5564 D"); a number with its letter ("5564A", "5564-a") only that one.
+
+    Args:
+        column: "lote" or "manzana"
+        value: Value typed by the user
+
+    Returns:
+        Column name and value to compare it with
+    """
+    match = PLOT_PATTERN.fullmatch(value.strip())
+    if match is None:
+        return column, value.strip()
+    if match.group(2):
+        return column, f"{match.group(1)} {match.group(2).upper()}"
+    return f"{column}_numero", match.group(1)
+
+
+def fts_query(text: str) -> str:
+    """
+    Turn free text into an FTS5 query matching documents that contain every word.
+
+    Words are quoted, so user input never reaches the FTS5 query syntax.
+    A trailing `*` on a word keeps it as a prefix search.
+
+    Args:
+        text: Free text typed by the user
+
+    Returns:
+        FTS5 MATCH expression (empty if the text has no words)
+    """
+    terms = []
+    for token in text.split():
+        prefix = token.endswith("*")
+        for word in WORD_PATTERN.findall(token):
+            terms.append(f'"{word}"')
+        if prefix and terms:
+            terms[-1] += "*"
+    return " ".join(terms)
+
+
+class SearchIndex:
+    """
+    Persistent full-text and field index of the processed documents.
+
+    The OCR text and summary of every document are indexed with FTS5 (accents
+    folded, so "padron" finds "padrón"), ranked with BM25 with the summary
+    weighted above the text. Resolution number, date, expediente, lote,
+    manzana (both also as bare numbers, so "5564" finds "5564 A") and padrón
+    are columns with B-tree indexes and DNIs (several per document) go in
+    their own indexed table, so field lookups are point queries. Documents
+    are upserted one at a time as the pipeline finishes them.
+    """
+
+    def __init__(self, db_path: str, summary_weight: float = 2.0, snippet_tokens: int = 16):
+        """
+        Open (or create) the index database.
+
+        Args:
+            db_path: Path to the SQLite file
+            summary_weight: BM25 weight of summary matches relative to OCR text matches
+            snippet_tokens: Tokens of the text snippet returned with every match
+        """
+        self.db_path = db_path
+        self.summary_weight = summary_weight
+        self.snippet_tokens = snippet_tokens
+        self._lock = threading.Lock()
+        self._field_extractor = FieldExtractor([])
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS documents (
+                id INTEGER PRIMARY KEY,
+                doc_id TEXT NOT NULL UNIQUE,
+                source_file TEXT NOT NULL,
+                {", ".join(f"{column} TEXT" for column in FIELD_COLUMNS)},
+                summary TEXT,
+                text TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._add_number_columns()
+        self._connection.executescript(
+            f"""
+            {"".join(f"CREATE INDEX IF NOT EXISTS idx_documents_{column} ON documents ({column});" for column in INDEXED_COLUMNS)}
+            CREATE TABLE IF NOT EXISTS document_dni (
+                dni TEXT NOT NULL,
+                document INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_document_dni_dni ON document_dni (dni);
+            CREATE INDEX IF NOT EXISTS idx_document_dni_document ON document_dni (document);
+            CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5 (
+                summary, text, content = 'documents', content_rowid = 'id',
+                tokenize = 'unicode61 remove_diacritics 2'
+            );
+            """
+        )
+        self._connection.commit()
+
+    def _add_number_columns(self) -> None:
+        """Add the bare lote and manzana number columns to an index created before them."""
+        columns = {row["name"] for row in self._connection.execute("PRAGMA table_info(documents)")}
+        missing = [column for column in NUMBER_COLUMNS if column not in columns]
+        if not missing:
+            return
+        self._connection.create_function("plot_number", 1, _plot_number, deterministic=True)
+        for column in missing:
+            self._connection.execute(f"ALTER TABLE documents ADD COLUMN {column} TEXT")
+            self._connection.execute(f"UPDATE documents SET {column} = plot_number({NUMBER_COLUMNS[column]})")
+        logger.info(f"Search index: added columns {', '.join(missing)}")
+
+    def upsert(
+        self,
+        doc_id: str,
+        source_file: str,
+        text: str,
+        summary: Optional[str] = None,
+        fields: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Add a document, or replace it if it is already indexed.
+
+        Args:
+            doc_id: Id of the document (absolute path of its file)
+            source_file: File name shown in the results
+            text: OCR text
+            summary: Summary, None if it failed
+            fields: Rule-based fields (see `FieldExtractor`), extracted from the
+                text when not given
+        """
+        if fields is None:
+            fields = self._field_extractor.extract(text)
+        values = [
+            _plot_number(fields.get(NUMBER_COLUMNS[column])) if column in NUMBER_COLUMNS else fields.get(column)
+            for column in FIELD_COLUMNS
+        ]
+        dnis = sorted({_normalize_number(dni) for dni in fields.get("dni") or []})
+
+        with self._lock:
+            previous = self._connection.execute(
+                "SELECT id, summary, text FROM documents WHERE doc_id = ?", (doc_id,)
+            ).fetchone()
+            if previous is not None:
+                # External-content FTS5 tables are told which content they indexed before it changes
+                self._connection.execute(
+                    "INSERT INTO documents_fts (documents_fts, rowid, summary, text) VALUES ('delete', ?, ?, ?)",
+                    (previous["id"], previous["summary"], previous["text"]),
+                )
+                self._connection.execute("DELETE FROM document_dni WHERE document = ?", (previous["id"],))
+
+            row_id = self._connection.execute(
+                f"""
+                INSERT INTO documents (doc_id, source_file, {", ".join(FIELD_COLUMNS)}, summary, text, updated_at)
+                VALUES (?, ?, {", ".join("?" * len(FIELD_COLUMNS))}, ?, ?, ?)
+                ON CONFLICT (doc_id) DO UPDATE SET
+                    source_file = excluded.source_file,
+                    {", ".join(f"{column} = excluded.{column}" for column in FIELD_COLUMNS)},
+                    summary = excluded.summary, text = excluded.text, updated_at = excluded.updated_at
+                RETURNING id
+                """,
+                (doc_id, source_file, *values, summary, text, time.time()),
+            ).fetchone()[0]
+            self._connection.execute(
+                "INSERT INTO documents_fts (rowid, summary, text) VALUES (?, ?, ?)", (row_id, summary, text)
+            )
+            self._connection.executemany(
+                "INSERT INTO document_dni (dni, document) VALUES (?, ?)", [(dni, row_id) for dni in dnis]
+            )
+            self._connection.commit()
+
+    def search(
+        self,
+        query: str = "",
+        numero_resolucion: Optional[str] = None,
+        expediente: Optional[str] = None,
+        dni: Optional[str] = None,
+        lote: Optional[str] = None,
+        manzana: Optional[str] = None,
+        padron: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """
+        Find documents by words and/or field values.
+
+        Every given condition must hold. Full-text matches are ranked by BM25;
+        field-only lookups are sorted by date, newest first.
+
+        Args:
+            query: Words the OCR text or summary must contain (see `fts_query`)
+            numero_resolucion: Resolution number, as extracted (e.g. "1234/2023")
+            expediente: Expediente code or number
+            dni: DNI of a beneficiary (dots optional)
+            lote: Lote number; a bare number also finds its lettered subdivisions
+            manzana: Manzana number; "5564" also finds "5564 A", "5564A" only that one
+            padron: Padrón municipal (dots optional)
+            date_from: First resolution date, YYYY-MM-DD
+            date_to: Last resolution date, YYYY-MM-DD
+            limit: Max documents returned
+
+        Returns:
+            Matching documents: id, file, fields, summary and, for full-text
+            queries, a snippet of the best matching column and the BM25 rank
+            (lower is better)
+        """
+        conditions = []
+        parameters: List[Any] = []
+        for column, value in (
+            ("numero_resolucion", numero_resolucion),
+            ("expediente", expediente),
+            _plot_condition("lote", lote) if lote else ("lote", None),
+            _plot_condition("manzana", manzana) if manzana else ("manzana", None),
+            ("padron", _normalize_number(padron) if padron else None),
+        ):
+            if value:
+                conditions.append(f"documents.{column} = ?")
+                parameters.append(value.strip())
+        if dni:
+            conditions.append("documents.id IN (SELECT document FROM document_dni WHERE dni = ?)")
+            parameters.append(_normalize_number(dni))
+        if date_from:
+            conditions.append("documents.fecha_resolucion >= ?")
+            parameters.append(date_from)
+        if date_to:
+            conditions.append("documents.fecha_resolucion <= ?")
+            parameters.append(date_to)
+
+        columns = f"documents.doc_id, documents.source_file, {', '.join(f'documents.{column}' for column in FIELD_COLUMNS)}, documents.summary"
+        match = fts_query(query)
+        if match:
+            sql = f"""
+                SELECT {columns},
+                    snippet(documents_fts, -1, '[', ']', '…', {self.snippet_tokens}) AS snippet,
+                    bm25(documents_fts, {self.summary_weight}, 1.0) AS rank
+                FROM documents_fts JOIN documents ON documents.id = documents_fts.rowid
+                WHERE documents_fts MATCH ? {"".join(f" AND {condition}" for condition in conditions)}
+                ORDER BY rank LIMIT ?
+            """
+            parameters = [match, *parameters, limit]
+        elif conditions:
+            sql = f"""
+                SELECT {columns} FROM documents WHERE {" AND ".join(conditions)}
+                ORDER BY documents.fecha_resolucion DESC, documents.id DESC LIMIT ?
+            """
+            parameters.append(limit)
+        else:
+            return []
+
+        with self._lock:
+            rows = self._connection.execute(sql, parameters).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self) -> int:
+        """Number of indexed documents."""
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def optimize(self) -> None:
+        """Merge the FTS5 index segments, after a large batch of upserts."""
+        with self._lock:
+            self._connection.execute("INSERT INTO documents_fts (documents_fts) VALUES ('optimize')")
+            self._connection.commit()
+
+    def log_stats(self) -> None:
+        """Log the size of the index."""
+        logger.info(f"Search index: {self.count()} documents indexed in {self.db_path}")
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
+
+
+def main() -> None:
+    """Query the search index from the command line."""
+    parser = argparse.ArgumentParser(description="Search the processed resolutions")
+    parser.add_argument("query", nargs="?", default="", help="Words the OCR text or summary must contain ('word*' for a prefix)")
+    parser.add_argument("--resolucion", dest="numero_resolucion", help="Resolution number, e.g. 1234/2023")
+    parser.add_argument("--expediente")
+    parser.add_argument("--dni")
+    parser.add_argument("--lote")
+    parser.add_argument("--manzana", help="Manzana number, e.g. 5564 (every subdivision) or 5564A")
+    parser.add_argument("--padron")
+    parser.add_argument("--desde", dest="date_from", help="First date, YYYY-MM-DD")
+    parser.add_argument("--hasta", dest="date_to", help="Last date, YYYY-MM-DD")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--index", help="Index database (defaults to search.index_path of the config)")
+    parser.add_argument("--json", action="store_true", help="Print the matches as JSON")
+    args = parser.parse_args()
+
+    index = SearchIndex(args.index or get_config().search.index_path)
+    start = time.perf_counter()
+    matches = index.search(
+        args.query,
+        numero_resolucion=args.numero_resolucion,
+        expediente=args.expediente,
+        dni=args.dni,
+        lote=args.lote,
+        manzana=args.manzana,
+        padron=args.padron,
+        date_from=args.date_from,
+        date_to=args.date_to,
+        limit=args.limit,
+    )
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    index.close()
+
+    if args.json:
+        print(json.dumps(matches, ensure_ascii=False, indent=2))
+        return
+    for match in matches:
+        header = " | ".join(
+            value for value in (match["source_file"], match["numero_resolucion"], match["fecha_resolucion"]) if value
+        )
+        print(header)
+        print(f"  {' '.join((match.get('snippet') or match['summary'] or '').split())}")
+    print(f"{len(matches)} documents in {elapsed_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
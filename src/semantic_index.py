@@ -0,0 +1,656 @@
+"""
+Local semantic search over summaries and OCR chunks with an embedding index.
+
+Usage:
+    python src/semantic_index.py "regularizaciones dominiales en vecinal Sarmiento" -k 10
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from llm_scheduler import LLMScheduler
+from ollama_client import OllamaClient
+from utils.chunker import split_text
+from utils.config import SemanticConfig, get_config
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"\w+")
+
+EMBEDDERS = ["ollama", "hashing"]
+
+INDEX_VERSION = 1
+VECTORS_FILE = "vectors.f32"
+# Compaction writes a new generation of the vector file, named by the id map
+VECTORS_GENERATION_FILE = "vectors.{generation}.f32"
+IDS_FILE = "ids.json"
+IVF_FILE = "ivf.npz"
+# Rows the vector file grows by at least, so appends rarely resize it
+MIN_GROWTH_ROWS = 1024
+# Removed rows are compacted away when they are more than this fraction of the file
+MAX_DEAD_RATIO = 0.25
+
+
+class OllamaEmbedder:
+    """Embeds texts with an Ollama embedding model, in batches."""
+
+    def __init__(
+        self, client: OllamaClient, model: str, batch_size: int = 32, scheduler: Optional[LLMScheduler] = None
+    ):
+        """
+        Initialize the embedder.
+
+        Args:
+            client: Shared Ollama client
+            model: Embedding model (e.g. "nomic-embed-text")
+            batch_size: Texts sent per embed request
+            scheduler: Scheduler shared with the summary requests, so embed
+                requests count against the same concurrency limit and are
+                retried the same way. None sends them directly.
+        """
+        self.client = client
+        self.model = model
+        self.batch_size = batch_size
+        self.scheduler = scheduler
+
+    @property
+    def name(self) -> str:
+        return self.model
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            Matrix with one float32 row per text
+        """
+        rows = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start:start + self.batch_size]
+            if self.scheduler is None:
+                response = await self.client.embed(model=self.model, input=batch)
+            else:
+                response = await self.scheduler.run(
+                    lambda: self.client.embed(model=self.model, input=batch), description="Embed request"
+                )
+            rows.extend(response.embeddings)
+        return np.asarray(rows, dtype=np.float32)
+
+
+class HashingEmbedder:
+    """
+    Deterministic, offline embedder: accent-folded words hashed into a
+    fixed-size signed bag-of-words vector.
+
+    It only captures shared words, not meaning; it exists so the index can be
+    built and tested without an embedding model.
+    """
+
+    def __init__(self, dimensions: int = 256):
+        """
+        Initialize the embedder.
+
+        Args:
+            dimensions: Size of the vectors
+        """
+        self.dimensions = dimensions
+
+    @property
+    def name(self) -> str:
+        return f"hashing-{self.dimensions}"
+
+    def _embed_text(self, text: str) -> np.ndarray:
+        folded = unicodedata.normalize("NFKD", text.lower()).encode("ascii", "ignore").decode("ascii")
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for word in WORD_PATTERN.findall(folded):
+            value = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[value % self.dimensions] += 1.0 if value >> 63 else -1.0
+        return vector
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            Matrix with one float32 row per text
+        """
+        return np.stack([self._embed_text(text) for text in texts]) if texts else np.zeros((0, self.dimensions), np.float32)
+
+
+def create_embedder(
+    semantic_config: SemanticConfig, client: Optional[OllamaClient] = None, scheduler: Optional[LLMScheduler] = None
+):
+    """
+    Build the embedder selected in the configuration.
+
+    Args:
+        semantic_config: Semantic index configuration
+        client: Shared Ollama client (a new one is created if needed and not given)
+        scheduler: LLM scheduler the Ollama embed requests go through
+
+    Returns:
+        Embedder
+    """
+    if semantic_config.embedder == "hashing":
+        return HashingEmbedder(semantic_config.hashing_dimensions)
+    return OllamaEmbedder(client or OllamaClient(), semantic_config.model, semantic_config.batch_size, scheduler)
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length, so cosine similarity is a dot product."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _nearest_centroid(vectors: np.ndarray, centroids: np.ndarray, batch_rows: int = 65536) -> np.ndarray:
+    """IVF partition (nearest centroid) of every row."""
+    return np.concatenate([
+        np.argmax(vectors[start:start + batch_rows] @ centroids.T, axis=1).astype(np.int32)
+        for start in range(0, len(vectors), batch_rows)
+    ]) if len(vectors) else np.zeros(0, dtype=np.int32)
+
+
+class SemanticIndex:
+    """
+    Persistent embedding index of the processed documents.
+
+    Every document is embedded as its summary plus its OCR text split in
+    chunks. The unit-length vectors are rows of a float32 matrix in a
+    memory-mapped file, so the index is not loaded in RAM and appends only
+    touch new rows; `ids.json` maps every row to its document and names the
+    vector file it describes. A query is one matrix-vector product (cosine
+    similarity) and an `argpartition` top-k; the best chunk of each document
+    ranks the document.
+
+    Above `ivf_min_vectors` rows, the rows are partitioned with spherical
+    k-means (IVF) and a query only scores the rows of the `ivf_probes`
+    partitions closest to it, trading a little recall for speed. Re-indexed
+    documents leave dead rows behind, compacted away when they grow past a
+    quarter of the file, into a new generation of the vector file: the
+    previous one stays valid until the id map naming the new one is written.
+    The partition is trained in a worker thread (`add_document`) or by an
+    explicit `train_ivf()`, never while adding vectors.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        embedder,
+        chunk_tokens: int = 512,
+        ivf_min_vectors: int = 50000,
+        ivf_probes: int = 8,
+    ):
+        """
+        Open (or create) the index.
+
+        Args:
+            directory: Directory of the index files
+            embedder: `OllamaEmbedder` or `HashingEmbedder`
+            chunk_tokens: Token budget of every OCR text chunk
+            ivf_min_vectors: Rows from which the IVF partition is built (0 disables it)
+            ivf_probes: Partitions scored per query
+        """
+        self.directory = directory
+        self.embedder = embedder
+        self.chunk_tokens = chunk_tokens
+        self.ivf_min_vectors = ivf_min_vectors
+        self.ivf_probes = ivf_probes
+        self._lock = threading.Lock()
+
+        self.dimensions: Optional[int] = None
+        self.count = 0
+        # Row -> [doc_id, source_file, chunk] (chunk -1 is the summary); None for removed rows
+        self._entries: List[Optional[List[Any]]] = []
+        self._doc_rows: Dict[str, List[int]] = {}
+        self._dead_rows = 0
+        self._generation = 0
+        self._vectors: Optional[np.memmap] = None
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._trained_rows = 0
+        self._training = False
+        self._unsaved_documents = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    @property
+    def _vectors_path(self) -> str:
+        return self._generation_path(self._generation)
+
+    def _generation_path(self, generation: int) -> str:
+        file_name = VECTORS_GENERATION_FILE.format(generation=generation) if generation else VECTORS_FILE
+        return os.path.join(self.directory, file_name)
+
+    @property
+    def _ids_path(self) -> str:
+        return os.path.join(self.directory, IDS_FILE)
+
+    @property
+    def _ivf_path(self) -> str:
+        return os.path.join(self.directory, IVF_FILE)
+
+    @property
+    def documents(self) -> int:
+        """Number of indexed documents."""
+        return len(self._doc_rows)
+
+    def _load(self) -> None:
+        """
+        Read the id map and open the vector file it names.
+
+        Starts a new index if they belong to another model or if the vector
+        file holds fewer rows than the id map lists.
+        """
+        if not os.path.exists(self._ids_path):
+            return
+        try:
+            with open(self._ids_path, "r", encoding="utf-8") as f:
+                ids = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Could not read the semantic index id map, starting a new index: {e}")
+            return
+        if ids.get("version") != INDEX_VERSION or ids.get("model") != self.embedder.name:
+            logger.warning(
+                f"Semantic index was built with '{ids.get('model')}', rebuilding it with '{self.embedder.name}'"
+            )
+            if os.path.exists(self._ivf_path):
+                os.remove(self._ivf_path)
+            return
+
+        # Maps written before vector file generations describe vectors.f32
+        generation = ids.get("generation", 0)
+        vectors_path = self._generation_path(generation)
+        rows = os.path.getsize(vectors_path) // (4 * ids["dimensions"]) if os.path.exists(vectors_path) else 0
+        if rows < len(ids["entries"]):
+            logger.warning(
+                f"Semantic index vector file holds {rows} of {len(ids['entries'])} vectors, starting a new index"
+            )
+            if os.path.exists(self._ivf_path):
+                os.remove(self._ivf_path)
+            return
+        self._remove_stale_generations(generation)
+
+        self._generation = generation
+        self.dimensions = ids["dimensions"]
+        self._entries = ids["entries"]
+        self.count = len(self._entries)
+        for row, entry in enumerate(self._entries):
+            if entry is not None:
+                self._doc_rows.setdefault(entry[0], []).append(row)
+            else:
+                self._dead_rows += 1
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(rows, self.dimensions))
+
+        if os.path.exists(self._ivf_path):
+            ivf = np.load(self._ivf_path)
+            ivf_generation = int(ivf["generation"]) if "generation" in ivf else 0
+            if ivf_generation != generation:
+                # Partition of the rows of another vector file generation: trained again as rows are added
+                logger.warning("Semantic index IVF partition belongs to another vector file, discarding it")
+                return
+            self._centroids = ivf["centroids"]
+            self._assignments = ivf["assignments"][:self.count]
+            self._trained_rows = int(ivf["trained_rows"])
+            # Rows appended after the last save are assigned again
+            self._assign_new_rows()
+
+    def _remove_stale_generations(self, generation: int) -> None:
+        """Delete the vector files older than `generation`, left behind by a crash during a save."""
+        for previous in range(generation):
+            if os.path.exists(self._generation_path(previous)):
+                os.remove(self._generation_path(previous))
+
+    def _reserve(self, rows: int) -> None:
+        """Grow the vector file so it holds `rows` more rows."""
+        capacity = 0 if self._vectors is None else self._vectors.shape[0]
+        if self.count + rows <= capacity:
+            return
+        new_capacity = max(self.count + rows, capacity * 2, MIN_GROWTH_ROWS)
+        if self._vectors is not None:
+            self._vectors.flush()
+        self._vectors = None
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(new_capacity * self.dimensions * 4)
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(new_capacity, self.dimensions))
+
+    def _chunks(self, summary: Optional[str], text: str) -> List[tuple[int, str]]:
+        """Texts to embed for a document: its summary (chunk -1) and its OCR text chunks."""
+        chunks = [(-1, summary)] if summary and summary.strip() else []
+        if text.strip():
+            chunks.extend(enumerate(split_text(text, self.chunk_tokens)))
+        return chunks
+
+    async def add_document(self, doc_id: str, source_file: str, text: str, summary: Optional[str] = None) -> int:
+        """
+        Embed a document and add it, replacing its previous vectors.
+
+        Args:
+            doc_id: Id of the document (absolute path of its file)
+            source_file: File name shown in the results
+            text: OCR text
+            summary: Summary, None if it failed
+
+        Returns:
+            Number of vectors added
+        """
+        chunks = self._chunks(summary, text)
+        if not chunks:
+            return 0
+        vectors = await self.embedder.embed([chunk_text for _, chunk_text in chunks])
+        self.add_vectors(doc_id, source_file, vectors, [chunk for chunk, _ in chunks])
+        if self.needs_training():
+            # k-means over tens of thousands of rows takes seconds: keep it off the event loop
+            await asyncio.to_thread(self.train_ivf)
+        return len(chunks)
+
+    def add_vectors(self, doc_id: str, source_file: str, vectors: np.ndarray, chunks: List[int]) -> None:
+        """
+        Add the embedded chunks of a document, replacing its previous vectors.
+
+        Args:
+            doc_id: Id of the document
+            source_file: File name shown in the results
+            vectors: One embedding per chunk
+            chunks: Chunk number of every vector (-1 for the summary)
+
+        Raises:
+            ValueError: If the vectors don't have the dimensions of the index
+        """
+        vectors = _normalize_rows(np.asarray(vectors, dtype=np.float32))
+        with self._lock:
+            if self.dimensions is None:
+                self.dimensions = vectors.shape[1]
+            elif vectors.shape[1] != self.dimensions:
+                raise ValueError(f"Embedding has {vectors.shape[1]} dimensions, the index {self.dimensions}")
+
+            self._remove_unlocked(doc_id)
+            self._reserve(len(vectors))
+            rows = list(range(self.count, self.count + len(vectors)))
+            self._vectors[self.count:self.count + len(vectors)] = vectors
+            self._entries.extend([doc_id, source_file, chunk] for chunk in chunks)
+            self._doc_rows[doc_id] = rows
+            self.count += len(vectors)
+            self._assign_new_rows()
+            self._unsaved_documents += 1
+
+    def needs_training(self) -> bool:
+        """Whether the IVF partition should be (re)built: the live rows reached the minimum, or doubled since."""
+        return (
+            bool(self.ivf_min_vectors)
+            and not self._training
+            and self.count - self._dead_rows >= max(self.ivf_min_vectors, 2 * self._trained_rows)
+        )
+
+    def _remove_unlocked(self, doc_id: str) -> None:
+        for row in self._doc_rows.pop(doc_id, []):
+            self._entries[row] = None
+            self._dead_rows += 1
+
+    def remove(self, doc_id: str) -> None:
+        """
+        Remove a document from the index.
+
+        Args:
+            doc_id: Id of the document
+        """
+        with self._lock:
+            self._remove_unlocked(doc_id)
+
+    def _alive_rows(self) -> np.ndarray:
+        return np.fromiter((entry is not None for entry in self._entries), dtype=bool, count=self.count)
+
+    def _assign_new_rows(self) -> None:
+        """Assign the rows added since the last assignment to their nearest IVF partition."""
+        if self._centroids is None or len(self._assignments) >= self.count:
+            return
+        new_rows = self._vectors[len(self._assignments):self.count]
+        self._assignments = np.concatenate([self._assignments, _nearest_centroid(new_rows, self._centroids)])
+
+    def train_ivf(self, iterations: int = 10, sample_per_partition: int = 64) -> None:
+        """
+        Partition the rows with spherical k-means over a sample, with ~sqrt(rows) partitions.
+
+        Only the snapshot of the rows and the final swap hold the lock, so
+        documents keep being added (and searched) while it runs in a thread.
+        Rows added meanwhile are assigned at the swap; a compaction meanwhile
+        renumbers the rows, so that partition is dropped and trained again later.
+        """
+        with self._lock:
+            if self._vectors is None or self._training:
+                return
+            self._training = True
+            vectors, count, generation = self._vectors, self.count, self._generation
+            alive = np.flatnonzero(self._alive_rows())
+        try:
+            centroids = self._kmeans(vectors, alive, iterations, sample_per_partition)
+            assignments = _nearest_centroid(vectors[:count], centroids)
+        finally:
+            with self._lock:
+                self._training = False
+
+        with self._lock:
+            if self._generation != generation:
+                logger.info("Semantic index compacted while its IVF partition was built, building it again later")
+                return
+            self._centroids = centroids
+            self._assignments = assignments
+            self._trained_rows = len(alive)
+            self._assign_new_rows()
+        logger.info(f"Semantic index: {len(centroids)} IVF partitions built over {len(alive)} vectors")
+
+    @staticmethod
+    def _kmeans(vectors: np.ndarray, alive: np.ndarray, iterations: int, sample_per_partition: int) -> np.ndarray:
+        """Spherical k-means centroids of a sample of the alive rows."""
+        partitions = min(int(np.clip(np.sqrt(len(alive)), 16, 4096)), len(alive))
+        rng = np.random.default_rng(0)
+        sample_rows = rng.choice(alive, min(len(alive), partitions * sample_per_partition), replace=False)
+        sample = np.asarray(vectors[np.sort(sample_rows)])
+
+        centroids = sample[rng.choice(len(sample), partitions, replace=False)]
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            order = np.argsort(labels, kind="stable")
+            counts = np.bincount(labels, minlength=partitions)
+            empty = counts == 0
+            sums = np.zeros_like(centroids)
+            sums[~empty] = np.add.reduceat(sample[order], np.concatenate([[0], np.cumsum(counts)[:-1]])[~empty])
+            # Empty partitions restart from random sample rows
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]
+            centroids = _normalize_rows(sums)
+        return centroids.astype(np.float32)
+
+    def search_vector(self, query: np.ndarray, k: int = 10) -> List[Dict[str, Any]]:
+        """
+        Find the documents closest to an embedding.
+
+        Args:
+            query: Query embedding
+            k: Max documents returned
+
+        Returns:
+            Documents by decreasing cosine similarity of their best chunk: id,
+            file, score and best chunk (-1 for the summary)
+        """
+        query = _normalize_rows(np.asarray(query, dtype=np.float32).reshape(1, -1))[0]
+        with self._lock:
+            if not self.count or query.shape[0] != self.dimensions:
+                return []
+            if self._centroids is not None:
+                probes = np.argsort(self._centroids @ query)[-self.ivf_probes:]
+                rows = np.flatnonzero(np.isin(self._assignments[:self.count], probes))
+                scores = self._vectors[rows] @ query
+            else:
+                rows = None
+                scores = self._vectors[:self.count] @ query
+
+            # Several chunks of a document can rank high: take extra candidates
+            candidates = min(len(scores), k * 8)
+            if not candidates:
+                return []
+            top = np.argpartition(-scores, candidates - 1)[:candidates]
+            results: Dict[str, Dict[str, Any]] = {}
+            for index in top[np.argsort(-scores[top])]:
+                entry = self._entries[rows[index] if rows is not None else index]
+                if entry is None or entry[0] in results:
+                    continue
+                results[entry[0]] = {
+                    "doc_id": entry[0], "source_file": entry[1], "score": round(float(scores[index]), 4), "chunk": entry[2],
+                }
+                if len(results) == k:
+                    break
+        return list(results.values())
+
+    async def search(self, query: str, k: int = 10) -> List[Dict[str, Any]]:
+        """
+        Find the documents closest in meaning to a text.
+
+        Args:
+            query: Question or description
+            k: Max documents returned
+
+        Returns:
+            Matching documents (see `search_vector`)
+        """
+        vectors = await self.embedder.embed([query])
+        return self.search_vector(vectors[0], k)
+
+    def _compact(self) -> None:
+        """
+        Write the next generation of the vector file without the rows of removed and re-indexed documents.
+
+        The current file is left untouched, so the id map on disk keeps
+        describing it until `save` writes the map naming the new one.
+        """
+        alive = np.flatnonzero(self._alive_rows())
+        compacted_path = self._generation_path(self._generation + 1)
+        compacted = np.memmap(compacted_path, dtype=np.float32, mode="w+", shape=(max(len(alive), 1), self.dimensions))
+        for start in range(0, len(alive), 65536):
+            batch = alive[start:start + 65536]
+            compacted[start:start + len(batch)] = self._vectors[batch]
+        compacted.flush()
+        del compacted
+        self._vectors = None
+        self._generation += 1
+
+        if self._centroids is not None:
+            self._assignments = self._assignments[alive]
+        self._entries = [self._entries[row] for row in alive]
+        self.count = len(self._entries)
+        self._doc_rows = {}
+        self._dead_rows = 0
+        for row, entry in enumerate(self._entries):
+            self._doc_rows.setdefault(entry[0], []).append(row)
+        self._vectors = np.memmap(
+            self._vectors_path, dtype=np.float32, mode="r+", shape=(max(self.count, 1), self.dimensions)
+        )
+        logger.info(f"Semantic index compacted to {self.count} vectors")
+
+    def save(self) -> None:
+        """Flush the vectors and write the id map (and the IVF partition)."""
+        with self._lock:
+            if self._vectors is None:
+                return
+            generation = self._generation
+            if self._dead_rows > MAX_DEAD_RATIO * self.count:
+                self._compact()
+            self._vectors.flush()
+            if self._centroids is not None:
+                temp_file = os.path.join(self.directory, "ivf.tmp.npz")
+                np.savez(
+                    temp_file,
+                    centroids=self._centroids,
+                    assignments=self._assignments,
+                    trained_rows=self._trained_rows,
+                    generation=self._generation,
+                )
+                os.replace(temp_file, self._ivf_path)
+            # The id map is written last: rows it doesn't list yet are ignored, and overwritten, on the next load
+            temp_file = f"{self._ids_path}.tmp"
+            with open(temp_file, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "version": INDEX_VERSION,
+                        "model": self.embedder.name,
+                        "dimensions": self.dimensions,
+                        "generation": self._generation,
+                        "entries": self._entries,
+                    },
+                    f,
+                    ensure_ascii=False,
+                )
+            os.replace(temp_file, self._ids_path)
+            if self._generation != generation:
+                os.remove(self._generation_path(generation))
+            self._unsaved_documents = 0
+
+    def save_if_needed(self, every_documents: int) -> None:
+        """
+        Save after every `every_documents` added documents, so a crash loses few embeddings.
+
+        Args:
+            every_documents: Documents added between two saves
+        """
+        if self._unsaved_documents >= every_documents:
+            self.save()
+
+    def log_stats(self) -> None:
+        """Log the size of the index."""
+        partitions = f", {len(self._centroids)} IVF partitions" if self._centroids is not None else ""
+        logger.info(
+            f"Semantic index: {self.documents} documents, {self.count - self._dead_rows} vectors "
+            f"({self.dimensions or 0} dimensions, {self.embedder.name}){partitions}"
+        )
+
+
+async def _search_command(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    config = get_config()
+    client = OllamaClient(config.ollama_client)
+    try:
+        index = SemanticIndex(
+            args.index or config.semantic.index_path,
+            create_embedder(config.semantic, client),
+            ivf_probes=args.probes or config.semantic.ivf_probes,
+        )
+        return await index.search(args.query, args.k)
+    finally:
+        await client.close()
+
+
+def main() -> None:
+    """Query the semantic index from the command line."""
+    parser = argparse.ArgumentParser(description="Semantic search over the processed resolutions")
+    parser.add_argument("query", help="Question or description, e.g. 'regularizaciones dominiales en vecinal Sarmiento'")
+    parser.add_argument("-k", type=int, default=10, help="Documents returned")
+    parser.add_argument("--probes", type=int, help="IVF partitions scored (defaults to semantic.ivf_probes)")
+    parser.add_argument("--index", help="Index directory (defaults to semantic.index_path of the config)")
+    parser.add_argument("--json", action="store_true", help="Print the matches as JSON")
+    args = parser.parse_args()
+
+    matches = asyncio.run(_search_command(args))
+    if args.json:
+        print(json.dumps(matches, ensure_ascii=False, indent=2))
+        return
+    for match in matches:
+        where = "summary" if match["chunk"] < 0 else f"chunk {match['chunk'] + 1}"
+        print(f"{match['score']:.3f}  {match['source_file']} ({where})")
+
+
+if __name__ == "__main__":
+    main()
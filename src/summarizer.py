@@ -1,25 +1,186 @@
-import ollama
 import asyncio
+import hashlib
+import json
+from dataclasses import asdict
 from typing import Optional
 import logging
+import re
+from llm_scheduler import LLMScheduler
+from ollama_client import OllamaClient
+from utils.cache import ResultCache
+from utils.chunker import estimate_tokens, split_text
+from utils.metrics import MetricsRegistry
 
 logger = logging.getLogger(__name__)
 
+SUMMARY_PROMPT_TEMPLATE = """Haz un resumen de máximo {max_words} palabras de la siguiente resolución municipal. Incluye número de resolución, fecha, expediente, acción principal, detalles del inmueble, beneficiarios y precios.
+
+Texto de la resolución:
+{text}
+
+Resumen (máximo {max_words} palabras):"""
+
+# Start of the summary returned when the model request fails
+SUMMARY_ERROR_PREFIX = "Error generating summary"
+
+# Reasoning model artifacts removed from the generated text
+THINK_BLOCK_PATTERN = re.compile(r"<think>.*?</think>", re.DOTALL)
+THINKING_TRANSCRIPT_PATTERN = re.compile(r"Thinking.*?done thinking\.", re.DOTALL)
+THINK_OPEN_TAG = "<think>"
+THINK_CLOSE_TAG = "</think>"
+
+
+class StreamingSummaryFilter:
+    """
+    Incremental filter of a streamed summary.
+
+    Drops `<think>...</think>` segments as they arrive (tags split across
+    chunks included) and reports when generation can stop: the stop marker
+    appeared or the visible text exceeded the word budget.
+    """
+
+    def __init__(self, stop_marker: str, max_words: int):
+        """
+        Initialize the filter.
+
+        Args:
+            stop_marker: Marker ending the useful output (empty to disable)
+            max_words: Word budget of the visible text
+        """
+        self.stop_marker = stop_marker
+        self.max_words = max_words
+        self.stopped = False
+        self._in_think = False
+        self._pending = ""
+        self._parts: list[str] = []
+        self._word_count = 0
+        self._started_words = 0
+        self._in_word = False
+        self._markers = [marker for marker in (THINK_OPEN_TAG, stop_marker) if marker]
+
+    def _emit(self, text: str) -> None:
+        """Add visible text and stop once the word budget is exceeded."""
+        if not text:
+            return
+        self._parts.append(text)
+        # Count only the new text; a word cut at the end of the previous text continues here
+        self._started_words += len(text.split()) - (1 if self._in_word and not text[0].isspace() else 0)
+        self._in_word = not text[-1].isspace()
+        # Only count words that are complete (followed by whitespace)
+        self._word_count = self._started_words - (1 if self._in_word else 0)
+        if self._word_count >= self.max_words:
+            self.stopped = True
+
+    def _held_suffix_length(self, text: str, markers: list[str]) -> int:
+        """Length of the longest suffix of `text` that may be the start of a marker."""
+        for length in range(min(len(text), max(len(marker) for marker in markers) - 1), 0, -1):
+            if any(marker.startswith(text[-length:]) for marker in markers):
+                return length
+        return 0
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Process a streamed chunk.
+
+        Args:
+            chunk: Text of the chunk
+
+        Returns:
+            True once generation can stop
+        """
+        if self.stopped:
+            return True
+        self._pending += chunk
+
+        while self._pending and not self.stopped:
+            if self._in_think:
+                end = self._pending.find(THINK_CLOSE_TAG)
+                if end == -1:
+                    held = self._held_suffix_length(self._pending, [THINK_CLOSE_TAG])
+                    self._pending = self._pending[len(self._pending) - held:]
+                    break
+                self._pending = self._pending[end + len(THINK_CLOSE_TAG):]
+                self._in_think = False
+                continue
+
+            positions = {marker: self._pending.find(marker) for marker in self._markers}
+            found = {marker: position for marker, position in positions.items() if position != -1}
+            if not found:
+                held = self._held_suffix_length(self._pending, self._markers)
+                self._emit(self._pending[:len(self._pending) - held])
+                self._pending = self._pending[len(self._pending) - held:]
+                break
+
+            marker = min(found, key=found.get)
+            self._emit(self._pending[:found[marker]])
+            self._pending = self._pending[found[marker] + len(marker):]
+            if marker == THINK_OPEN_TAG:
+                self._in_think = True
+            else:
+                self.stopped = True
+
+        return self.stopped
+
+    @property
+    def text(self) -> str:
+        """Visible text received so far (a held back partial marker is included once the stream ended)."""
+        tail = "" if self._in_think or self.stopped else self._pending
+        return "".join(self._parts) + tail
+
+
+# Map step of long documents: one request per chunk
+CHUNK_SUMMARY_PROMPT_TEMPLATE = """El siguiente texto es la parte {index} de {total} de una resolución municipal. Resume esta parte en máximo {max_words} palabras. Conserva textualmente número de resolución, fechas, expediente, datos del inmueble, beneficiarios, DNI y precios que aparezcan.
+
+Texto de la parte {index}:
+{text}
+
+Resumen de la parte {index} (máximo {max_words} palabras):"""
+
+# Reduce step of long documents: combines the summaries of the parts
+REDUCE_PROMPT_TEMPLATE = """Los siguientes son resúmenes de las partes consecutivas de una misma resolución municipal. Combínalos en un único resumen de máximo {max_words} palabras, sin repetir información. Incluye número de resolución, fecha, expediente, acción principal, detalles del inmueble, beneficiarios y precios.
+
+Resúmenes de las partes:
+{text}
+
+Resumen (máximo {max_words} palabras):"""
+
 class Summarizer:
     """
     Handles text summarization using Ollama models.
     Follows Single Responsibility Principle by focusing only on summarization tasks.
     """
 
-    def __init__(self, model_config):
+    def __init__(
+        self,
+        model_config,
+        summary_cache: Optional[ResultCache] = None,
+        bypass_cache: bool = False,
+        scheduler: Optional[LLMScheduler] = None,
+        client: Optional[OllamaClient] = None,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
         """
         Initialize the Summarizer with model configuration.
 
         Args:
             model_config: Configuration object containing model settings
+            summary_cache: Persistent cache of generated summaries (optional)
+            bypass_cache: Skip cache lookups and always call the model; fresh
+                summaries are still stored
+            scheduler: Scheduler limiting in-flight Ollama requests. Defaults
+                to a scheduler with the built-in settings.
+            client: Shared Ollama client. Defaults to a client with the
+                built-in settings.
+            metrics: Run metrics receiving the prompt build timings. Defaults
+                to the client's registry.
         """
         self.model_config = model_config
-        self.client = ollama.AsyncClient()
+        self.client = client or OllamaClient()
+        self.metrics = metrics or self.client.metrics
+        self.scheduler = scheduler or LLMScheduler()
+        self.summary_cache = summary_cache
+        self.bypass_cache = bypass_cache
+        self._model_digest: Optional[str] = None
         
     # def _validate_setup_ollama(self) -> None:
     #     # Validate and setup Ollama model
@@ -43,66 +204,276 @@ class Summarizer:
     #     except Exception as e:
     #         logger.warning(f"Could not validate Ollama models: {e}")
             
-    async def _summarize_with_ollama(self, text: str) -> str:
+    async def _get_model_digest(self) -> str:
         """
-        Generate summary using Ollama model.
+        Get the digest of the configured model, so a rebuilt model invalidates cached summaries.
+
+        Returns:
+            Model digest, or "unknown" if Ollama can't be queried
+        """
+        if self._model_digest is None:
+            try:
+                response = await self.client.list()
+                names = {self.model_config.model, f"{self.model_config.model}:latest"}
+                self._model_digest = next(
+                    (model.digest for model in response.models if model.model in names), "unknown"
+                )
+            except Exception as e:
+                logger.warning(f"Could not read the digest of model '{self.model_config.model}': {e}")
+                self._model_digest = "unknown"
+        return self._model_digest
+
+    async def _summary_cache_key(self, text: str, profile_version: Optional[str] = None) -> str:
+        """
+        Build the summary cache key from everything that changes the generated summary.
 
         Args:
             text: Text to summarize
+            profile_version: Version of the boilerplate profile the text was stripped with
 
         Returns:
-            Summary text
+            Hex digest identifying the summary
         """
-        prompt = f"""Haz un resumen de máximo 200 palabras de la siguiente resolución municipal. Incluye número de resolución, fecha, expediente, acción principal, detalles del inmueble, beneficiarios y precios.
+        key_data = json.dumps(
+            {
+                "text": text,
+                "prompt_template": SUMMARY_PROMPT_TEMPLATE,
+                "chunk_prompt_template": CHUNK_SUMMARY_PROMPT_TEMPLATE,
+                "reduce_prompt_template": REDUCE_PROMPT_TEMPLATE,
+                "model_config": asdict(self.model_config),
+                "model_digest": await self._get_model_digest(),
+                "boilerplate_profile": profile_version,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(key_data.encode("utf-8")).hexdigest()
 
-Texto de la resolución:
-{text}
+    async def _summarize_with_ollama(self, text: str, profile_version: Optional[str] = None) -> str:
+        """
+        Generate summary using Ollama model, reusing cached summaries of identical requests.
 
-Resumen (máximo 200 palabras):"""
+        Args:
+            text: Text to summarize
+            profile_version: Version of the boilerplate profile the text was stripped with
 
+        Returns:
+            Summary text
+        """
+        cache_key = None
         try:
-            response = await self.client.generate(
-                model=self.model_config.model,
-                prompt=prompt,
-                format=self.model_config.format,
-                options={
-                    "temperature": self.model_config.temperature,
-                    "top_k": self.model_config.top_k,
-                    "top_p": self.model_config.top_p,
-                },
-            )
-            extracted_data: str = response['response']
+            if self.summary_cache is not None:
+                cache_key = await self._summary_cache_key(text, profile_version)
+                if not self.bypass_cache:
+                    cached_summary = self.summary_cache.get(cache_key)
+                    if cached_summary is not None:
+                        logger.info("Summary cache hit")
+                        return cached_summary["summary"]
+
+            extracted_data = await self._summarize_text(text)
 
-            # Clean up reasoning model artifacts
-            if "thinking" in extracted_data.lower():
-                import re
-                extracted_data = re.sub(r"<think>.*?</think>", "", extracted_data, flags=re.DOTALL).strip()
-                extracted_data = re.sub(r"Thinking.*?done thinking\.", "", extracted_data, flags=re.DOTALL).strip()
-    
+            if cache_key is not None:
+                self.summary_cache.put(cache_key, {"summary": extracted_data}, source_bytes=len(text.encode("utf-8")))
             return extracted_data
-        
+
         except Exception as e:
             logger.error(f"Error generating summary: {e}")
-            return f"Error generating summary: {str(e)}"
+            return f"{SUMMARY_ERROR_PREFIX}: {str(e)}"
+
+    async def _summarize_text(self, text: str) -> str:
+        """
+        Summarize a text in one request, or map-reduce it if it exceeds the chunk token budget.
+
+        Long texts are split on page and paragraph boundaries, every chunk is
+        summarized concurrently (the scheduler bounds the in-flight requests)
+        and the partial summaries are combined by a final reduce request, so
+        no part of the text is cut by the model's context window.
+
+        Args:
+            text: Text to summarize
+
+        Returns:
+            Summary text
+
+        Raises:
+            Exception: If an Ollama request still fails after the scheduler retries
+        """
+        max_words = self.model_config.summary_max_words
+        with self.metrics.span("prompt_build"):
+            chunks = split_text(text, self.model_config.chunk_max_tokens, self.model_config.chars_per_token)
+            if len(chunks) == 1:
+                prompts = [SUMMARY_PROMPT_TEMPLATE.format(text=text, max_words=max_words)]
+            else:
+                prompts = [
+                    CHUNK_SUMMARY_PROMPT_TEMPLATE.format(text=chunk, index=index, total=len(chunks), max_words=max_words)
+                    for index, chunk in enumerate(chunks, start=1)
+                ]
+        if len(prompts) == 1:
+            return await self._generate_summary(prompts[0])
+
+        logger.info(f"Long document (~{estimate_tokens(text, self.model_config.chars_per_token)} tokens): summarizing {len(chunks)} chunks")
+        partial_summaries = await asyncio.gather(*[self._generate_summary(prompt) for prompt in prompts])
+        return await self._reduce_summaries(list(partial_summaries))
+
+    async def _reduce_summaries(self, partial_summaries: list[str]) -> str:
+        """
+        Combine the summaries of consecutive parts of a document into one summary.
+
+        Every partial summary is first cut to `summary_max_words` words. If they
+        together still exceed the chunk token budget, they are combined in
+        groups, level by level, until they fit. When a part alone does not fit
+        in a group, they are combined in consecutive pairs instead, each part
+        cut to half the budget, so no reduce prompt exceeds it.
+
+        Args:
+            partial_summaries: Summaries of the parts, in document order
+
+        Returns:
+            Summary of at most `summary_max_words` words
+        """
+        max_words = self.model_config.summary_max_words
+        partial_summaries = [self._limit_words(summary, max_words) for summary in partial_summaries]
+        if len(partial_summaries) == 1:
+            return partial_summaries[0]
+
+        combined = "\n\n".join(f"Parte {index}:\n{summary}" for index, summary in enumerate(partial_summaries, start=1))
+        groups = split_text(combined, self.model_config.chunk_max_tokens, self.model_config.chars_per_token)
+
+        if len(groups) > 1:
+            if len(groups) >= len(partial_summaries):
+                # Words of half the budget, at the average word length of the summaries
+                budget_chars = self.model_config.chunk_max_tokens * self.model_config.chars_per_token
+                half_budget_words = max(1, int(len(combined.split()) * budget_chars / len(combined)) // 2)
+                pairs = [partial_summaries[index:index + 2] for index in range(0, len(partial_summaries), 2)]
+                groups = [
+                    "\n\n".join(
+                        f"Parte {index}:\n{self._limit_words(summary, half_budget_words)}"
+                        for index, summary in enumerate(pair, start=1)
+                    )
+                    for pair in pairs
+                ]
+            group_summaries = await asyncio.gather(
+                *[self._generate_summary(REDUCE_PROMPT_TEMPLATE.format(text=group, max_words=max_words)) for group in groups]
+            )
+            return await self._reduce_summaries(list(group_summaries))
+
+        summary = await self._generate_summary(REDUCE_PROMPT_TEMPLATE.format(text=combined, max_words=max_words))
+        return self._limit_words(summary, max_words)
+
+    @staticmethod
+    def _limit_words(summary: str, max_words: int) -> str:
+        """
+        Cut a summary to `max_words` words, at the last complete sentence if that keeps most of the text.
+
+        Args:
+            summary: Summary text
+            max_words: Word limit
 
-    async def generate_summary_async(self, text: str):
+        Returns:
+            Summary of at most `max_words` words
+        """
+        words = summary.split()
+        if len(words) <= max_words:
+            return summary
+
+        truncated = " ".join(words[:max_words])
+        sentence_end = truncated.rfind(".")
+        return truncated[:sentence_end + 1] if sentence_end > len(truncated) // 2 else truncated
+
+    async def _generate_summary(self, prompt: str) -> str:
+        """
+        Call the Ollama model with a summary prompt.
+
+        Args:
+            prompt: Complete prompt
+
+        Returns:
+            Summary text
+
+        Raises:
+            Exception: If the Ollama request still fails after the scheduler retries
+        """
+        if self.model_config.stream:
+            extracted_data = await self.scheduler.run(lambda: self._stream_summary(prompt), description="Summary stream")
+        else:
+            response = await self.scheduler.run(
+                lambda: self.client.generate(
+                    model=self.model_config.model,
+                    prompt=prompt,
+                    format=self.model_config.format,
+                    options=self._generation_options(),
+                ),
+                description="Summary request",
+            )
+            extracted_data: str = response['response']
+
+        # Clean up reasoning model artifacts
+        if "think" in extracted_data.lower():
+            extracted_data = THINK_BLOCK_PATTERN.sub("", extracted_data).strip()
+            extracted_data = THINKING_TRANSCRIPT_PATTERN.sub("", extracted_data).strip()
+
+        return extracted_data
+
+    def _generation_options(self) -> dict:
+        """Ollama sampling options from the model configuration."""
+        return {
+            "temperature": self.model_config.temperature,
+            "top_k": self.model_config.top_k,
+            "top_p": self.model_config.top_p,
+        }
+
+    async def _stream_summary(self, prompt: str) -> str:
+        """
+        Stream a summary, stopping generation as soon as the rest would be thrown away.
+
+        Think segments are dropped as they arrive; the stream is closed (which
+        stops decoding in Ollama) once the stop marker appears or the summary
+        reaches `summary_max_words` words.
+
+        Args:
+            prompt: Complete prompt
+
+        Returns:
+            Summary text of at most `summary_max_words` words
+        """
+        summary_filter = StreamingSummaryFilter(self.model_config.stop_marker, self.model_config.summary_max_words)
+        stream = self.client.generate_stream(
+            model=self.model_config.model,
+            prompt=prompt,
+            format=self.model_config.format,
+            options=self._generation_options(),
+        )
+        try:
+            async for chunk in stream:
+                if summary_filter.feed(chunk.response):
+                    break
+        finally:
+            await stream.aclose()
+
+        return self._limit_words(summary_filter.text.strip(), self.model_config.summary_max_words)
+
+    async def generate_summary_async(self, text: str, profile_version: Optional[str] = None):
         """
         Generate summary asynchronously.
 
         Args:
             text: Text to summarize
+            profile_version: Version of the boilerplate profile the text was
+                stripped with (see `BoilerplateStripper.profile_version`)
 
         Returns:
             Summary text
         """
         if not text or not text.strip():
             return "No text available for summarization"
-        return await self._summarize_with_ollama(text)
+        return await self._summarize_with_ollama(text, profile_version)
 
     async def generate_multiple_summaries(self, texts: list[str]) -> list[str]:
         """
         Generate summaries for multiple texts concurrently.
 
+        The scheduler bounds how many requests actually reach Ollama at once.
+
         Args:
             texts: List of texts to summarize
 
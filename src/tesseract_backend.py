@@ -0,0 +1,180 @@
+"""
+Tesseract backends: pytesseract (a `tesseract` process per image) and tesserocr
+(warm engines kept in memory through the Tesseract C API).
+"""
+
+import logging
+import threading
+from typing import Dict, Tuple
+
+import numpy as np
+import pytesseract
+
+from utils.config import OCRConfig
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+logger = logging.getLogger(__name__)
+
+OCR_BACKENDS = ["pytesseract", "tesserocr"]
+
+# Engines of the current thread, by (tessdata_path, lang, psm, oem). Module level,
+# so they outlive the OCR instances (process workers build one per task).
+_engines = threading.local()
+
+
+class PytesseractBackend:
+    """
+    Runs the `tesseract` command on every image through pytesseract.
+
+    Every call writes the image to a temporary file, starts a new process that
+    loads the language data again, and parses its TSV output.
+    """
+
+    def __init__(self, ocr_config: OCRConfig):
+        """
+        Initialize the backend.
+
+        Args:
+            ocr_config: OCR configuration (lang, psm, oem, tessdata_path)
+        """
+        self.lang = ocr_config.lang
+        self.tesseract_config = f"--psm {ocr_config.psm} --oem {ocr_config.oem}"
+        if ocr_config.tessdata_path:
+            self.tesseract_config += f' --tessdata-dir "{ocr_config.tessdata_path}"'
+
+    def version(self) -> str:
+        """Version of the Tesseract binary."""
+        return str(pytesseract.get_tesseract_version())
+
+    def recognize(self, img: np.ndarray) -> Tuple[str, list[int]]:
+        """
+        OCR an image.
+
+        Args:
+            img: Grayscale image as a 2-D uint8 array
+
+        Returns:
+            Tuple of (extracted_text, confidence_scores)
+        """
+        # Get OCR data with confidence scores
+        ocr_data = pytesseract.image_to_data(
+            img, lang=self.lang, config=self.tesseract_config, output_type=pytesseract.Output.DICT
+        )
+
+        # Extract text and confidence scores
+        words = []
+        confidences = []
+
+        for i in range(len(ocr_data['text'])):
+            conf = int(float(ocr_data['conf'][i]))
+            if conf > 0:  # Only include text with confidence > 0
+                word = ocr_data['text'][i].strip()
+                if word:
+                    words.append(word)
+                    confidences.append(conf)
+
+        return " ".join(words), confidences
+
+
+class TesserocrBackend:
+    """
+    Feeds in-memory images to Tesseract engines that stay loaded.
+
+    Each thread (worker threads of the "thread" engine, the single thread of
+    every worker process of the "process" engine) initializes its own
+    `PyTessBaseAPI` once, with the language data loaded, and reuses it for
+    every page. tesserocr releases the GIL while recognizing, so threads OCR
+    in parallel.
+    """
+
+    def __init__(self, ocr_config: OCRConfig):
+        """
+        Initialize the backend. Engines are created on first use in each thread.
+
+        Args:
+            ocr_config: OCR configuration (lang, psm, oem, tessdata_path)
+
+        Raises:
+            ImportError: If tesserocr is not installed
+        """
+        if tesserocr is None:
+            raise ImportError('The "tesserocr" OCR backend needs the tesserocr package: pip install tesserocr')
+        self.engine_key = (ocr_config.tessdata_path, ocr_config.lang, ocr_config.psm, ocr_config.oem)
+
+    def version(self) -> str:
+        """Version of the Tesseract library."""
+        return tesserocr.tesseract_version().split()[1]
+
+    def _engine(self) -> "tesserocr.PyTessBaseAPI":
+        """Get the engine of the current thread, initializing it on first use."""
+        engines: Dict[tuple, tesserocr.PyTessBaseAPI] = getattr(_engines, "by_key", None)
+        if engines is None:
+            engines = _engines.by_key = {}
+
+        engine = engines.get(self.engine_key)
+        if engine is None:
+            tessdata_path, lang, psm, oem = self.engine_key
+            kwargs = {"path": tessdata_path} if tessdata_path else {}
+            engine = tesserocr.PyTessBaseAPI(lang=lang, psm=psm, oem=oem, **kwargs)
+            engines[self.engine_key] = engine
+            logger.debug(f"Initialized Tesseract engine for lang '{lang}' in thread {threading.current_thread().name}")
+        return engine
+
+    def recognize(self, img: np.ndarray) -> Tuple[str, list[int]]:
+        """
+        OCR an image.
+
+        Args:
+            img: Grayscale image as a 2-D uint8 array
+
+        Returns:
+            Tuple of (extracted_text, confidence_scores)
+        """
+        img = np.ascontiguousarray(img)
+        height, width = img.shape
+        engine = self._engine()
+        words = []
+        confidences = []
+
+        try:
+            engine.SetImageBytes(img.tobytes(), width, height, 1, width)
+            engine.Recognize()
+            iterator = engine.GetIterator()
+            if iterator is not None:
+                level = tesserocr.RIL.WORD
+                for word_iterator in tesserocr.iterate_level(iterator, level):
+                    conf = int(word_iterator.Confidence(level))
+                    word = (word_iterator.GetUTF8Text(level) or "").strip()
+                    if conf > 0 and word:  # Only include text with confidence > 0
+                        words.append(word)
+                        confidences.append(conf)
+        finally:
+            # Drop the image and the recognition results, keep the loaded model
+            engine.Clear()
+
+        return " ".join(words), confidences
+
+
+def create_backend(ocr_config: OCRConfig) -> PytesseractBackend | TesserocrBackend:
+    """
+    Build the Tesseract backend selected in the configuration.
+
+    Args:
+        ocr_config: OCR configuration
+
+    Returns:
+        Backend instance
+
+    Raises:
+        ValueError: If the backend name is unknown
+        ImportError: If the backend's package is not installed
+    """
+    if ocr_config.backend == "pytesseract":
+        return PytesseractBackend(ocr_config)
+    if ocr_config.backend == "tesserocr":
+        return TesserocrBackend(ocr_config)
+    raise ValueError(f"Unknown OCR backend '{ocr_config.backend}'. Available: {OCR_BACKENDS}")
@@ -9,17 +9,24 @@ from typing import Dict, List, Literal, TypeAlias, Any
 
 # OCR-related types
 OCRExtractionResult: TypeAlias = Dict[
-    Literal["method", "file_name", "text", "page_count", "confidence"],
-    str | int | float
+    Literal["method", "file_name", "file_path", "text", "page_count", "confidence", "timings", "pages", "peak_rss_mb"],
+    str | int | float | List[Dict[str, Any]]
+]
+
+# Per-page OCR output, before it is merged into an OCRExtractionResult
+OCRPageResult: TypeAlias = Dict[
+    Literal["page_number", "method", "text", "confidences", "zoom", "profile", "timings"],
+    str | int | float | List[int] | Dict[str, float] | None
 ]
 
 # Processing result types
 ProcessingResult: TypeAlias = Dict[
     Literal[
         "source_file", "error", "summary", "ocr_confidence",
-        "processed_at", "processing_time_seconds"
+        "processed_at", "processing_time_seconds", "boilerplate_tokens_saved",
+        "fields", "summary_method", "duplicate_of", "peak_rss_mb"
     ],
-    str | float | None
+    str | float | Dict[str, Any] | None
 ]
 
 # Dataset processing types
@@ -0,0 +1,179 @@
+"""
+Persistent result cache backed by SQLite.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """
+    Content-addressed cache of JSON-serializable results stored in a single SQLite file.
+
+    Entries are evicted least-recently-used first once the stored values exceed
+    `max_size_mb`, and expire `ttl_seconds` after they were stored if a TTL is
+    set. The cache is safe to share between threads.
+    """
+
+    def __init__(self, db_path: str, max_size_mb: float, name: str = "cache", ttl_seconds: Optional[float] = None):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            db_path: Path to the SQLite file
+            max_size_mb: Max total size of the stored values, in megabytes
+            name: Name used in log messages
+            ttl_seconds: Lifetime of an entry; None keeps entries until evicted
+        """
+        self.db_path = db_path
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.ttl_seconds = ttl_seconds
+        self.name = name
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._bytes_saved = 0
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                source_bytes INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed_at ON entries (accessed_at)")
+        self._connection.commit()
+        self._size_bytes = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached value and mark it as recently used.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value, or None on a miss
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, source_bytes, size, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._misses += 1
+                return None
+
+            now = time.time()
+            if self.ttl_seconds is not None and now - row[3] > self.ttl_seconds:
+                self._connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._connection.commit()
+                self._size_bytes -= row[2]
+                self._misses += 1
+                return None
+
+            self._connection.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self._connection.commit()
+            self._hits += 1
+            self._bytes_saved += row[1]
+            return json.loads(row[0])
+
+    def put(self, key: str, value: Dict[str, Any], source_bytes: int = 0) -> None:
+        """
+        Store a value, evicting the least recently used entries if the cache is full.
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+            source_bytes: Size of the input the value was computed from, counted
+                as saved bytes every time the entry is hit
+        """
+        data = json.dumps(value, ensure_ascii=False)
+        size = len(data.encode("utf-8"))
+        if size > self.max_size_bytes:
+            logger.warning(f"{self.name}: entry of {size} bytes exceeds the cache size, not cached")
+            return
+
+        now = time.time()
+        with self._lock:
+            previous = self._connection.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, source_bytes, created_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, data, size, source_bytes, now, now),
+            )
+            self._size_bytes += size - (previous[0] if previous else 0)
+            self._evict()
+            self._connection.commit()
+
+    def _evict(self) -> None:
+        """Delete expired entries, then least recently used ones until the cache fits in `max_size_bytes`. Caller holds the lock."""
+        if self.ttl_seconds is not None:
+            cutoff = time.time() - self.ttl_seconds
+            expired_size = self._connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM entries WHERE created_at < ?", (cutoff,)
+            ).fetchone()[0]
+            if expired_size:
+                self._connection.execute("DELETE FROM entries WHERE created_at < ?", (cutoff,))
+                self._size_bytes -= expired_size
+
+        while self._size_bytes > self.max_size_bytes:
+            rows = self._connection.execute(
+                "SELECT key, size FROM entries ORDER BY accessed_at LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self._size_bytes = 0
+                return
+            for key, size in rows:
+                if self._size_bytes <= self.max_size_bytes:
+                    break
+                self._connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._size_bytes -= size
+
+    def stats(self) -> Dict[str, int | float]:
+        """
+        Get cache statistics for the current run.
+
+        Returns:
+            Dictionary with hits, misses, hit rate, bytes saved, entries and stored size
+        """
+        with self._lock:
+            entries = self._connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "bytes_saved": self._bytes_saved,
+                "entries": entries,
+                "size_bytes": self._size_bytes,
+            }
+
+    def log_stats(self) -> None:
+        """Log the cache statistics of the current run."""
+        stats = self.stats()
+        logger.info(
+            f"{self.name}: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%} hit rate), {stats['bytes_saved'] / 1024 / 1024:.1f} MB saved, "
+            f"{stats['entries']} entries ({stats['size_bytes'] / 1024 / 1024:.1f} MB)"
+        )
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
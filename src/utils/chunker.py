@@ -0,0 +1,110 @@
+"""
+Token-budgeted text chunking on page and paragraph boundaries.
+"""
+import re
+from typing import List
+
+# "Page N:" headers written by the OCR extractor at the start of every page
+PAGE_HEADER_PATTERN = re.compile(r"^Page \d+:\n", re.MULTILINE)
+PARAGRAPH_SEPARATOR_PATTERN = re.compile(r"\n\s*\n")
+
+
+def estimate_tokens(text: str, chars_per_token: float = 4.0) -> int:
+    """
+    Estimate the number of tokens of a text from its length.
+
+    Args:
+        text: Text to measure
+        chars_per_token: Average characters per token of the model's tokenizer
+
+    Returns:
+        Estimated token count
+    """
+    return int(len(text) / chars_per_token) + 1
+
+
+def _split_pages(text: str) -> List[str]:
+    """Split OCR text into its "Page N:" blocks (text before the first header is kept as a block)."""
+    starts = [match.start() for match in PAGE_HEADER_PATTERN.finditer(text)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    blocks = [text[start:end].strip() for start, end in zip(starts, starts[1:] + [len(text)])]
+    return [block for block in blocks if block]
+
+
+def _split_oversized(block: str, max_chars: int) -> List[str]:
+    """
+    Split a block longer than `max_chars` on paragraphs, then lines, then words.
+
+    Args:
+        block: Text block to split
+        max_chars: Max characters per piece
+
+    Returns:
+        Pieces of at most `max_chars` characters (a single word longer than
+        that is kept whole), which together hold all the text of the block
+    """
+    for separator_pattern, joiner in ((PARAGRAPH_SEPARATOR_PATTERN, "\n\n"), (re.compile(r"\n"), "\n"), (re.compile(r"\s+"), " ")):
+        parts = [part for part in separator_pattern.split(block) if part.strip()]
+        if len(parts) > 1:
+            break
+    else:
+        return [block]
+
+    pieces = []
+    for part in _pack(parts, max_chars, joiner):
+        if len(part) > max_chars:
+            pieces.extend(_split_oversized(part, max_chars))
+        else:
+            pieces.append(part)
+    return pieces
+
+
+def _pack(parts: List[str], max_chars: int, joiner: str) -> List[str]:
+    """Greedily join consecutive parts into pieces of at most `max_chars` characters."""
+    pieces = []
+    current = ""
+    for part in parts:
+        candidate = f"{current}{joiner}{part}" if current else part
+        if current and len(candidate) > max_chars:
+            pieces.append(current)
+            current = part
+        else:
+            current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_text(text: str, max_tokens: int, chars_per_token: float = 4.0) -> List[str]:
+    """
+    Split OCR text into chunks that fit a token budget, without dropping any text.
+
+    Whole pages are packed together while they fit; a page larger than the
+    budget is split on paragraph boundaries (then lines, then words) and every
+    piece keeps the page's "Page N:" header.
+
+    Args:
+        text: OCR text, with "Page N:" headers
+        max_tokens: Token budget per chunk
+        chars_per_token: Average characters per token of the model's tokenizer
+
+    Returns:
+        Chunks in document order (a single chunk if the whole text fits)
+    """
+    max_chars = max(1, int(max_tokens * chars_per_token))
+    if len(text) <= max_chars:
+        return [text]
+
+    blocks = []
+    for page in _split_pages(text):
+        if len(page) <= max_chars:
+            blocks.append(page)
+            continue
+
+        header_match = PAGE_HEADER_PATTERN.match(page)
+        header = header_match.group(0) if header_match else ""
+        body = page[len(header):]
+        blocks.extend(f"{header}{piece}" for piece in _split_oversized(body, max_chars - len(header)))
+
+    return _pack(blocks, max_chars, "\n\n")
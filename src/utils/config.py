@@ -3,9 +3,10 @@ Configuration loader for PDF Data Extraction
 """
 import yaml
 import os
+import sys
 from pathlib import Path
 from typing import Optional, List
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 @dataclass
 class FileProcessingConfig:
@@ -15,6 +16,84 @@ class FileProcessingConfig:
     max_concurrent_tasks: int
     ocr_method: str
     test_limit: Optional[int]
+    preserve_order: bool = True
+    results_log_file: str = "dataset.jsonl"  # One record appended per finished document
+
+@dataclass
+class OCRConfig:
+    engine: str = "thread"  # "thread": one document per thread, "process": pages spread over a process pool
+    zoom_factor: float = 2.0
+    lang: str = "eng"  # Tesseract language(s), e.g. "spa" or "spa+eng"
+    backend: str = "pytesseract"  # "pytesseract" (a tesseract process per page) or "tesserocr" (warm in-process engines)
+    psm: int = 3  # Tesseract page segmentation mode
+    oem: int = 3  # Tesseract OCR engine mode
+    tessdata_path: Optional[str] = None  # None uses Tesseract's default tessdata directory
+    process_workers: Optional[int] = None  # None uses os.cpu_count()
+    pages_per_task: int = 2
+    text_layer: bool = True  # Use the embedded PDF text on pages that have a good one
+    text_layer_min_chars: int = 50
+    text_layer_min_glyph_ratio: float = 0.9
+    text_layer_max_image_coverage: float = 0.8
+    adaptive_zoom: bool = False  # OCR at the lowest of zoom_levels first, re-render low-confidence pages higher
+    zoom_levels: List[float] = field(default_factory=lambda: [1.5, 2.0, 3.0])
+    adaptive_min_confidence: float = 0.8  # Page confidence (0-1) accepted without re-rendering or re-preprocessing
+    preprocessing: str = "nlm"  # "none", "binarize", "median_otsu", "nlm" or "auto" (chosen per page from its noise)
+    noise_sigma_low: float = 1.5  # "auto": pages with less estimated noise are only binarized
+    noise_sigma_high: float = 5.0  # "auto": pages with less estimated noise get a median blur, noisier ones NLM
+    skip_blank_pages: bool = True
+    blank_page_max_ink_ratio: float = 0.0001  # Pages with at most this share of dark pixels are blank
+
+@dataclass
+class CacheConfig:
+    ocr_enabled: bool = True
+    ocr_path: str = ".cache/ocr_cache.sqlite3"
+    ocr_max_size_mb: float = 512
+    summary_enabled: bool = True
+    summary_path: str = ".cache/summary_cache.sqlite3"
+    summary_max_size_mb: float = 64
+    summary_ttl_hours: Optional[float] = 720  # None keeps summaries until evicted by size
+    summary_bypass: bool = False  # Always call the model, but still store the fresh summaries
+
+@dataclass
+class DedupConfig:
+    enabled: bool = True
+    index_path: str = ".cache/dedup_index.sqlite3"
+    max_hamming_distance: int = 5  # Max differing SimHash bits (of 64) between near-duplicates
+    lsh_bands: int = 4  # SimHash bands indexed for lookup (neighbouring band values are probed too)
+    shingle_size: int = 3  # Words per SimHash shingle
+    min_text_chars: int = 200  # Shorter texts only match identical files
+
+@dataclass
+class SearchConfig:
+    enabled: bool = True
+    index_path: str = ".cache/search_index.sqlite3"
+    summary_weight: float = 2.0  # BM25 weight of summary matches relative to OCR text matches
+
+@dataclass
+class SemanticConfig:
+    enabled: bool = False  # Needs the embedding model pulled in Ollama (`ollama pull nomic-embed-text`)
+    index_path: str = ".cache/semantic_index"
+    embedder: str = "ollama"  # "ollama", or "hashing" (deterministic bag of words, offline, for tests)
+    model: str = "nomic-embed-text"
+    batch_size: int = 32  # Texts per embed request
+    chunk_tokens: int = 512  # Token budget of every embedded OCR text chunk
+    hashing_dimensions: int = 256
+    ivf_min_vectors: int = 50000  # Vectors from which queries only scan the nearest partitions, 0 to always scan all
+    ivf_probes: int = 8  # Partitions scanned per query
+    save_every_documents: int = 50  # Documents embedded between two saves of the id map
+
+@dataclass
+class BoilerplateConfig:
+    enabled: bool = True
+    learn: bool = True  # Update the profile with every extracted document (used from the next run on)
+    freeze_after_documents: int = 500  # Stop learning once the profile holds this many documents (0: never)
+    profile_path: str = ".cache/boilerplate_profile.json"
+    min_documents: int = 20  # Don't strip anything before the profile holds this many documents
+    df_threshold: float = 0.3  # Lines found in at least this fraction of the documents are boilerplate
+    shingle_size: int = 5  # Words per shingle, for near-duplicate lines with OCR noise
+    shingle_line_ratio: float = 0.8  # Fraction of frequent shingles that makes a line boilerplate
+    min_line_chars: int = 12  # Shorter lines are never removed
+    max_profile_entries: int = 200000
 
 @dataclass
 class OllamaConfig:
@@ -23,10 +102,64 @@ class OllamaConfig:
     top_k: int
     top_p: float
     format: str
+    chunk_max_tokens: int = 3000  # Longer texts are summarized per chunk, then the partial summaries are combined
+    chars_per_token: float = 4.0  # Used to estimate token counts from text length
+    summary_max_words: int = 200
+    stream: bool = False  # Stream responses and stop generating at stop_marker or summary_max_words
+    stop_marker: str = "<|end-output|>"
+
+@dataclass
+class OllamaClientConfig:
+    host: Optional[str] = None  # None uses OLLAMA_HOST or http://localhost:11434
+    timeout_seconds: float = 300.0
+    connect_timeout_seconds: float = 10.0
+    max_connections: int = 16
+    max_keepalive_connections: int = 8
+    keepalive_expiry_seconds: float = 120.0  # Idle HTTP connections are closed after this
+    keep_alive: str = "30m"  # How long Ollama keeps the model loaded after each request
+    warm_up: bool = True  # Load the model before the first document is summarized
+    cold_load_threshold_seconds: float = 1.0  # Load times above this count as model reloads
+
+@dataclass
+class OutputConfig:
+    buffer_records: int = 32  # Records buffered before they are appended to the results log
+    flush_interval_seconds: float = 1.0  # Max time a finished record waits in the buffer
+    fsync_interval_seconds: float = 5.0  # Min time between two fsyncs of the results log
+    export_json: bool = True  # Export the results log to output_file (JSON array) at the end
 
-# @dataclass
-# class ExtractionConfig:
-#     required_fields: List[str]
+@dataclass
+class MetricsConfig:
+    enabled: bool = True
+    prometheus_path: Optional[str] = ".cache/metrics/pipeline.prom"  # Textfile for node_exporter, None to disable
+    report_file: Optional[str] = "dataset_metrics.json"  # JSON run report, None to disable
+    sample_interval_seconds: float = 1.0  # Period of the queue depth / busy worker sampling
+    export_interval_seconds: float = 60.0  # Period of the Prometheus textfile updates during the run
+
+@dataclass
+class PipelineConfig:
+    mode: str = "batch"  # "batch": OCR every file, then summarize; "streaming": overlap OCR and summaries
+    queue_size: int = 8  # Max documents waiting between two pipeline stages
+    summary_workers: int = 2  # Concurrent summarizer consumers in streaming mode
+    manifest_file: str = ".cache/manifest.sqlite3"  # Per-file stage tracking for --resume
+
+@dataclass
+class SchedulerConfig:
+    initial_concurrency: int = 2  # In-flight LLM requests at start
+    min_concurrency: int = 1
+    max_concurrency: int = 8
+    target_latency_seconds: float = 60.0  # Slower responses shrink the limit
+    request_timeout_seconds: float = 300.0
+    max_retries: int = 3
+    backoff_base_seconds: float = 2.0
+    backoff_max_seconds: float = 60.0
+    increase_step: float = 1.0  # Additive increase per window of `limit` successful requests
+    decrease_factor: float = 0.5  # Multiplicative decrease on slow responses and errors
+
+@dataclass
+class ExtractionConfig:
+    required_fields: List[str] = field(default_factory=lambda: ["numero_resolucion", "fecha_resolucion", "expediente"])
+    enabled: bool = True  # Add rule-based fields (resolution number, date, expediente, DNI, ...) to every record
+    skip_llm_when_complete: bool = False  # Build the summary from the fields when every required field is found
 
 @dataclass
 class LoggingConfig:
@@ -40,8 +173,19 @@ class TimezoneConfig:
 @dataclass
 class AppConfig:
     file_processing: FileProcessingConfig
+    ocr: OCRConfig
+    cache: CacheConfig
+    boilerplate: BoilerplateConfig
+    dedup: DedupConfig
+    search: SearchConfig
+    semantic: SemanticConfig
     ollama: OllamaConfig
-    # extraction: ExtractionConfig
+    ollama_client: OllamaClientConfig
+    llm_scheduler: SchedulerConfig
+    extraction: ExtractionConfig
+    pipeline: PipelineConfig
+    output: OutputConfig
+    metrics: MetricsConfig
     logging: LoggingConfig
     timezone: TimezoneConfig
 
@@ -85,15 +229,37 @@ def load_config(config_path: str = None) -> AppConfig:
     try:
         # Create configuration objects
         file_processing = FileProcessingConfig(**config_data['file_processing'])
+        ocr = OCRConfig(**(config_data.get('ocr') or {}))
+        cache = CacheConfig(**(config_data.get('cache') or {}))
+        boilerplate = BoilerplateConfig(**(config_data.get('boilerplate') or {}))
+        dedup = DedupConfig(**(config_data.get('dedup') or {}))
+        search = SearchConfig(**(config_data.get('search') or {}))
+        semantic = SemanticConfig(**(config_data.get('semantic') or {}))
         ollama = OllamaConfig(**config_data['ollama'])
-        # extraction = ExtractionConfig(**config_data['extraction'])
+        ollama_client = OllamaClientConfig(**(config_data.get('ollama_client') or {}))
+        llm_scheduler = SchedulerConfig(**(config_data.get('llm_scheduler') or {}))
+        extraction = ExtractionConfig(**(config_data.get('extraction') or {}))
+        pipeline = PipelineConfig(**(config_data.get('pipeline') or {}))
+        output = OutputConfig(**(config_data.get('output') or {}))
+        metrics = MetricsConfig(**(config_data.get('metrics') or {}))
         logging_config = LoggingConfig(**config_data['logging'])
         timezone = TimezoneConfig(**config_data['timezone'])
         
         return AppConfig(
             file_processing=file_processing,
+            ocr=ocr,
+            cache=cache,
+            boilerplate=boilerplate,
+            dedup=dedup,
+            search=search,
+            semantic=semantic,
             ollama=ollama,
-            # extraction=extraction,
+            ollama_client=ollama_client,
+            llm_scheduler=llm_scheduler,
+            extraction=extraction,
+            pipeline=pipeline,
+            output=output,
+            metrics=metrics,
             logging=logging_config,
             timezone=timezone
         )
@@ -123,6 +289,95 @@ def validate_config(config: AppConfig) -> None:
     if config.file_processing.test_limit is not None and config.file_processing.test_limit < 1:
         raise ValueError("Test limit must be positive or null")
     
+    if config.file_processing.max_concurrent_tasks < 1:
+        raise ValueError("Max concurrent tasks must be positive")
+    
+    # Validate OCR settings
+    if config.ocr.engine not in ("thread", "process"):
+        raise ValueError("OCR engine must be 'thread' or 'process'")
+    
+    if config.ocr.zoom_factor <= 0:
+        raise ValueError("Zoom factor must be positive")
+    
+    if config.ocr.pages_per_task < 1:
+        raise ValueError("Pages per task must be positive")
+    
+    if not (0.0 <= config.ocr.text_layer_min_glyph_ratio <= 1.0):
+        raise ValueError("Text layer min glyph ratio must be between 0.0 and 1.0")
+    
+    if not (0.0 <= config.ocr.text_layer_max_image_coverage <= 1.0):
+        raise ValueError("Text layer max image coverage must be between 0.0 and 1.0")
+    
+    if config.ocr.adaptive_zoom and (not config.ocr.zoom_levels or min(config.ocr.zoom_levels) <= 0):
+        raise ValueError("Adaptive zoom needs at least one positive zoom level")
+    
+    if not (0.0 <= config.ocr.adaptive_min_confidence <= 1.0):
+        raise ValueError("Adaptive min confidence must be between 0.0 and 1.0")
+    
+    if config.ocr.backend not in ["pytesseract", "tesserocr"]:
+        raise ValueError("OCR backend must be 'pytesseract' or 'tesserocr'")
+    
+    if not (0 <= config.ocr.psm <= 13):
+        raise ValueError("Tesseract PSM must be between 0 and 13")
+    
+    if not (0 <= config.ocr.oem <= 3):
+        raise ValueError("Tesseract OEM must be between 0 and 3")
+    
+    if config.ocr.preprocessing not in ["none", "binarize", "median_otsu", "nlm", "auto"]:
+        raise ValueError("OCR preprocessing must be 'none', 'binarize', 'median_otsu', 'nlm' or 'auto'")
+    
+    if not (0.0 <= config.ocr.noise_sigma_low <= config.ocr.noise_sigma_high):
+        raise ValueError("Noise sigma thresholds must satisfy 0 <= noise_sigma_low <= noise_sigma_high")
+    
+    if not (0.0 <= config.ocr.blank_page_max_ink_ratio <= 1.0):
+        raise ValueError("Blank page max ink ratio must be between 0.0 and 1.0")
+    
+    # Validate cache settings
+    if config.cache.ocr_max_size_mb <= 0:
+        raise ValueError("OCR cache size must be positive")
+    
+    if config.cache.summary_max_size_mb <= 0:
+        raise ValueError("Summary cache size must be positive")
+    
+    if config.cache.summary_ttl_hours is not None and config.cache.summary_ttl_hours <= 0:
+        raise ValueError("Summary cache TTL must be positive or null")
+    
+    # Validate boilerplate stripping
+    boilerplate = config.boilerplate
+    if not (0.0 < boilerplate.df_threshold <= 1.0) or not (0.0 < boilerplate.shingle_line_ratio <= 1.0):
+        raise ValueError("Boilerplate thresholds must be between 0.0 and 1.0")
+    
+    if boilerplate.freeze_after_documents < 0:
+        raise ValueError("Boilerplate freeze_after_documents must be non-negative")
+    
+    if boilerplate.min_documents < 2 or boilerplate.shingle_size < 2:
+        raise ValueError("Boilerplate min documents and shingle size must be at least 2")
+    
+    # Validate dedup
+    if config.dedup.lsh_bands not in (2, 4, 8, 16):
+        raise ValueError("Dedup LSH bands must be 2, 4, 8 or 16")
+    
+    if not (0 <= config.dedup.max_hamming_distance < 3 * config.dedup.lsh_bands):
+        raise ValueError("Dedup max Hamming distance must be between 0 and 3 * LSH bands - 1")
+    
+    if config.dedup.shingle_size < 1:
+        raise ValueError("Dedup shingle size must be positive")
+    
+    # Validate search index
+    if config.search.summary_weight <= 0:
+        raise ValueError("Search summary weight must be positive")
+    
+    # Validate semantic index
+    semantic = config.semantic
+    if semantic.embedder not in ["ollama", "hashing"]:
+        raise ValueError("Semantic embedder must be 'ollama' or 'hashing'")
+    
+    if semantic.batch_size < 1 or semantic.chunk_tokens < 16 or semantic.hashing_dimensions < 8:
+        raise ValueError("Semantic batch size must be positive, chunk tokens at least 16 and hashing dimensions at least 8")
+    
+    if semantic.ivf_min_vectors < 0 or semantic.ivf_probes < 1 or semantic.save_every_documents < 1:
+        raise ValueError("Semantic IVF min vectors must be non-negative, IVF probes and save interval positive")
+    
     # Validate Ollama settings
     if not config.ollama.model:
         raise ValueError("Ollama model cannot be empty")
@@ -136,16 +391,63 @@ def validate_config(config: AppConfig) -> None:
     if not (0.0 <= config.ollama.top_p <= 1.0):
         raise ValueError("Top P must be between 0.0 and 1.0")
     
+    if config.ollama.chunk_max_tokens < 256 or config.ollama.chars_per_token <= 0:
+        raise ValueError("Ollama chunk max tokens must be at least 256 and chars per token positive")
+    
+    if config.ollama.summary_max_words < 1:
+        raise ValueError("Ollama summary max words must be at least 1")
+    
+    # Validate Ollama client
+    client = config.ollama_client
+    if client.timeout_seconds <= 0 or client.connect_timeout_seconds <= 0:
+        raise ValueError("Ollama client timeouts must be positive")
+    
+    if client.max_connections < 1 or not (0 <= client.max_keepalive_connections <= client.max_connections):
+        raise ValueError("Ollama client connection limits must satisfy 0 <= max_keepalive_connections <= max_connections")
+    
+    # Validate LLM scheduler
+    scheduler = config.llm_scheduler
+    if not (1 <= scheduler.min_concurrency <= scheduler.initial_concurrency <= scheduler.max_concurrency):
+        raise ValueError("LLM scheduler concurrency must satisfy 1 <= min <= initial <= max")
+    
+    if not (0.0 < scheduler.decrease_factor < 1.0):
+        raise ValueError("LLM scheduler decrease factor must be between 0.0 and 1.0")
+    
+    if scheduler.request_timeout_seconds <= 0 or scheduler.max_retries < 0:
+        raise ValueError("LLM scheduler timeout must be positive and max retries non-negative")
+    
+    # Validate pipeline
+    if config.pipeline.mode not in ("batch", "streaming"):
+        raise ValueError("Pipeline mode must be 'batch' or 'streaming'")
+    
+    if config.pipeline.queue_size < 1:
+        raise ValueError("Pipeline queue size must be positive")
+    
+    if config.pipeline.summary_workers < 1:
+        raise ValueError("Pipeline summary workers must be positive")
+    
+    # Validate output
+    if config.output.buffer_records < 1:
+        raise ValueError("Output buffer records must be positive")
+    
+    if config.output.flush_interval_seconds <= 0 or config.output.fsync_interval_seconds < 0:
+        raise ValueError("Output flush interval must be positive and fsync interval non-negative")
+    
+    # Validate metrics
+    if config.metrics.sample_interval_seconds <= 0 or config.metrics.export_interval_seconds <= 0:
+        raise ValueError("Metrics sample and export intervals must be positive")
+    
     # Validate extraction
-    # if not config.extraction.required_fields:
-    #     raise ValueError("Required fields list cannot be empty")
-    
-    print(f"✓ Configuration validated successfully")
-    print(f"  - Method: {config.file_processing.ocr_method}")
-    print(f"  - Model: {config.ollama.model}")
-    print(f"  - Temperature: {config.ollama.temperature}")
-    print(f"  - Input folder: {config.file_processing.input_folder}")
-    print(f"  - Test limit: {config.file_processing.test_limit or 'All files'}")
+    if not config.extraction.required_fields:
+        raise ValueError("Required fields list cannot be empty")
+    
+    # On stderr, so command line tools printing JSON keep a clean stdout
+    print(f"✓ Configuration validated successfully", file=sys.stderr)
+    print(f"  - Method: {config.file_processing.ocr_method} ({config.ocr.engine} engine)", file=sys.stderr)
+    print(f"  - Model: {config.ollama.model}", file=sys.stderr)
+    print(f"  - Temperature: {config.ollama.temperature}", file=sys.stderr)
+    print(f"  - Input folder: {config.file_processing.input_folder}", file=sys.stderr)
+    print(f"  - Test limit: {config.file_processing.test_limit or 'All files'}", file=sys.stderr)
 
 def get_config() -> AppConfig:
     """
@@ -1,3 +1,4 @@
+import hashlib
 import logging
 import os, json
 from time import sleep
@@ -18,6 +19,11 @@ def get_files_from_folder(folder: str, file_extention: list[str] = [".pdf"]) ->
                 files.append(os.path.join(root, filename))
     return files
 
+def hash_file(file_path: str) -> str:
+    '''Returns the SHA-256 hex digest of a file's bytes, read in chunks.'''
+    with open(file_path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
 # def load_prompt_template() -> str:
 #     '''Load the prompt template from the markdown file.'''
 #     try:
@@ -27,26 +33,28 @@ def get_files_from_folder(folder: str, file_extention: list[str] = [".pdf"]) ->
 #     except FileNotFoundError:
 #         return "Just say: 'Error loading the prompt template. Please check the file path.'"
 
-def dump_json(results, filename: str = get_config().file_processing.output_file, append: bool = False):
-    '''Writes the output in a JSON file with UTF-8 encoding.'''
-    if append and os.path.exists(filename):
-        # Read existing data
-        with open(filename, "r", encoding="utf-8") as f:
+def dump_json(results, filename: str = get_config().file_processing.output_file):
+    '''Writes the output in a JSON file with UTF-8 encoding.
+
+    To add records one at a time use `utils.result_writer.JSONLResultWriter`,
+    which appends without rewriting the file.'''
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4, ensure_ascii=False)
+
+def read_jsonl_records(filename: str, offsets: list[int]) -> list:
+    '''Reads the JSON lines starting at the given byte offsets of a JSONL file.'''
+    records = []
+    if not offsets or not os.path.exists(filename):
+        return records
+    with open(filename, "rb") as f:
+        for offset in offsets:
+            f.seek(offset)
+            line = f.readline()
             try:
-                existing_data = json.load(f)
-                if not isinstance(existing_data, list):
-                    existing_data = [existing_data]
+                records.append(json.loads(line))
             except json.JSONDecodeError:
-                existing_data = []
-        
-        # Append new result
-        existing_data.append(results)
-        
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(existing_data, f, indent=4, ensure_ascii=False)
-    else:
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(results, f, indent=4, ensure_ascii=False)
+                logger.warning(f"Skipping unreadable record at offset {offset} of {filename}")
+    return records
 
 def print_loading_animation(stop_event):
     '''Print a cycling loading animation until stop_event is set'''
@@ -0,0 +1,384 @@
+"""
+Run metrics: stage timing histograms, sampled gauges and worker utilization,
+exported as a Prometheus textfile and a JSON run report.
+"""
+import bisect
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the latency buckets, in seconds (1 ms to 20 min)
+LATENCY_BUCKETS = [
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 600.0, 1200.0,
+]
+
+METRIC_PREFIX = "pipeline"
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram, in the Prometheus layout.
+
+    Memory does not depend on the number of observations; quantiles are
+    estimated by linear interpolation inside the bucket that holds them.
+    """
+
+    def __init__(self, buckets: List[float] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the q-quantile (0-1) of the observations."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                # The observed extremes narrow the first and last buckets
+                lower = max(self.buckets[index - 1] if index > 0 else 0.0, self.min)
+                upper = min(self.buckets[index] if index < len(self.buckets) else self.max, self.max)
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        """Count, total and mean/p50/p95/max in milliseconds."""
+        def milliseconds(value: Optional[float]) -> Optional[float]:
+            return round(value * 1000, 3) if value is not None else None
+
+        return {
+            "count": self.count,
+            "total_seconds": round(self.sum, 3),
+            "mean_ms": milliseconds(self.sum / self.count if self.count else None),
+            "p50_ms": milliseconds(self.quantile(0.5)),
+            "p95_ms": milliseconds(self.quantile(0.95)),
+            "max_ms": milliseconds(self.max if self.count else None),
+        }
+
+
+class GaugeStats:
+    """Last, max and time-weighted average of a sampled gauge."""
+
+    def __init__(self):
+        self.last = 0.0
+        self.max = 0.0
+        self._weighted_sum = 0.0
+        self._seconds = 0.0
+
+    def sample(self, value: float, interval_seconds: float) -> None:
+        self.last = value
+        self.max = max(self.max, value)
+        self._weighted_sum += value * interval_seconds
+        self._seconds += interval_seconds
+
+    @property
+    def average(self) -> float:
+        return self._weighted_sum / self._seconds if self._seconds else self.last
+
+
+class WorkerPoolStats:
+    """Busy time of a pool of workers, for its utilization over the run."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.active = 0
+        self.busy_seconds = 0.0
+        self.tasks = 0
+
+
+class MetricsRegistry:
+    """
+    Collects the timings of a run.
+
+    - Spans: `with metrics.span("render"):` (or `observe()` with a duration
+      measured elsewhere, e.g. in an OCR worker process) add to the latency
+      histogram of the stage.
+    - Gauges: callables (queue sizes, in-flight requests) sampled every
+      `sample_interval_seconds` by `start()`.
+    - Worker pools: `with metrics.worker("ocr"):` marks a worker of the pool
+      busy; utilization is busy time over capacity times run time.
+    - Counters: `increment()`.
+
+    Every method is thread-safe: OCR threads and the event loop share the registry.
+    """
+
+    def __init__(
+        self,
+        prometheus_path: Optional[str] = None,
+        report_path: Optional[str] = None,
+        sample_interval_seconds: float = 1.0,
+        export_interval_seconds: float = 60.0,
+    ):
+        """
+        Initialize the registry.
+
+        Args:
+            prometheus_path: Prometheus textfile written periodically and at
+                the end of the run (None to disable)
+            report_path: JSON run report written at the end of the run (None to disable)
+            sample_interval_seconds: Period of the gauge sampling
+            export_interval_seconds: Period of the Prometheus textfile updates during the run
+        """
+        self.prometheus_path = prometheus_path
+        self.report_path = report_path
+        self.sample_interval_seconds = sample_interval_seconds
+        self.export_interval_seconds = export_interval_seconds
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Histogram] = {}
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+        self._gauge_stats: Dict[str, GaugeStats] = {}
+        self._pools: Dict[str, WorkerPoolStats] = {}
+        self._started_at = time.time()
+        self._start_time = time.perf_counter()
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Record a duration of a stage."""
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        """Time the enclosed block as a duration of a stage (also when it raises)."""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start_time)
+
+    def increment(self, counter: str, value: float = 1) -> None:
+        """Add to a counter."""
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + value
+
+    def register_gauge(self, name: str, read: Callable[[], float]) -> None:
+        """
+        Sample a value during the run.
+
+        Args:
+            name: Gauge name, e.g. "queue_depth.ocr"
+            read: Returns the current value; called from the sampler thread
+        """
+        with self._lock:
+            self._gauges[name] = read
+            self._gauge_stats.setdefault(name, GaugeStats())
+
+    def unregister_gauge(self, name: str) -> None:
+        """Stop sampling a gauge (its statistics are kept)."""
+        with self._lock:
+            self._gauges.pop(name, None)
+
+    def set_pool_capacity(self, pool: str, capacity: int) -> None:
+        """Declare the number of workers of a pool."""
+        with self._lock:
+            self._pools.setdefault(pool, WorkerPoolStats(capacity)).capacity = capacity
+
+    @contextmanager
+    def worker(self, pool: str) -> Iterator[None]:
+        """Mark a worker of the pool busy during the enclosed block."""
+        with self._lock:
+            stats = self._pools.setdefault(pool, WorkerPoolStats(1))
+            stats.active += 1
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                stats.active -= 1
+                stats.busy_seconds += time.perf_counter() - start_time
+                stats.tasks += 1
+
+    def add_busy_time(self, pool: str, seconds: float, tasks: int = 1) -> None:
+        """Record work done by a pool outside this process (e.g. OCR worker processes)."""
+        with self._lock:
+            stats = self._pools.setdefault(pool, WorkerPoolStats(1))
+            stats.busy_seconds += seconds
+            stats.tasks += tasks
+
+    def start(self) -> None:
+        """Start sampling gauges and exporting the Prometheus textfile in the background."""
+        if self._sampler is not None:
+            return
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._sample_loop, name="metrics-sampler", daemon=True)
+        self._sampler.start()
+
+    def stop(self) -> None:
+        """Stop the background sampling."""
+        if self._sampler is None:
+            return
+        self._stop.set()
+        self._sampler.join()
+        self._sampler = None
+
+    def _sample_loop(self) -> None:
+        last_export = time.perf_counter()
+        while not self._stop.wait(self.sample_interval_seconds):
+            self._sample_gauges(self.sample_interval_seconds)
+            if self.prometheus_path and time.perf_counter() - last_export >= self.export_interval_seconds:
+                last_export = time.perf_counter()
+                try:
+                    self.write_prometheus()
+                except OSError as e:
+                    logger.warning(f"Could not write metrics to {self.prometheus_path}: {e}")
+
+    def _sample_gauges(self, interval_seconds: float) -> None:
+        with self._lock:
+            gauges = list(self._gauges.items())
+            pools = [(f"workers_busy.{pool}", float(stats.active)) for pool, stats in self._pools.items()]
+        values = []
+        for name, read in gauges:
+            try:
+                values.append((name, float(read())))
+            except Exception as e:
+                logger.debug(f"Could not sample gauge {name}: {e}")
+        with self._lock:
+            for name, value in values + pools:
+                self._gauge_stats.setdefault(name, GaugeStats()).sample(value, interval_seconds)
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Build the run report.
+
+        Returns:
+            JSON-serializable dictionary with the stage timings (sorted by total
+            time), gauges, worker pool utilization and counters
+        """
+        run_seconds = time.perf_counter() - self._start_time
+        with self._lock:
+            stages = {stage: histogram.summary() for stage, histogram in self._histograms.items()}
+            gauges = {
+                name: {"last": stats.last, "max": stats.max, "avg": round(stats.average, 3)}
+                for name, stats in self._gauge_stats.items()
+            }
+            workers = {
+                pool: {
+                    "capacity": stats.capacity,
+                    "tasks": stats.tasks,
+                    "busy_seconds": round(stats.busy_seconds, 3),
+                    "utilization": round(stats.busy_seconds / (stats.capacity * run_seconds), 4)
+                    if stats.capacity and run_seconds else None,
+                }
+                for pool, stats in self._pools.items()
+            }
+            counters = dict(self._counters)
+
+        return {
+            "started_at": datetime.fromtimestamp(self._started_at, timezone.utc).isoformat(),
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "run_seconds": round(run_seconds, 3),
+            "stages": dict(sorted(stages.items(), key=lambda item: item[1]["total_seconds"], reverse=True)),
+            "gauges": gauges,
+            "workers": workers,
+            "counters": counters,
+        }
+
+    def prometheus_text(self) -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        report = self.report()
+        with self._lock:
+            histograms = {stage: (histogram.buckets, list(histogram.counts), histogram.count, histogram.sum)
+                          for stage, histogram in self._histograms.items()}
+
+        lines = [
+            f"# HELP {METRIC_PREFIX}_stage_seconds Duration of every pipeline stage.",
+            f"# TYPE {METRIC_PREFIX}_stage_seconds histogram",
+        ]
+        for stage, (buckets, counts, count, total) in sorted(histograms.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(buckets + [math.inf], counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == math.inf else f"{bound:g}"
+                lines.append(f'{METRIC_PREFIX}_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'{METRIC_PREFIX}_stage_seconds_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'{METRIC_PREFIX}_stage_seconds_count{{stage="{stage}"}} {count}')
+
+        lines += [
+            f"# HELP {METRIC_PREFIX}_gauge Sampled gauges (queue depths, busy workers, in-flight requests).",
+            f"# TYPE {METRIC_PREFIX}_gauge gauge",
+        ]
+        for name, stats in sorted(report["gauges"].items()):
+            for stat, value in stats.items():
+                lines.append(f'{METRIC_PREFIX}_gauge{{name="{name}",stat="{stat}"}} {value}')
+
+        lines += [
+            f"# HELP {METRIC_PREFIX}_worker_utilization Busy time of a worker pool over its capacity and the run time.",
+            f"# TYPE {METRIC_PREFIX}_worker_utilization gauge",
+        ]
+        for pool, stats in sorted(report["workers"].items()):
+            if stats["utilization"] is not None:
+                lines.append(f'{METRIC_PREFIX}_worker_utilization{{pool="{pool}"}} {stats["utilization"]}')
+
+        lines += [
+            f"# HELP {METRIC_PREFIX}_events_total Pipeline event counters.",
+            f"# TYPE {METRIC_PREFIX}_events_total counter",
+        ]
+        for counter, value in sorted(report["counters"].items()):
+            lines.append(f'{METRIC_PREFIX}_events_total{{event="{counter}"}} {value:g}')
+
+        lines += [
+            f"# HELP {METRIC_PREFIX}_run_seconds Time since the run started.",
+            f"# TYPE {METRIC_PREFIX}_run_seconds gauge",
+            f"{METRIC_PREFIX}_run_seconds {report['run_seconds']}",
+            f"# HELP {METRIC_PREFIX}_run_start_timestamp_seconds Unix time the run started.",
+            f"# TYPE {METRIC_PREFIX}_run_start_timestamp_seconds gauge",
+            f"{METRIC_PREFIX}_run_start_timestamp_seconds {self._started_at:.0f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _write_atomic(file_path: str, content: str) -> None:
+        """Write a file through a temporary file, so readers never see it half written."""
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_file = f"{file_path}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(temp_file, file_path)
+
+    def write_prometheus(self) -> None:
+        """Write the Prometheus textfile (for node_exporter's textfile collector)."""
+        if self.prometheus_path:
+            self._write_atomic(self.prometheus_path, self.prometheus_text())
+
+    def write_report(self) -> None:
+        """Write the JSON run report and the final Prometheus textfile, and log where the time went."""
+        report = self.report()
+        if self.report_path:
+            self._write_atomic(self.report_path, json.dumps(report, indent=2))
+        self.write_prometheus()
+
+        top_stages = ", ".join(
+            f"{stage} {stats['total_seconds']}s" for stage, stats in list(report["stages"].items())[:5]
+        )
+        utilization = ", ".join(
+            f"{pool} {stats['utilization']:.0%}" for pool, stats in report["workers"].items() if stats["utilization"] is not None
+        )
+        logger.info(f"Metrics: run {report['run_seconds']}s; most time in {top_stages or 'n/a'}; worker utilization {utilization or 'n/a'}")
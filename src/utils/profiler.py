@@ -0,0 +1,295 @@
+"""
+Profiling hooks for `main.py --profile`: a sampling CPU profiler with
+flamegraph-compatible output, tracemalloc snapshot diffs and peak RSS per document.
+"""
+import atexit
+import glob
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Allocations of the import machinery and of the profiler itself only add noise to the report
+IGNORED_ALLOCATION_FILES = [
+    "<frozen importlib._bootstrap>", "<frozen importlib._bootstrap_external>", tracemalloc.__file__, __file__,
+]
+
+
+def _rss_mb(pid: str = "self") -> Optional[float]:
+    """Current resident set size of a process in MiB, from /proc (None where unavailable)."""
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _frame_label(frame) -> str:
+    """Flamegraph frame name: file and qualified function name."""
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_qualname}"
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stack of every thread at a fixed interval.
+
+    Runs in a background thread reading `sys._current_frames()`, so it sees
+    the asyncio event loop (main thread) and the OCR worker threads without
+    instrumenting them, at a cost independent of how much code runs. Stacks
+    are counted in the folded format ("thread;outer;inner count") read by
+    flamegraph.pl, speedscope and inferno. On every sample it also reads the
+    RSS of the process and of its child processes, to track the peak of every
+    document in flight.
+    """
+
+    def __init__(self, interval_seconds: float = 0.01):
+        """
+        Initialize the profiler.
+
+        Args:
+            interval_seconds: Time between two samples
+        """
+        self.interval_seconds = interval_seconds
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._document_peaks: Dict[str, float] = {}
+
+    def start(self) -> None:
+        """Start sampling in a background thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval_seconds):
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(thread_names.get(thread_id, f"thread-{thread_id}"))
+                self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+            self._sample_rss()
+
+    def _sample_rss(self) -> None:
+        """Raise the RSS peak of every document in flight to the current RSS of the process tree."""
+        with self._lock:
+            if not self._document_peaks:
+                return
+        rss = _rss_mb() or 0.0
+        for child in multiprocessing.active_children():
+            rss += _rss_mb(str(child.pid)) or 0.0
+        with self._lock:
+            for key, peak in self._document_peaks.items():
+                self._document_peaks[key] = max(peak, rss)
+
+    def begin_document(self, key: str) -> None:
+        """Start tracking the RSS peak while a document is processed."""
+        with self._lock:
+            self._document_peaks[key] = _rss_mb() or 0.0
+
+    def end_document(self, key: str) -> Optional[float]:
+        """
+        Stop tracking a document.
+
+        Returns:
+            Peak RSS of the process and its workers (MiB) while the document was
+            in flight, or None if it was not tracked
+        """
+        with self._lock:
+            peak = self._document_peaks.pop(key, None)
+        return round(peak, 1) if peak else None
+
+    def write_folded(self, file_path: str) -> None:
+        """Write the sampled stacks in the folded format."""
+        with open(file_path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+
+def start_worker_profiler(path_prefix: str, interval_seconds: float) -> None:
+    """
+    Profile the current worker process until it exits.
+
+    Called by the OCR worker process initializer; the stacks are written to
+    `<path_prefix>.worker-<pid>.folded` when the worker shuts down.
+
+    Args:
+        path_prefix: Output path prefix of the run profile
+        interval_seconds: Time between two samples
+    """
+    profiler = SamplingProfiler(interval_seconds)
+    profiler.start()
+
+    def write() -> None:
+        profiler.stop()
+        profiler.write_folded(f"{path_prefix}.worker-{os.getpid()}.folded")
+
+    atexit.register(write)
+
+
+class RunProfiler:
+    """
+    Profiling of a whole run: CPU samples, per-document allocations and peak RSS.
+
+    - `<prefix>.profile.folded`: CPU stacks of the main process (event loop
+      and OCR threads) and of the OCR worker processes, prefixed with the
+      process and thread name, for flamegraph.pl / speedscope.
+    - `<prefix>.memory.json`: for every document, the peak RSS while it was in
+      flight and the top allocation sites (tracemalloc snapshot diff between
+      its start and its end). Documents processed concurrently share the
+      process, so their allocations mix; run with one OCR worker for exact
+      attribution.
+    """
+
+    def __init__(self, path_prefix: str, interval_seconds: float = 0.01, top_allocations: int = 10):
+        """
+        Initialize the profiler.
+
+        Args:
+            path_prefix: Output path without extension (e.g. "dataset" writes
+                dataset.profile.folded and dataset.memory.json)
+            interval_seconds: Time between two CPU samples
+            top_allocations: Allocation sites reported per document
+        """
+        self.path_prefix = path_prefix
+        self.interval_seconds = interval_seconds
+        self.top_allocations = top_allocations
+        self.sampler = SamplingProfiler(interval_seconds)
+        self._snapshots: Dict[str, tracemalloc.Snapshot] = {}
+        self._documents: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def folded_path(self) -> str:
+        return f"{self.path_prefix}.profile.folded"
+
+    @property
+    def memory_path(self) -> str:
+        return f"{self.path_prefix}.memory.json"
+
+    def start(self) -> None:
+        """Start the CPU sampling and the allocation tracing."""
+        directory = os.path.dirname(self.path_prefix)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Remove the worker profiles of a previous run, they are merged at the end
+        for stale_file in glob.glob(f"{glob.escape(self.path_prefix)}.worker-*.folded"):
+            os.remove(stale_file)
+        tracemalloc.start()
+        self.sampler.start()
+        logger.info(f"Profiling: CPU samples every {self.interval_seconds * 1000:g} ms, tracing allocations")
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, file_name) for file_name in IGNORED_ALLOCATION_FILES]
+        )
+
+    def begin_document(self, key: str) -> None:
+        """
+        Mark the start of a document.
+
+        Args:
+            key: Document id (its file path)
+        """
+        snapshot = self._snapshot()
+        with self._lock:
+            self._snapshots[key] = snapshot
+        self.sampler.begin_document(key)
+
+    def end_document(self, key: str) -> Optional[float]:
+        """
+        Mark the end of a document and report its biggest allocators.
+
+        Args:
+            key: Document id given to `begin_document`
+
+        Returns:
+            Peak RSS (MiB) while the document was in flight
+        """
+        peak_rss_mb = self.sampler.end_document(key)
+        with self._lock:
+            before = self._snapshots.pop(key, None)
+        if before is None:
+            return peak_rss_mb
+
+        stats = self._snapshot().compare_to(before, "lineno")
+        top = [
+            {
+                "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_diff_kb": round(stat.size_diff / 1024, 1),
+                "count_diff": stat.count_diff,
+            }
+            for stat in sorted(stats, key=lambda stat: stat.size_diff, reverse=True)[:self.top_allocations]
+            if stat.size_diff > 0
+        ]
+        traced_mb, traced_peak_mb = (value / (1024 * 1024) for value in tracemalloc.get_traced_memory())
+        with self._lock:
+            self._documents.append({
+                "document": key,
+                "peak_rss_mb": peak_rss_mb,
+                "traced_mb": round(traced_mb, 1),
+                "traced_peak_mb": round(traced_peak_mb, 1),
+                "top_allocations": top,
+            })
+        if top:
+            biggest = ", ".join(f"{os.path.basename(item['location'])} +{item['size_diff_kb']} KiB" for item in top[:3])
+            logger.info(f"{os.path.basename(key)}: peak RSS {peak_rss_mb} MiB, biggest allocators {biggest}")
+        return peak_rss_mb
+
+    def stop(self) -> None:
+        """
+        Stop profiling and write the flamegraph and memory files.
+
+        Call after the OCR process pool has shut down, so the worker profiles
+        are on disk to be merged.
+        """
+        self.sampler.stop()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+        stacks = Counter({f"main;{stack}": count for stack, count in self.sampler.stacks.items()})
+        for worker_file in glob.glob(f"{glob.escape(self.path_prefix)}.worker-*.folded"):
+            process_name = worker_file.rsplit(".", 2)[-2]
+            with open(worker_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    stack, _, count = line.rstrip("\n").rpartition(" ")
+                    if stack:
+                        stacks[f"{process_name};{stack}"] += int(count)
+            os.remove(worker_file)
+
+        with open(self.folded_path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(stacks.items()):
+                f.write(f"{stack} {count}\n")
+        with open(self.memory_path, "w", encoding="utf-8") as f:
+            json.dump({"documents": self._documents}, f, indent=2)
+        logger.info(
+            f"Profile written to {self.folded_path} ({self.sampler.samples} samples) "
+            f"and {self.memory_path} ({len(self._documents)} documents)"
+        )
@@ -0,0 +1,216 @@
+"""
+Streaming JSONL result writer.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class JSONLResultWriter:
+    """
+    Async, buffered append-only writer of one JSON record per line.
+
+    Records are buffered in memory and written in batches, when the buffer is
+    full or every `flush_interval_seconds`; the file is fsync'ed at most every
+    `fsync_interval_seconds`. Writing a record costs the same no matter how
+    many records the file already holds, and every flushed record survives a
+    crash of the process.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        buffer_records: int = 32,
+        flush_interval_seconds: float = 1.0,
+        fsync_interval_seconds: float = 5.0,
+    ):
+        """
+        Initialize the writer. The file is opened by `open()`.
+
+        Args:
+            filename: Path to the JSONL file
+            buffer_records: Max records kept in memory before they are written
+            flush_interval_seconds: Max time a record waits in the buffer
+            fsync_interval_seconds: Min time between two fsync calls
+        """
+        self.filename = filename
+        self.buffer_records = buffer_records
+        self.flush_interval_seconds = flush_interval_seconds
+        self.fsync_interval_seconds = fsync_interval_seconds
+        self._file = None
+        self._offset = 0
+        self._buffer: List[Tuple[bytes, int, Optional[Callable[[int], None]]]] = []
+        self._lock = asyncio.Lock()
+        self._last_fsync = 0.0
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def open(self, truncate: bool = False) -> None:
+        """
+        Open the file for appending and start the periodic flush.
+
+        Args:
+            truncate: Discard the existing records
+        """
+        loop = asyncio.get_running_loop()
+        self._file = await loop.run_in_executor(None, self._open_file, truncate)
+        self._offset = self._file.tell()
+        self._last_fsync = time.monotonic()
+        self._flush_task = asyncio.create_task(self._flush_periodically())
+
+    def _open_file(self, truncate: bool):
+        """Open the file in binary append mode, dropping a partial last line left by a crash."""
+        directory = os.path.dirname(self.filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if not truncate and os.path.exists(self.filename):
+            with open(self.filename, "rb+") as f:
+                size = f.seek(0, os.SEEK_END)
+                if size:
+                    # Walk back to the last complete line
+                    position = size
+                    while position > 0:
+                        chunk_start = max(0, position - 4096)
+                        f.seek(chunk_start)
+                        chunk = f.read(position - chunk_start)
+                        newline = chunk.rfind(b"\n")
+                        if newline != -1:
+                            position = chunk_start + newline + 1
+                            break
+                        position = chunk_start
+                    if position != size:
+                        logger.warning(f"Dropping a partial record at the end of {self.filename}")
+                        f.truncate(position)
+
+        return open(self.filename, "wb" if truncate else "ab")
+
+    async def write(self, record: Dict[str, Any], on_flushed: Optional[Callable[[int], None]] = None) -> int:
+        """
+        Queue a record for writing.
+
+        Args:
+            record: JSON-serializable record
+            on_flushed: Called with the record offset once the record is written to the file
+
+        Returns:
+            Byte offset where the record's line starts
+        """
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        offset = self._offset
+        self._offset += len(line)
+        self._buffer.append((line, offset, on_flushed))
+
+        if len(self._buffer) >= self.buffer_records:
+            await self.flush()
+        return offset
+
+    async def flush(self, fsync: bool = False) -> None:
+        """
+        Write the buffered records to the file.
+
+        Args:
+            fsync: Force an fsync regardless of the interval
+        """
+        async with self._lock:
+            buffer, self._buffer = self._buffer, []
+            now = time.monotonic()
+            do_fsync = fsync or now - self._last_fsync >= self.fsync_interval_seconds
+            if not buffer and not do_fsync:
+                return
+
+            data = b"".join(line for line, _, _ in buffer)
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._write_data, data, do_fsync)
+            if do_fsync:
+                self._last_fsync = now
+
+        for _, offset, on_flushed in buffer:
+            if on_flushed is not None:
+                on_flushed(offset)
+
+    def _write_data(self, data: bytes, fsync: bool) -> None:
+        """Write and optionally fsync (runs in the default executor)."""
+        if data:
+            self._file.write(data)
+        self._file.flush()
+        if fsync:
+            os.fsync(self._file.fileno())
+
+    async def _flush_periodically(self) -> None:
+        """Flush the buffer every `flush_interval_seconds`."""
+        while True:
+            await asyncio.sleep(self.flush_interval_seconds)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing {self.filename}: {e}")
+
+    async def close(self) -> None:
+        """Flush, fsync and close the file."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        if self._file is not None:
+            await self.flush(fsync=True)
+            self._file.close()
+            self._file = None
+
+    async def __aenter__(self) -> "JSONLResultWriter":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+
+def export_json_array(jsonl_file: str, json_file: str, offsets: Optional[List[int]] = None) -> int:
+    """
+    Export records of a JSONL file to a JSON array file (the `dataset.json` format).
+
+    Records are streamed one at a time, so memory use doesn't grow with the file.
+
+    Args:
+        jsonl_file: Source JSONL file
+        json_file: Destination JSON file
+        offsets: Byte offsets of the records to export, in order (defaults to every record)
+
+    Returns:
+        Number of exported records
+    """
+    count = 0
+    temp_file = f"{json_file}.tmp"
+
+    with open(jsonl_file, "rb") as source, open(temp_file, "w", encoding="utf-8") as target:
+        target.write("[")
+
+        def lines():
+            if offsets is None:
+                yield from source
+            else:
+                for offset in offsets:
+                    source.seek(offset)
+                    yield source.readline()
+
+        for line in lines():
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping unreadable record in {jsonl_file}")
+                continue
+            # Same layout as json.dump(records, indent=4)
+            item = json.dumps(record, indent=4, ensure_ascii=False).replace("\n", "\n    ")
+            target.write(("\n    " if count == 0 else ",\n    ") + item)
+            count += 1
+
+        target.write("\n]" if count else "]")
+
+    os.replace(temp_file, json_file)
+    return count
@@ -0,0 +1,31 @@
+"""
+Shared fixtures of the test suite.
+"""
+
+import pytest
+
+from benchmarks.fake_ollama import FakeOllamaServer
+from utils.config import get_config
+
+
+@pytest.fixture
+def run_directory(tmp_path, monkeypatch):
+    """
+    Run the pipeline inside a temporary directory.
+
+    The relative paths of config.yaml (dataset, results, caches, manifest)
+    resolve under `tmp_path`, and the model warm-up is disabled so no Ollama
+    server is contacted.
+    """
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "dataset").mkdir()
+    monkeypatch.setattr(get_config().ollama_client, "warm_up", False)
+    return tmp_path
+
+
+@pytest.fixture
+def fake_ollama():
+    """Fake Ollama server (benchmarks/fake_ollama.py) answering almost instantly."""
+    server = FakeOllamaServer(prompt_seconds=0.0, token_seconds=0.001, response_words=20).start()
+    yield server
+    server.stop()
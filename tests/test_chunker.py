@@ -0,0 +1,62 @@
+"""
+Tests of the token-budgeted text chunker.
+"""
+
+from utils.chunker import PAGE_HEADER_PATTERN, estimate_tokens, split_text
+
+
+def _pages(count: int, words: int) -> str:
+    return "\n".join(
+        f"Page {page}:\n" + " ".join(f"p{page}w{word}" for word in range(words)) for page in range(1, count + 1)
+    )
+
+
+def _words(text: str) -> list:
+    """Words of the text, without the page headers repeated on split pages."""
+    return PAGE_HEADER_PATTERN.sub("", text).split()
+
+
+def test_text_within_budget_is_one_chunk():
+    text = _pages(2, 10)
+    assert split_text(text, max_tokens=1000) == [text]
+
+
+def test_whole_pages_are_packed_within_the_budget():
+    text = _pages(6, 40)
+    chunks = split_text(text, max_tokens=150, chars_per_token=4.0)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 600 for chunk in chunks)
+    # Pages are never cut when they fit: every chunk starts on a page header
+    assert all(chunk.startswith("Page ") for chunk in chunks)
+    assert _words("\n".join(chunks)) == _words(text)
+
+
+def test_oversized_page_is_split_and_keeps_its_header():
+    paragraphs = "\n\n".join(" ".join(f"w{paragraph}_{word}" for word in range(30)) for paragraph in range(10))
+    text = f"Page 1:\n{paragraphs}\nPage 2:\ncorto"
+    chunks = split_text(text, max_tokens=100, chars_per_token=4.0)
+    assert all(len(chunk) <= 400 for chunk in chunks)
+    assert len(chunks) > 1
+    assert all(chunk.startswith("Page 1:\n") for chunk in chunks)
+    # The next page is packed after the last piece when it fits
+    assert chunks[-1].endswith("\n\nPage 2:\ncorto")
+    assert _words("\n".join(chunks)) == _words(text)
+
+
+def test_text_without_paragraphs_is_split_on_words():
+    text = " ".join(f"palabra{index}" for index in range(500))
+    chunks = split_text(text, max_tokens=50, chars_per_token=4.0)
+    assert all(len(chunk) <= 200 for chunk in chunks)
+    assert " ".join(chunks).split() == text.split()
+
+
+def test_word_longer_than_the_budget_is_kept_whole():
+    text = "corto " + "x" * 300 + " final"
+    chunks = split_text(text, max_tokens=25, chars_per_token=4.0)
+    assert "x" * 300 in chunks
+    assert " ".join(chunks).split() == text.split()
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("a" * 400, chars_per_token=4.0) == 101
+    assert estimate_tokens("", chars_per_token=4.0) == 1
@@ -0,0 +1,43 @@
+"""
+Tests of the manifest bookkeeping of DataProcessor.
+"""
+
+import asyncio
+
+from data_processor import DataProcessor
+from summarizer import SUMMARY_ERROR_PREFIX
+
+
+def _processor(resume: bool, summary: str, summarized: list) -> DataProcessor:
+    """DataProcessor with a fake OCR step and a summarizer returning `summary`."""
+    processor = DataProcessor(resume=resume)
+
+    async def extract_text_from_file(file_path):
+        return {"file_name": "a.pdf", "file_path": file_path, "text": "Texto de una resolución.", "confidence": 90.0}
+
+    async def generate_summary_async(text, profile_version=None):
+        summarized.append(text)
+        return summary
+
+    processor.data_extractor.extract_text_from_file = extract_text_from_file
+    processor.summarizer.generate_summary_async = generate_summary_async
+    return processor
+
+
+def test_failed_summary_is_retried_on_resume(run_directory):
+    (run_directory / "dataset" / "a.pdf").write_bytes(b"%PDF-1.4 fake")
+    summarized = []
+
+    results = asyncio.run(
+        _processor(False, f"{SUMMARY_ERROR_PREFIX}: connection refused", summarized).process_dataset()
+    )
+    assert results[0]["error"].startswith(SUMMARY_ERROR_PREFIX)
+    assert len(summarized) == 1
+
+    results = asyncio.run(_processor(True, "Resumen de la resolución.", summarized).process_dataset())
+    assert len(summarized) == 2
+    assert [result["error"] for result in results] == [None]
+
+    # Once written, the file is skipped by the next resumed run
+    asyncio.run(_processor(True, "Resumen de la resolución.", summarized).process_dataset())
+    assert len(summarized) == 2
@@ -0,0 +1,100 @@
+"""
+Tests of the SimHash/LSH duplicate index.
+"""
+
+import random
+
+from dedup import DuplicateIndex, simhash
+
+
+def _resolution(seed: int, words: int = 400) -> str:
+    rng = random.Random(seed)
+    vocabulary = [f"termino{index}" for index in range(2000)]
+    return " ".join(rng.choice(vocabulary) for _ in range(words))
+
+
+def _with_ocr_noise(text: str, changed_words: int) -> str:
+    words = text.split()
+    for index in range(0, changed_words * 37, 37):
+        words[index] = words[index].upper() + "x"
+    return " ".join(words)
+
+
+def _distance(first: int, second: int) -> int:
+    return (first ^ second).bit_count()
+
+
+def test_simhash_of_near_duplicates_differs_in_few_bits():
+    text = _resolution(1)
+    assert simhash(text) == simhash(text.upper())
+    assert _distance(simhash(text), simhash(_with_ocr_noise(text, 3))) <= 5
+    assert _distance(simhash(text), simhash(_resolution(2))) > 15
+
+
+def _index(tmp_path, **settings) -> DuplicateIndex:
+    return DuplicateIndex(str(tmp_path / "dedup.sqlite3"), **settings)
+
+
+def test_identical_file_matches_without_fingerprint(tmp_path):
+    index = _index(tmp_path)
+    index.add("/a.pdf", "hash-a", None, "/a.pdf")
+    assert index.find_canonical("/b.pdf", "hash-a", None) == ("/a.pdf", 0)
+    assert index.find_canonical("/a.pdf", "hash-a", None) is None
+
+
+def test_near_duplicate_text_is_found(tmp_path):
+    index = _index(tmp_path)
+    text = _resolution(1)
+    index.add("/a.pdf", "hash-a", simhash(text), "/a.pdf")
+    index.add("/other.pdf", "hash-o", simhash(_resolution(2)), "/other.pdf")
+
+    match = index.find_canonical("/b.pdf", "hash-b", simhash(_with_ocr_noise(text, 3)))
+    assert match is not None and match[0] == "/a.pdf"
+    assert index.find_canonical("/c.pdf", "hash-c", simhash(_resolution(3))) is None
+
+
+def test_resolution_key_vetoes_a_near_duplicate(tmp_path):
+    index = _index(tmp_path)
+    fingerprint = simhash(_resolution(1))
+    index.add("/a.pdf", "hash-a", fingerprint, "/a.pdf", resolution_key="1234/2023")
+
+    # Same template, different resolution: not a duplicate
+    assert index.find_canonical("/b.pdf", "hash-b", fingerprint, resolution_key="1235/2023") is None
+    assert index.find_canonical("/b.pdf", "hash-b", fingerprint, resolution_key="1234/2023") == ("/a.pdf", 0)
+    # A missing key on either side does not veto
+    assert index.find_canonical("/b.pdf", "hash-b", fingerprint) == ("/a.pdf", 0)
+
+
+def test_multi_probe_lsh_finds_every_match_within_the_distance(tmp_path):
+    index = _index(tmp_path, max_hamming_distance=5, lsh_bands=4)
+    fingerprint = 0x0123_4567_89AB_CDEF
+    index.add("/a.pdf", "hash-a", fingerprint, "/a.pdf")
+
+    spread = fingerprint ^ (1 << 0 | 1 << 1 | 1 << 16 | 1 << 32 | 1 << 48)
+    assert index.find_canonical("/b.pdf", "hash-b", spread) == ("/a.pdf", 5)
+    one_band = fingerprint ^ 0b11111
+    assert index.find_canonical("/c.pdf", "hash-c", one_band) == ("/a.pdf", 5)
+    too_far = fingerprint ^ (0b11 | 0b11 << 16 | 0b11 << 32)
+    assert index.find_canonical("/d.pdf", "hash-d", too_far) is None
+
+
+def test_duplicates_point_to_the_canonical_document(tmp_path):
+    index = _index(tmp_path)
+    fingerprint = simhash(_resolution(1))
+    index.add("/a.pdf", "hash-a", fingerprint, "/a.pdf")
+    index.add("/b.pdf", "hash-b", fingerprint, "/a.pdf")
+    index.set_summary("/a.pdf", "Resumen")
+
+    assert index.find_canonical("/c.pdf", "hash-b", None) == ("/a.pdf", 0)
+    assert index.get_summary("/a.pdf") == "Resumen"
+    assert index.get_summary("/missing.pdf") is None
+
+
+def test_changing_the_bands_rebuilds_the_index(tmp_path):
+    fingerprint = simhash(_resolution(1))
+    index = _index(tmp_path, lsh_bands=4)
+    index.add("/a.pdf", "hash-a", fingerprint, "/a.pdf")
+    index.close()
+
+    index = _index(tmp_path, lsh_bands=8)
+    assert index.find_canonical("/b.pdf", "hash-b", fingerprint ^ 0b111) == ("/a.pdf", 3)
@@ -0,0 +1,89 @@
+"""
+Tests of the rule-based field extractor.
+"""
+
+import pytest
+
+from field_extractor import FieldExtractor
+
+extractor = FieldExtractor([])
+
+
+@pytest.mark.parametrize(
+    "text, lote, manzana",
+    [
+        ("ADJUDICAR EL LOTE 12 DE LA MANZANA 5564 A FAVOR DE", "12", "5564"),
+        ("Manzana 5564 D.N.I. N° 23.456.789", None, "5564"),
+        ("LOTE 7 A NOMBRE DE LA SRA. PÉREZ", "7", None),
+        ("ubicado en el Lote 3, Manzana 5564 A, del barrio", "3", "5564 A"),
+        ("Lote N° 15B de la Mz. 5564-D.", "15 B", "5564 D"),
+        ("Lote 9 C.\nManzana 120 B\n", "9 C", "120 B"),
+    ],
+)
+def test_lote_and_manzana(text, lote, manzana):
+    fields = extractor.extract(text)
+    assert fields["lote"] == lote
+    assert fields["manzana"] == manzana
+    assert fields["lote_numero"] == (lote.split()[0] if lote else None)
+    assert fields["manzana_numero"] == (manzana.split()[0] if manzana else None)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("RESOLUCIÓN N° 1234/2023", "1234/2023"),
+        ("Resolucion Nº 45 - 23", "45-23"),
+        ("RESOLUCIÓN Nro. 789", "789"),
+    ],
+)
+def test_resolution_number(text, expected):
+    assert extractor.extract(text)["numero_resolucion"] == expected
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("VISTO el Expediente DE - 0963 - 00012355 - 12 y", "DE-0963-00012355-12"),
+        ("Expte. N° 12.345/2023", "12.345/2023"),
+        ("EXPEDIENTE 98765", "98765"),
+    ],
+)
+def test_expediente(text, expected):
+    assert extractor.extract(text)["expediente"] == expected
+
+
+def test_dni_are_normalized_and_unique():
+    text = "a favor de PÉREZ, D.N.I. N° 23.456.789, y GÓMEZ, DNI 30123456, ... D.N.I. 23.456.789"
+    assert extractor.extract(text)["dni"] == ["23456789", "30123456"]
+
+
+def test_padron_price_and_date():
+    text = "Santa Fe, 5 de marzo de 2023. Padrón Municipal N° 0.124.788, precio de venta $ 1.234.567,89"
+    fields = extractor.extract(text)
+    assert fields["padron"] == "0124788"
+    assert fields["precio"] == "1234567.89"
+    assert fields["fecha_resolucion"] == "2023-03-05"
+
+
+def test_numeric_date():
+    assert extractor.extract("Santa Fe, 07/11/2022")["fecha_resolucion"] == "2022-11-07"
+
+
+def test_missing_fields_are_none():
+    fields = extractor.extract("Texto sin datos")
+    assert all(value is None for value in fields.values())
+
+
+def test_unknown_required_field():
+    with pytest.raises(ValueError):
+        FieldExtractor(["ente_emisor"])
+
+
+def test_complete_document_summary():
+    fields = FieldExtractor(["numero_resolucion", "manzana"]).extract(
+        "RESOLUCIÓN N° 12/2023 del 5 de marzo de 2023, Manzana 5564 A, Lote 3."
+    )
+    assert FieldExtractor(["numero_resolucion", "manzana"]).is_complete(fields)
+    assert FieldExtractor.compose_summary(fields) == (
+        "Resolución N° 12/2023 del 2023-03-05. Inmueble: lote 3, manzana 5564 A."
+    )
@@ -0,0 +1,22 @@
+"""
+Tests of the OCR cache fingerprint.
+"""
+
+from dataclasses import replace
+
+from ocr_tesseract import OCR_tesseract
+from utils.config import OCRConfig
+
+
+def _fingerprint(ocr_config: OCRConfig) -> dict:
+    ocr = OCR_tesseract(OCRConfig())
+    ocr.ocr_config = ocr_config
+    ocr._tesseract_version = "5.3.0"
+    return ocr.cache_fingerprint()
+
+
+def test_backend_is_part_of_the_fingerprint():
+    ocr_config = OCRConfig()
+    assert _fingerprint(ocr_config) == _fingerprint(replace(ocr_config))
+    assert _fingerprint(ocr_config) != _fingerprint(replace(ocr_config, backend="tesserocr"))
+    assert _fingerprint(ocr_config) != _fingerprint(replace(ocr_config, psm=6))
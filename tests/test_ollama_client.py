@@ -0,0 +1,152 @@
+"""
+Tests of the pooled Ollama client and the LLM scheduler, against the fake Ollama server.
+"""
+
+import asyncio
+
+import httpx
+import ollama
+import pytest
+
+from benchmarks.fake_ollama import FakeOllamaServer
+from llm_scheduler import LLMScheduler, is_retriable
+from ollama_client import OllamaClient
+from utils.config import OllamaClientConfig, SchedulerConfig
+
+
+def _client(server: FakeOllamaServer, **settings) -> OllamaClient:
+    return OllamaClient(OllamaClientConfig(host=server.url, **settings))
+
+
+def test_generate_reuses_pooled_connections(fake_ollama):
+    async def run():
+        client = _client(fake_ollama, max_connections=2, max_keepalive_connections=2)
+        for _ in range(5):
+            await client.generate(model="m", prompt="Resumir")
+        responses = await asyncio.gather(*[client.generate(model="m", prompt="Resumir") for _ in range(10)])
+        await client.close()
+        return client, responses
+
+    client, responses = asyncio.run(run())
+    assert all(response.response.endswith("<|end-output|>") for response in responses)
+    assert client.stats()["requests"] == 15
+    assert fake_ollama.requests == 15
+    assert len(fake_ollama.connections) <= 2
+
+
+def test_generate_stream_early_stop_closes_the_stream(fake_ollama):
+    async def run():
+        client = _client(fake_ollama)
+        chunks = []
+        stream = client.generate_stream(model="m", prompt="Resumir")
+        async for chunk in stream:
+            chunks.append(chunk.response)
+            if len(chunks) == 3:
+                break
+        await stream.aclose()
+
+        complete = [chunk.response async for chunk in client.generate_stream(model="m", prompt="Resumir")]
+        await client.close()
+        return client, chunks, complete
+
+    client, chunks, complete = asyncio.run(run())
+    assert len(chunks) == 3
+    assert len(complete) == 22  # 20 words, the stop marker and the final chunk
+    stats = client.stats()
+    assert stats["early_stops"] == 1
+    assert stats["requests"] == 1  # Only the complete stream reports the server timings
+
+
+def test_warm_up_loads_the_model_before_the_first_request():
+    server = FakeOllamaServer(load_seconds=0.3, prompt_seconds=0.0, token_seconds=0.0, response_words=5).start()
+
+    async def run():
+        client = _client(server, cold_load_threshold_seconds=0.2)
+        await client.warm_up("m")
+        await client.generate(model="m", prompt="Resumir")
+        await client.close()
+        return client
+
+    try:
+        client = asyncio.run(run())
+    finally:
+        server.stop()
+    assert server.requests == 2
+    assert client.stats()["cold_loads"] == 0
+
+
+def test_warm_up_failure_is_only_logged():
+    async def run():
+        client = OllamaClient(OllamaClientConfig(host="http://127.0.0.1:9", connect_timeout_seconds=0.5))
+        await client.warm_up("m")
+        await client.close()
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize(
+    "error, retriable",
+    [
+        (ollama.ResponseError("busy", 429), True),
+        (ollama.ResponseError("internal", 500), True),
+        (ollama.ResponseError("unavailable", 503), True),
+        (ollama.ResponseError("runner crashed", -1), True),
+        (ollama.ResponseError("model not found", 404), False),
+        (ollama.ResponseError("bad request", 400), False),
+        (asyncio.TimeoutError(), True),
+        (httpx.ConnectError("refused"), True),
+        (httpx.ReadTimeout("slow"), True),
+        (ConnectionResetError(), True),
+        (ValueError("bad prompt"), False),
+    ],
+)
+def test_is_retriable(error, retriable):
+    assert is_retriable(error) is retriable
+
+
+def _scheduler() -> LLMScheduler:
+    return LLMScheduler(SchedulerConfig(initial_concurrency=4, backoff_base_seconds=0.001, backoff_max_seconds=0.001))
+
+
+def test_scheduler_retries_transient_errors():
+    scheduler = _scheduler()
+    attempts = []
+
+    async def request():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ollama.ResponseError("unavailable", 503)
+        return "ok"
+
+    assert asyncio.run(scheduler.run(request)) == "ok"
+    assert len(attempts) == 3
+    assert scheduler.stats()["retries"] == 2
+    assert scheduler.limit < 4
+
+
+def test_scheduler_raises_other_errors_at_once():
+    scheduler = _scheduler()
+    attempts = []
+
+    async def request():
+        attempts.append(1)
+        raise ollama.ResponseError("model not found", 404)
+
+    with pytest.raises(ollama.ResponseError):
+        asyncio.run(scheduler.run(request))
+    assert len(attempts) == 1
+    assert scheduler.limit == 4
+    assert scheduler.stats()["failed"] == 1
+
+
+def test_scheduler_gives_up_after_max_retries():
+    scheduler = LLMScheduler(SchedulerConfig(max_retries=2, backoff_base_seconds=0.001, backoff_max_seconds=0.001))
+    attempts = []
+
+    async def request():
+        attempts.append(1)
+        raise ollama.ResponseError("busy", 429)
+
+    with pytest.raises(ollama.ResponseError):
+        asyncio.run(scheduler.run(request))
+    assert len(attempts) == 3
@@ -0,0 +1,72 @@
+"""
+Tests of the SQLite search index.
+"""
+
+import sqlite3
+
+from search_index import SearchIndex, fts_query
+
+TEXT = (
+    "RESOLUCIÓN N° {number}/2023. Santa Fe, 5 de marzo de 2023. Regularización dominial del inmueble "
+    "ubicado en el Lote 3, Manzana {manzana}, Padrón Municipal N° 0.124.788, a favor de D.N.I. 23.456.789."
+)
+
+
+def _index(tmp_path) -> SearchIndex:
+    index = SearchIndex(str(tmp_path / "search.sqlite3"))
+    for number, manzana in ((1, "5564"), (2, "5564 A"), (3, "5564-D."), (4, "556")):
+        index.upsert(f"/doc/{number}.pdf", f"{number}.pdf", TEXT.format(number=number, manzana=manzana))
+    return index
+
+
+def _files(matches) -> list:
+    return sorted(match["source_file"] for match in matches)
+
+
+def test_bare_manzana_finds_every_subdivision(tmp_path):
+    index = _index(tmp_path)
+    assert _files(index.search(manzana="5564")) == ["1.pdf", "2.pdf", "3.pdf"]
+    assert _files(index.search(manzana="5564A")) == ["2.pdf"]
+    assert _files(index.search(manzana="5564-d")) == ["3.pdf"]
+    assert _files(index.search(lote="3")) == ["1.pdf", "2.pdf", "3.pdf", "4.pdf"]
+
+
+def test_full_text_with_field_filters(tmp_path):
+    index = _index(tmp_path)
+    matches = index.search("regularizacion dominial", manzana="5564")
+    assert _files(matches) == ["1.pdf", "2.pdf", "3.pdf"]
+    assert all("[" in match["snippet"] for match in matches)
+    assert _files(index.search(dni="23456789", numero_resolucion="2/2023")) == ["2.pdf"]
+    assert _files(index.search(padron="0.124.788", date_from="2023-01-01", date_to="2023-12-31")) == [
+        "1.pdf", "2.pdf", "3.pdf", "4.pdf",
+    ]
+
+
+def test_upsert_replaces_the_document(tmp_path):
+    index = _index(tmp_path)
+    index.upsert("/doc/1.pdf", "1.pdf", "Texto nuevo, Manzana 77.")
+    assert index.count() == 4
+    assert _files(index.search("regularizacion", manzana="5564")) == ["2.pdf", "3.pdf"]
+    assert _files(index.search(manzana="77")) == ["1.pdf"]
+
+
+def test_index_without_number_columns_is_migrated(tmp_path):
+    db_path = tmp_path / "old.sqlite3"
+    connection = sqlite3.connect(db_path)
+    connection.execute(
+        "CREATE TABLE documents (id INTEGER PRIMARY KEY, doc_id TEXT NOT NULL UNIQUE, source_file TEXT NOT NULL, "
+        "numero_resolucion TEXT, fecha_resolucion TEXT, expediente TEXT, lote TEXT, manzana TEXT, padron TEXT, "
+        "summary TEXT, text TEXT NOT NULL, updated_at REAL NOT NULL)"
+    )
+    connection.execute(
+        "INSERT INTO documents (doc_id, source_file, manzana, text, updated_at) VALUES ('/a.pdf', 'a.pdf', '5564 D', 'x', 0)"
+    )
+    connection.commit()
+    connection.close()
+
+    assert _files(SearchIndex(str(db_path)).search(manzana="5564")) == ["a.pdf"]
+
+
+def test_fts_query_quotes_words():
+    assert fts_query('padrón "OR" 55*') == '"padrón" "OR" "55"*'
+    assert fts_query("  ") == ""
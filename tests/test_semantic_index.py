@@ -0,0 +1,139 @@
+"""
+Tests of the semantic index, with the deterministic hashing embedder.
+"""
+
+import asyncio
+import json
+import os
+
+import numpy as np
+
+from llm_scheduler import LLMScheduler
+from ollama_client import OllamaClient
+from semantic_index import HashingEmbedder, OllamaEmbedder, SemanticIndex
+from utils.config import OllamaClientConfig
+
+TOPICS = [
+    "regularización dominial del inmueble de la vecinal Sarmiento",
+    "adjudicación en venta de una unidad habitacional del barrio Centenario",
+    "escrituración de la vivienda a favor de la beneficiaria",
+    "cancelación de la hipoteca por pago total del precio",
+]
+
+
+def _index(directory, **settings) -> SemanticIndex:
+    return SemanticIndex(str(directory), HashingEmbedder(256), **{"ivf_min_vectors": 0, **settings})
+
+
+def _add(index: SemanticIndex, name: str, text: str, summary: str = None) -> int:
+    return asyncio.run(index.add_document(f"/doc/{name}", name, text, summary=summary))
+
+
+def _search(index: SemanticIndex, query: str, k: int = 1) -> list:
+    return [match["source_file"] for match in asyncio.run(index.search(query, k))]
+
+
+def test_add_search_and_re_add(tmp_path):
+    index = _index(tmp_path)
+    for number, topic in enumerate(TOPICS):
+        assert _add(index, f"{number}.pdf", topic, summary=f"Resolución sobre {topic}") == 2
+    assert index.documents == 4
+    assert _search(index, "cancelación de la hipoteca") == ["3.pdf"]
+
+    # Re-adding a document replaces its vectors
+    _add(index, "3.pdf", "constancia de libre deuda municipal")
+    assert index.documents == 4
+    assert index.count == 9
+    assert _search(index, "libre deuda") == ["3.pdf"]
+    assert _search(index, "cancelación de la hipoteca") != ["3.pdf"]
+
+    index.remove("/doc/3.pdf")
+    assert index.documents == 3
+    assert "3.pdf" not in _search(index, "libre deuda", k=4)
+
+
+def test_reload_keeps_the_documents(tmp_path):
+    index = _index(tmp_path)
+    for number, topic in enumerate(TOPICS):
+        _add(index, f"{number}.pdf", topic)
+    index.save()
+
+    reloaded = _index(tmp_path)
+    assert reloaded.documents == 4
+    assert _search(reloaded, "escrituración de la vivienda") == ["2.pdf"]
+
+
+def test_compaction_writes_a_new_generation(tmp_path):
+    index = _index(tmp_path)
+    for number, topic in enumerate(TOPICS):
+        _add(index, f"{number}.pdf", topic)
+    index.save()
+    for number, topic in enumerate(TOPICS[:2]):
+        _add(index, f"{number}.pdf", f"{topic} ampliada")
+    index.save()
+
+    assert sorted(os.listdir(tmp_path)) == ["ids.json", "vectors.1.f32"]
+    with open(tmp_path / "ids.json", encoding="utf-8") as f:
+        assert json.load(f)["generation"] == 1
+    reloaded = _index(tmp_path)
+    assert reloaded.count == 4
+    assert _search(reloaded, "cancelación de la hipoteca") == ["3.pdf"]
+
+
+def test_crash_during_compaction_keeps_the_previous_generation(tmp_path):
+    index = _index(tmp_path)
+    for number, topic in enumerate(TOPICS):
+        _add(index, f"{number}.pdf", topic)
+    index.save()
+    for number, topic in enumerate(TOPICS[:2]):
+        _add(index, f"{number}.pdf", f"{topic} ampliada")
+    # Crash after the new generation was written, before the id map naming it
+    index._compact()
+
+    reloaded = _index(tmp_path)
+    assert reloaded.count == 4
+    assert _search(reloaded, "cancelación de la hipoteca") == ["3.pdf"]
+    reloaded.save()
+    assert "vectors.f32" in os.listdir(tmp_path)
+
+
+def test_short_vector_file_starts_a_new_index(tmp_path):
+    index = _index(tmp_path)
+    for number, topic in enumerate(TOPICS):
+        _add(index, f"{number}.pdf", topic)
+    index.save()
+    with open(tmp_path / "vectors.f32", "r+b") as f:
+        f.truncate(256 * 4)
+
+    assert _index(tmp_path).count == 0
+
+
+def test_ivf_is_trained_and_persisted(tmp_path):
+    index = _index(tmp_path, ivf_min_vectors=40, ivf_probes=4)
+    rng = np.random.default_rng(1)
+    for number in range(100):
+        _add(index, f"{number}.pdf", " ".join(rng.choice(["lote", "manzana", "padrón", "venta", "hipoteca", "barrio"], 6)))
+        if index._centroids is not None:
+            break
+    assert index._centroids is not None
+    _add(index, "extra.pdf", "cancelación de la hipoteca por pago total del precio")
+    assert len(index._assignments) == index.count
+    index.save()
+
+    reloaded = _index(tmp_path, ivf_min_vectors=40, ivf_probes=len(index._centroids))
+    assert np.array_equal(reloaded._assignments, index._assignments)
+    assert np.array_equal(reloaded._centroids, index._centroids)
+    assert _search(reloaded, "cancelación de la hipoteca por pago total del precio") == ["extra.pdf"]
+
+
+def test_ollama_embedder_goes_through_the_scheduler(fake_ollama):
+    async def run():
+        client = OllamaClient(OllamaClientConfig(host=fake_ollama.url))
+        scheduler = LLMScheduler()
+        vectors = await OllamaEmbedder(client, "embed-model", batch_size=2, scheduler=scheduler).embed(TOPICS + ["x"])
+        await client.close()
+        return scheduler, vectors
+
+    scheduler, vectors = asyncio.run(run())
+    assert vectors.shape == (5, 64)
+    assert scheduler.stats()["succeeded"] == 3
@@ -0,0 +1,105 @@
+"""
+Tests of the summarizer: map-reduce over long documents and the streamed summary filter.
+"""
+
+import asyncio
+from dataclasses import replace
+
+from summarizer import REDUCE_PROMPT_TEMPLATE, StreamingSummaryFilter, Summarizer
+from utils.config import OllamaConfig, get_config
+
+
+class RecordingSummarizer(Summarizer):
+    """Summarizer whose model answers every prompt with `response_words` words."""
+
+    def __init__(self, model_config: OllamaConfig, response_words: int):
+        super().__init__(model_config)
+        self.response_words = response_words
+        self.prompts = []
+
+    async def _generate_summary(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        return " ".join(f"palabra{index}" for index in range(self.response_words))
+
+
+def _prompt_text_chars(prompt: str, model_config: OllamaConfig) -> int:
+    """Characters of the summaries inside a reduce prompt, without the template."""
+    return len(prompt) - len(REDUCE_PROMPT_TEMPLATE.format(text="", max_words=model_config.summary_max_words))
+
+
+def _reduce(model_config: OllamaConfig, partials: int, response_words: int):
+    summarizer = RecordingSummarizer(model_config, response_words)
+    partial_summaries = [" ".join(["resumen"] * 2000)] * partials
+    summary = asyncio.run(summarizer._reduce_summaries(partial_summaries))
+    return summarizer, summary
+
+
+def test_reduce_prompts_stay_within_the_chunk_budget():
+    model_config = replace(get_config().ollama, chunk_max_tokens=256, chars_per_token=4.0, summary_max_words=400)
+    budget_chars = model_config.chunk_max_tokens * model_config.chars_per_token
+    for partials in (2, 3, 7):
+        summarizer, summary = _reduce(model_config, partials, response_words=900)
+        assert len(summary.split()) <= model_config.summary_max_words
+        # The "Parte N:" labels may add a few characters to the budget
+        assert all(_prompt_text_chars(prompt, model_config) <= budget_chars + 32 for prompt in summarizer.prompts)
+
+
+def test_partials_that_fit_are_reduced_in_one_prompt():
+    model_config = replace(get_config().ollama, chunk_max_tokens=3000, chars_per_token=4.0, summary_max_words=50)
+    summarizer, summary = _reduce(model_config, partials=4, response_words=80)
+    assert len(summarizer.prompts) == 1
+    assert summarizer.prompts[0].count("Parte ") == 4
+    assert len(summary.split()) <= 50
+
+
+def test_limit_words_cuts_at_a_sentence_end():
+    summary = "Primera oración completa. Segunda oración que no entra en el límite"
+    assert Summarizer._limit_words(summary, 4) == "Primera oración completa."
+    assert Summarizer._limit_words(summary, 9) == "Primera oración completa. Segunda oración que no entra en"
+    assert Summarizer._limit_words(summary, 100) == summary
+
+
+def _feed(summary_filter: StreamingSummaryFilter, text: str, chunk_size: int) -> bool:
+    stopped = False
+    for start in range(0, len(text), chunk_size):
+        stopped = summary_filter.feed(text[start:start + chunk_size])
+    return stopped
+
+
+def test_streaming_word_count_matches_a_full_count():
+    text = "Resolución  de la\nDirección Provincial de Vivienda, que adjudica la unidad habitacional. " * 20
+    for chunk_size in (1, 2, 3, 7, 50):
+        summary_filter = StreamingSummaryFilter("", max_words=10_000)
+        assert not _feed(summary_filter, text, chunk_size)
+        assert summary_filter._word_count == len(text.split())
+        assert summary_filter.text == text
+
+
+def test_streaming_stops_at_the_word_budget():
+    summary_filter = StreamingSummaryFilter("", max_words=5)
+    assert not summary_filter.feed("uno dos tr")
+    assert not summary_filter.feed("es cuatro ")
+    assert summary_filter.feed("cinco seis")
+    assert summary_filter.feed("siete")
+    # The chunk that reached the budget is kept; _stream_summary cuts it to max_words
+    assert summary_filter.text == "uno dos tres cuatro cinco seis"
+
+
+def test_streaming_stops_at_the_stop_marker_split_across_chunks():
+    summary_filter = StreamingSummaryFilter("<|end-output|>", max_words=100)
+    assert not _feed(summary_filter, "Resumen final.<|end-", chunk_size=4)
+    assert summary_filter.feed("output|> texto descartado")
+    assert summary_filter.text == "Resumen final."
+
+
+def test_streaming_drops_think_segments():
+    text = "<think>razonamiento largo</think>Resumen <thi" + "nk>otro</think>visible.<|end-output|>"
+    summary_filter = StreamingSummaryFilter("<|end-output|>", max_words=100)
+    assert _feed(summary_filter, text, chunk_size=3)
+    assert summary_filter.text == "Resumen visible."
+
+
+def test_unfinished_marker_prefix_is_kept_at_the_end():
+    summary_filter = StreamingSummaryFilter("<|end-output|>", max_words=100)
+    summary_filter.feed("Resumen <|end")
+    assert summary_filter.text == "Resumen <|end"